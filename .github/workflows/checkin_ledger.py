@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+每日签到记录
+各签到脚本共用：保存当天（北京时间）签到成功的账号，同一天再次运行时跳过，FORCE_CHECKIN=true 时强制签到。
+
+记录文件为 <缓存目录>/<站点>_ledger.json，只保存当天的记录；账号以站点 + 账号标识的哈希为键。
+账号标识应取稳定的账号 ID（邮箱、用户名、UID 或 cookie 中标识登录的字段），
+而不是整段 cookie/token，避免凭据中的时间戳、追踪参数变化或 token 轮换后同一账号被重复签到。
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from datetime import datetime
+
+try:
+    from zoneinfo import ZoneInfo
+    BEIJING_TZ = ZoneInfo("Asia/Shanghai")
+except ImportError:
+    BEIJING_TZ = None
+
+FORCE_CHECKIN = os.getenv("FORCE_CHECKIN", "false").lower() == "true"
+
+
+def now_beijing():
+    """获取北京时间"""
+    if BEIJING_TZ:
+        return datetime.now(BEIJING_TZ)
+    return datetime.now()
+
+
+def account_id(credential, *fields):
+    """
+    从 cookie（k=v; k=v）或查询串（k=v&k=v）中取出标识账号的字段作为账号标识，
+    按 fields 顺序取第一个存在的字段；以下划线开头的字段按后缀匹配（如 Discuz 带随机前缀的 xxxx_auth）。
+    均未找到时退回整段凭据
+    """
+    pairs = {}
+    for item in re.split(r"[;&]", credential):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            pairs.setdefault(name.strip(), value.strip())
+
+    for field in fields:
+        for name, value in pairs.items():
+            if value and (name == field or (field.startswith("_") and name.endswith(field))):
+                return f"{field}={value}"
+    return credential.strip()
+
+
+class CheckinLedger:
+    """每日签到记录"""
+
+    def __init__(self, site, cache_dir):
+        self.site = site
+        self.cache_dir = cache_dir
+        self.path = os.path.join(cache_dir, f"{site}_ledger.json")
+        self.lock = threading.Lock()
+
+    def _today(self):
+        return now_beijing().strftime("%Y-%m-%d")
+
+    def _key(self, account):
+        return hashlib.sha256(f"{self.site}|{account}".encode("utf-8")).hexdigest()[:32]
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("date") == self._today():
+                return data.get("accounts", {})
+        except (OSError, ValueError, AttributeError):
+            pass
+        return {}
+
+    def succeeded(self, account):
+        """返回账号今日签到成功的时间，未记录、无账号标识或强制签到时返回 None"""
+        if FORCE_CHECKIN or not account:
+            return None
+        return self._load().get(self._key(account))
+
+    def record(self, account):
+        """记录账号今日签到成功"""
+        if not account:
+            return
+        with self.lock:
+            accounts = self._load()
+            accounts[self._key(account)] = now_beijing().strftime("%H:%M:%S")
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(prefix=f".{self.site}_ledger_", suffix=".tmp", dir=self.cache_dir)
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump({"date": self._today(), "accounts": accounts}, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"⚠️ 签到记录保存失败: {e}")
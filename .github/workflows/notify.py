@@ -1,15 +1,19 @@
 #!/usr/bin/env python3
 # _*_ coding:utf-8 _*_
+import atexit
 import base64
 import hashlib
 import hmac
 import json
 import os
+import random
 import re
 import threading
 import time
 import urllib.parse
 import smtplib
+import sys
+from concurrent.futures import ThreadPoolExecutor, wait
 from email.mime.text import MIMEText
 from email.header import Header
 from email.utils import formataddr
@@ -143,6 +147,221 @@ for k in push_config:
         push_config[k] = v
 
 
+# 推送调度配置
+PUSH_WORKERS = int(os.getenv("PUSH_WORKERS", "4"))  # 推送线程池大小
+PUSH_TIMEOUT = float(os.getenv("PUSH_TIMEOUT", "15"))  # 渠道默认请求超时（秒）
+# 单独设置渠道超时，格式：渠道函数名=秒，多个用英文逗号分隔，例：smtp=30,telegram_bot=20
+PUSH_CHANNEL_TIMEOUTS = {
+    name.strip(): float(value)
+    for name, _, value in (
+        item.partition("=") for item in os.getenv("PUSH_CHANNEL_TIMEOUTS", "").split(",")
+    )
+    if name.strip() and value.strip()
+}
+
+
+class PooledHttp:
+    """
+    按推送主机复用 requests.Session 保持长连接，并按当前渠道设置默认超时。
+    """
+
+    def __init__(self):
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def session(self, url: str) -> requests.Session:
+        host = urllib.parse.urlsplit(url).netloc
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=1, pool_maxsize=max(1, PUSH_WORKERS)
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self.sessions[host] = session
+            return session
+
+    def timeout(self) -> float:
+        channel = getattr(self.local, "channel", None)
+        return PUSH_CHANNEL_TIMEOUTS.get(channel, PUSH_TIMEOUT)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout())
+        return self.session(url).request(method, url, **kwargs)
+
+    def get(self, url: str, params=None, **kwargs) -> requests.Response:
+        return self.request("GET", url, params=params, **kwargs)
+
+    def post(self, url: str, data=None, json=None, **kwargs) -> requests.Response:
+        return self.request("POST", url, data=data, json=json, **kwargs)
+
+
+http_pool = PooledHttp()
+
+
+class NotifyDispatcher:
+    """
+    推送调度器：在有界线程池中异步执行各渠道推送，进程结束前 flush 等待全部完成。
+    """
+
+    def __init__(self, max_workers: int = PUSH_WORKERS):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, max_workers), thread_name_prefix="notify"
+        )
+        self.pending = set()
+        self.lock = threading.Lock()
+
+    def _run(self, mode, title: str, content: str) -> None:
+        http_pool.local.channel = mode.__name__
+        try:
+            mode(title, content)
+        except Exception as e:
+            print(f"{mode.__name__} 推送异常：{e}")
+        finally:
+            http_pool.local.channel = None
+
+    def _done(self, future) -> None:
+        with self.lock:
+            self.pending.discard(future)
+
+    def submit(self, mode, title: str, content: str) -> None:
+        future = self.executor.submit(self._run, mode, title, content)
+        with self.lock:
+            self.pending.add(future)
+        future.add_done_callback(self._done)
+
+    def flush(self, timeout: float = None) -> None:
+        with self.lock:
+            futures = list(self.pending)
+        if futures:
+            wait(futures, timeout=timeout)
+
+
+dispatcher = NotifyDispatcher()
+
+
+# 汇总推送配置：开启后各脚本的通知先写入本地暂存文件，最后由 flush_spool 合并为每个渠道一条消息
+PUSH_SPOOL = os.getenv("PUSH_SPOOL", "false").lower() == "true"
+PUSH_SPOOL_TITLE = os.getenv("PUSH_SPOOL_TITLE", "签到汇总")
+CACHE_DIR = os.getenv("CHECKIN_CACHE_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache"
+)
+PUSH_SPOOL_FILE = os.path.join(CACHE_DIR, "notify_spool.jsonl")
+
+# 各渠道单条消息长度上限（UTF-8 字节），未列出的渠道使用默认值，0 表示不限制
+PUSH_CHANNEL_LIMITS = {
+    "bark": 3500,
+    "console": 0,
+    "dingding_bot": 18000,
+    "feishu_bot": 18000,
+    "serverJ": 30000,
+    "pushplus_bot": 18000,
+    "qmsg_bot": 4000,
+    "wecom_app": 2000,
+    "wecom_bot": 4000,
+    "telegram_bot": 4000,
+}
+PUSH_DEFAULT_LIMIT = 18000
+
+
+class NotifySpool:
+    """
+    通知暂存文件：每条通知一行 JSON，支持多线程及多进程追加写入。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def append(self, title: str, content: str) -> None:
+        line = json.dumps({"title": title, "content": content}, ensure_ascii=False) + "\n"
+        with self.lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def drain(self) -> list:
+        """
+        取出并清空全部暂存通知，先改名再读取，避免与追加写入冲突。
+        """
+        draining = self.path + ".flushing"
+        with self.lock:
+            if os.path.exists(self.path):
+                os.replace(self.path, draining)
+            if not os.path.exists(draining):
+                return []
+            entries = []
+            with open(draining, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+            os.remove(draining)
+            return entries
+
+
+spool = NotifySpool(PUSH_SPOOL_FILE)
+
+
+def byte_len(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def split_text(text: str, limit: int) -> list:
+    """
+    将超长文本按行拆分，单行仍超长时按字符截断。
+    """
+    pieces = []
+    for line in text.split("\n"):
+        while byte_len(line) > limit:
+            cut = limit
+            while byte_len(line[:cut]) > limit:
+                cut -= 1
+            pieces.append(line[:cut])
+            line = line[cut:]
+        pieces.append(line)
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        candidate = f"{current}\n{piece}" if current else piece
+        if current and byte_len(candidate) > limit:
+            chunks.append(current)
+            current = piece
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def pack_sections(sections: list, limit: int) -> list:
+    """
+    按渠道长度上限将各段通知合并为尽量少的消息，段落不被拆开，超长段落单独拆分。
+    """
+    if not limit:
+        return ["\n\n".join(sections)]
+
+    messages = []
+    current = ""
+    for section in sections:
+        parts = split_text(section, limit) if byte_len(section) > limit else [section]
+        for part in parts:
+            candidate = f"{current}\n\n{part}" if current else part
+            if current and byte_len(candidate) > limit:
+                messages.append(current)
+                current = part
+            else:
+                current = candidate
+    if current:
+        messages.append(current)
+    return messages
+
+
 def bark(title: str, content: str) -> None:
     """
     使用 bark 推送消息。
@@ -177,8 +396,8 @@ def bark(title: str, content: str) -> None:
     ):
         data[bark_params.get(pair[0])] = pair[1]
     headers = {"Content-Type": "application/json;charset=utf-8"}
-    response = requests.post(
-        url=url, data=json.dumps(data), headers=headers, timeout=15
+    response = http_pool.post(
+        url=url, data=json.dumps(data), headers=headers
     ).json()
 
     if response["code"] == 200:
@@ -213,8 +432,8 @@ def dingding_bot(title: str, content: str) -> None:
     url = f'https://oapi.dingtalk.com/robot/send?access_token={push_config.get("DD_BOT_TOKEN")}&timestamp={timestamp}&sign={sign}'
     headers = {"Content-Type": "application/json;charset=utf-8"}
     data = {"msgtype": "text", "text": {"content": f"{title}\n\n{content}"}}
-    response = requests.post(
-        url=url, data=json.dumps(data), headers=headers, timeout=15
+    response = http_pool.post(
+        url=url, data=json.dumps(data), headers=headers
     ).json()
 
     if not response["errcode"]:
@@ -233,7 +452,7 @@ def feishu_bot(title: str, content: str) -> None:
 
     url = f'https://open.feishu.cn/open-apis/bot/v2/hook/{push_config.get("FSKEY")}'
     data = {"msg_type": "text", "content": {"text": f"{title}\n\n{content}"}}
-    response = requests.post(url, data=json.dumps(data)).json()
+    response = http_pool.post(url, data=json.dumps(data)).json()
 
     if response.get("StatusCode") == 0 or response.get("code") == 0:
         print("飞书 推送成功！")
@@ -250,7 +469,7 @@ def go_cqhttp(title: str, content: str) -> None:
     print("go-cqhttp 服务启动")
 
     url = f'{push_config.get("GOBOT_URL")}?access_token={push_config.get("GOBOT_TOKEN")}&{push_config.get("GOBOT_QQ")}&message=标题:{title}\n内容:{content}'
-    response = requests.get(url).json()
+    response = http_pool.get(url).json()
 
     if response["status"] == "ok":
         print("go-cqhttp 推送成功！")
@@ -272,7 +491,7 @@ def gotify(title: str, content: str) -> None:
         "message": content,
         "priority": push_config.get("GOTIFY_PRIORITY"),
     }
-    response = requests.post(url, data=data).json()
+    response = http_pool.post(url, data=data).json()
 
     if response.get("id"):
         print("gotify 推送成功！")
@@ -291,7 +510,7 @@ def iGot(title: str, content: str) -> None:
     url = f'https://push.hellyw.com/{push_config.get("IGOT_PUSH_KEY")}'
     data = {"title": title, "content": content}
     headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    response = requests.post(url, data=data, headers=headers).json()
+    response = http_pool.post(url, data=data, headers=headers).json()
 
     if response["ret"] == 0:
         print("iGot 推送成功！")
@@ -316,7 +535,7 @@ def serverJ(title: str, content: str) -> None:
     else:
         url = f'https://sctapi.ftqq.com/{push_config.get("PUSH_KEY")}.send'
 
-    response = requests.post(url, data=data).json()
+    response = http_pool.post(url, data=data).json()
 
     if response.get("errno") == 0 or response.get("code") == 0:
         print("serverJ 推送成功！")
@@ -341,7 +560,7 @@ def pushdeer(title: str, content: str) -> None:
     if push_config.get("DEER_URL"):
         url = push_config.get("DEER_URL")
 
-    response = requests.post(url, data=data).json()
+    response = http_pool.post(url, data=data).json()
 
     if len(response.get("content").get("result")) > 0:
         print("PushDeer 推送成功！")
@@ -358,7 +577,7 @@ def chat(title: str, content: str) -> None:
     print("chat 服务启动")
     data = "payload=" + json.dumps({"text": title + "\n" + content})
     url = push_config.get("CHAT_URL") + push_config.get("CHAT_TOKEN")
-    response = requests.post(url, data=data)
+    response = http_pool.post(url, data=data)
 
     if response.status_code == 200:
         print("Chat 推送成功！")
@@ -388,7 +607,7 @@ def pushplus_bot(title: str, content: str) -> None:
     }
     body = json.dumps(data).encode(encoding="utf-8")
     headers = {"Content-Type": "application/json"}
-    response = requests.post(url=url, data=body, headers=headers).json()
+    response = http_pool.post(url=url, data=body, headers=headers).json()
 
     code = response["code"]
     if code == 200:
@@ -402,7 +621,7 @@ def pushplus_bot(title: str, content: str) -> None:
     else:
         url_old = "http://pushplus.hxtrip.com/send"
         headers["Accept"] = "application/json"
-        response = requests.post(url=url_old, data=body, headers=headers).json()
+        response = http_pool.post(url=url_old, data=body, headers=headers).json()
 
         if response["code"] == 200:
             print("PUSHPLUS(hxtrip) 推送成功！")
@@ -434,7 +653,7 @@ def weplus_bot(title: str, content: str) -> None:
     }
     body = json.dumps(data).encode(encoding="utf-8")
     headers = {"Content-Type": "application/json"}
-    response = requests.post(url=url, data=body, headers=headers).json()
+    response = http_pool.post(url=url, data=body, headers=headers).json()
 
     if response["code"] == 200:
         print("微加机器人 推送成功！")
@@ -452,7 +671,7 @@ def qmsg_bot(title: str, content: str) -> None:
 
     url = f'https://qmsg.zendee.cn/{push_config.get("QMSG_TYPE")}/{push_config.get("QMSG_KEY")}'
     payload = {"msg": f'{title}\n\n{content.replace("----", "-")}'.encode("utf-8")}
-    response = requests.post(url=url, params=payload).json()
+    response = http_pool.post(url=url, params=payload).json()
 
     if response["code"] == 0:
         print("qmsg 推送成功！")
@@ -509,7 +728,7 @@ class WeCom:
             "corpid": self.CORPID,
             "corpsecret": self.CORPSECRET,
         }
-        req = requests.post(url, params=values)
+        req = http_pool.post(url, params=values)
         data = json.loads(req.text)
         return data["access_token"]
 
@@ -525,7 +744,7 @@ class WeCom:
             "safe": "0",
         }
         send_msges = bytes(json.dumps(send_values), "utf-8")
-        respone = requests.post(send_url, send_msges)
+        respone = http_pool.post(send_url, send_msges)
         respone = respone.json()
         return respone["errmsg"]
 
@@ -551,7 +770,7 @@ class WeCom:
             },
         }
         send_msges = bytes(json.dumps(send_values), "utf-8")
-        respone = requests.post(send_url, send_msges)
+        respone = http_pool.post(send_url, send_msges)
         respone = respone.json()
         return respone["errmsg"]
 
@@ -571,8 +790,8 @@ def wecom_bot(title: str, content: str) -> None:
     url = f"{origin}/cgi-bin/webhook/send?key={push_config.get('QYWX_KEY')}"
     headers = {"Content-Type": "application/json;charset=utf-8"}
     data = {"msgtype": "text", "text": {"content": f"{title}\n\n{content}"}}
-    response = requests.post(
-        url=url, data=json.dumps(data), headers=headers, timeout=15
+    response = http_pool.post(
+        url=url, data=json.dumps(data), headers=headers
     ).json()
 
     if response["errcode"] == 0:
@@ -615,7 +834,7 @@ def telegram_bot(title: str, content: str) -> None:
             push_config.get("TG_PROXY_HOST"), push_config.get("TG_PROXY_PORT")
         )
         proxies = {"http": proxyStr, "https": proxyStr}
-    response = requests.post(
+    response = http_pool.post(
         url=url, headers=headers, params=payload, proxies=proxies
     ).json()
 
@@ -653,7 +872,7 @@ def aibotk(title: str, content: str) -> None:
         }
     body = json.dumps(data).encode(encoding="utf-8")
     headers = {"Content-Type": "application/json"}
-    response = requests.post(url=url, data=body, headers=headers).json()
+    response = http_pool.post(url=url, data=body, headers=headers).json()
     print(response)
     if response["code"] == 0:
         print("智能微秘书 推送成功！")
@@ -692,9 +911,9 @@ def smtp(title: str, content: str) -> None:
 
     try:
         smtp_server = (
-            smtplib.SMTP_SSL(push_config.get("SMTP_SERVER"))
+            smtplib.SMTP_SSL(push_config.get("SMTP_SERVER"), timeout=http_pool.timeout())
             if push_config.get("SMTP_SSL") == "true"
-            else smtplib.SMTP(push_config.get("SMTP_SERVER"))
+            else smtplib.SMTP(push_config.get("SMTP_SERVER"), timeout=http_pool.timeout())
         )
         smtp_server.login(
             push_config.get("SMTP_EMAIL"), push_config.get("SMTP_PASSWORD")
@@ -730,7 +949,7 @@ def pushme(title: str, content: str) -> None:
         "date": push_config.get("date") if push_config.get("date") else "",
         "type": push_config.get("type") if push_config.get("type") else "",
     }
-    response = requests.post(url, data=data)
+    response = http_pool.post(url, data=data)
 
     if response.status_code == 200 and response.text == "success":
         print("PushMe 推送成功！")
@@ -773,7 +992,7 @@ def chronocat(title: str, content: str) -> None:
                     }
                 ],
             }
-            response = requests.post(url, headers=headers, data=json.dumps(data))
+            response = http_pool.post(url, headers=headers, data=json.dumps(data))
             if response.status_code == 200:
                 if chat_type == 1:
                     print(f"QQ个人消息:{ids}推送成功！")
@@ -820,7 +1039,7 @@ def ntfy(title: str, content: str) -> None:
         headers['Actions'] = encode_rfc2047(push_config.get("NTFY_ACTIONS"))
 
     url = push_config.get("NTFY_URL") + "/" + push_config.get("NTFY_TOPIC")
-    response = requests.post(url, data=data, headers=headers)
+    response = http_pool.post(url, data=data, headers=headers)
     if response.status_code == 200:  # 使用 response.status_code 进行检查
         print("Ntfy 推送成功！")
     else:
@@ -875,7 +1094,7 @@ def wxpusher_bot(title: str, content: str) -> None:
     }
 
     headers = {"Content-Type": "application/json"}
-    response = requests.post(url=url, json=data, headers=headers).json()
+    response = http_pool.post(url=url, json=data, headers=headers).json()
 
     if response.get("code") == 1000:
         print("wxpusher 推送成功！")
@@ -964,8 +1183,8 @@ def custom_notify(title: str, content: str) -> None:
     formatted_url = WEBHOOK_URL.replace(
         "$title", urllib.parse.quote_plus(title)
     ).replace("$content", urllib.parse.quote_plus(content))
-    response = requests.request(
-        method=WEBHOOK_METHOD, url=formatted_url, headers=headers, timeout=15, data=body
+    response = http_pool.request(
+        method=WEBHOOK_METHOD, url=formatted_url, headers=headers, data=body
     )
 
     if response.status_code == 200:
@@ -974,15 +1193,113 @@ def custom_notify(title: str, content: str) -> None:
         print(f"自定义通知推送失败！{response.status_code} {response.text}")
 
 
+# 一言配置：本地缓存预取的句子，后台补充，推送时不阻塞等待接口
+HITOKOTO_URL = "https://v1.hitokoto.cn/"
+HITOKOTO_TIMEOUT = float(os.getenv("HITOKOTO_TIMEOUT", "3"))  # 单次请求超时（秒）
+HITOKOTO_TTL = int(os.getenv("HITOKOTO_TTL", "604800"))  # 缓存句子有效期（秒）
+HITOKOTO_PREFETCH = int(os.getenv("HITOKOTO_PREFETCH", "10"))  # 缓存中保持的句子数量
+HITOKOTO_CACHE_FILE = os.path.join(CACHE_DIR, "hitokoto.json")
+HITOKOTO_FALLBACK = [
+    "路漫漫其修远兮，吾将上下而求索。    ----离骚",
+    "千里之行，始于足下。    ----道德经",
+    "不积跬步，无以至千里。    ----劝学",
+    "长风破浪会有时，直挂云帆济沧海。    ----行路难",
+    "纸上得来终觉浅，绝知此事要躬行。    ----冬夜读书示子聿",
+]
+
+
+class HitokotoProvider:
+    """
+    一言提供器：优先取用本地缓存的句子，数量不足时由后台线程补充，
+    缓存为空或接口不可用时使用内置句子兜底。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.sentences = None
+        self.refilling = False
+
+    def _load(self) -> None:
+        if self.sentences is not None:
+            return
+        self.sentences = []
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            expire_before = time.time() - HITOKOTO_TTL
+            self.sentences = [
+                item for item in data
+                if isinstance(item, dict) and item.get("fetched_at", 0) > expire_before
+            ]
+        except (OSError, ValueError):
+            pass
+
+    def _save(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.sentences, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"一言缓存保存失败：{e}")
+
+    def _fetch(self) -> dict:
+        res = http_pool.get(HITOKOTO_URL, timeout=HITOKOTO_TIMEOUT).json()
+        return {
+            "text": res["hitokoto"] + "    ----" + res["from"],
+            "fetched_at": time.time(),
+        }
+
+    def _refill(self) -> None:
+        try:
+            while True:
+                with self.lock:
+                    if len(self.sentences) >= HITOKOTO_PREFETCH:
+                        break
+                try:
+                    item = self._fetch()
+                except Exception:
+                    break
+                with self.lock:
+                    self.sentences.append(item)
+            with self.lock:
+                self._save()
+        finally:
+            with self.lock:
+                self.refilling = False
+
+    def prefetch(self) -> None:
+        """
+        缓存不足时启动后台线程补充，不等待结果。
+        """
+        with self.lock:
+            self._load()
+            if self.refilling or len(self.sentences) >= HITOKOTO_PREFETCH:
+                return
+            self.refilling = True
+        threading.Thread(target=self._refill, name="hitokoto", daemon=True).start()
+
+    def get(self) -> str:
+        with self.lock:
+            self._load()
+            item = self.sentences.pop(0) if self.sentences else None
+            if item:
+                self._save()
+        self.prefetch()
+        return item["text"] if item else random.choice(HITOKOTO_FALLBACK)
+
+
+hitokoto_provider = HitokotoProvider(HITOKOTO_CACHE_FILE)
+
+
 def one() -> str:
     """
-    获取一条一言。
+    获取一条一言，从本地缓存取用，不会阻塞等待接口。
     :return:
     """
-    url = "https://v1.hitokoto.cn/"
-    res = requests.get(url).json()
-    return res["hitokoto"] + "    ----" + res["from"]
-
+    return hitokoto_provider.get()
 
 def add_notify_function():
     notify_function = []
@@ -1072,20 +1389,62 @@ def send(title: str, content: str, ignore_default_config: bool = False, **kwargs
             print(f"{title} 在SKIP_PUSH_TITLE环境变量内，跳过推送！")
             return
 
+    if PUSH_SPOOL:
+        spool.append(title, content)
+        print(f"{title} 已写入汇总推送暂存")
+        return
+
     hitokoto = push_config.get("HITOKOTO")
     content += "\n\n" + one() if hitokoto != "false" else ""
 
     notify_function = add_notify_function()
-    ts = [
-        threading.Thread(target=mode, args=(title, content), name=mode.__name__)
-        for mode in notify_function
-    ]
-    [t.start() for t in ts]
-    [t.join() for t in ts]
+    for mode in notify_function:
+        dispatcher.submit(mode, title, content)
+
+
+def flush_spool(timeout: float = None) -> None:
+    """
+    合并暂存的全部通知，按各渠道长度上限拆分后推送，每个渠道尽量只发送一条。
+    """
+    entries = spool.drain()
+    if not entries:
+        print("汇总推送：没有暂存的通知")
+        return
+
+    sections = [f"【{entry['title']}】\n{entry['content']}" for entry in entries]
+    if push_config.get("HITOKOTO") != "false":
+        sections.append(one())
+
+    title = f"{PUSH_SPOOL_TITLE}（{len(entries)} 条）"
+    for mode in add_notify_function():
+        limit = PUSH_CHANNEL_LIMITS.get(mode.__name__, PUSH_DEFAULT_LIMIT)
+        messages = pack_sections(sections, limit)
+        for i, message in enumerate(messages, 1):
+            part_title = f"{title} {i}/{len(messages)}" if len(messages) > 1 else title
+            dispatcher.submit(mode, part_title, message)
+    dispatcher.flush(timeout)
+
+
+def flush(timeout: float = None) -> None:
+    """
+    等待已提交的推送全部完成，进程退出时会自动调用。
+    """
+    dispatcher.flush(timeout)
+
+
+atexit.register(flush)
+
+# 启用一言时在导入阶段即开始后台预取
+if push_config.get("HITOKOTO") != "false":
+    hitokoto_provider.prefetch()
 
 
 def main():
+    if "--flush-spool" in sys.argv[1:]:
+        flush_spool()
+        return
     send("title", "content")
+    flush()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+签到任务并发调度器
+在单个 Python 进程内导入各签到脚本模块，并发执行各站点的 main()，
+各站点内部的账号间隔、重试等节奏保持不变，总耗时约等于最慢的单个站点。
+
+用法: python .github/workflows/run_checkin.py [all|脚本名[,脚本名...]]
+环境变量:
+  CHECKIN_CONCURRENCY  同时运行的站点数量上限（默认 6，设为 1 等同于串行执行）
+  PUSH_SPOOL           为 true 时各站点通知合并为每个渠道一条，在全部站点结束后发送
+"""
+import importlib
+import io
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+# 脚本位于仓库根目录（运行目录），确保可被导入
+ROOT_DIR = os.getcwd()
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+CHECKIN_CONCURRENCY = max(1, int(os.getenv("CHECKIN_CONCURRENCY", "6")))
+
+# (脚本名, 模块名, 所需环境变量（任一存在即可）)，与 run_checkin.sh 保持一致
+SCRIPTS = [
+    ("ikuuu", "ikuuu_checkin", ["IKUUU_EMAIL", "IKUUU_PASSWD"]),
+    ("leaflow", "leaflow_checkin", ["LEAFLOW_COOKIE"]),
+    ("aliyunpan", "aliyunpan_checkin", ["ALIYUN_REFRESH_TOKEN"]),
+    ("anyrouter", "anyrouter_checkin", ["ANYROUTER_ACCOUNTS"]),
+    ("youdaoyun", "youdaoyun_checkin", ["YOUDAO_COOKIE"]),
+    ("baiduwangpan", "baiduwangpan_checkin", ["BAIDU_COOKIE"]),
+    ("quark", "quark_checkin", ["QUARK_COOKIE"]),
+    ("nodeseek", "nodeseek_checkin", ["NODESEEK_COOKIE"]),
+    ("deepflood", "deepflood_checkin", ["DEEPFLOOD_COOKIE"]),
+    ("nga", "nga_checkin", ["NGA_CREDENTIALS"]),
+    ("tieba", "tieba_checkin", ["TIEBA_COOKIE"]),
+    ("smzdm", "smzdm_checkin", ["SMZDM_COOKIE"]),
+    ("ty_netdisk", "ty_netdisk_checkin", ["TY_USERNAME", "TY_PASSWORD"]),
+    ("sfsu", "sfsu_checkin", ["SFSU_COOKIE"]),
+    ("enshan", "enshan_checkin", ["ENSHAN_COOKIE"]),
+    ("agentrouter", "agentrouter_checkin", ["AGENTROUTER_ACCOUNTS"]),
+    ("996coder", "996coder_checkin", ["CODER996_ACCOUNTS"]),
+    ("gemai", "gemai_checkin", ["GEMAI_ACCOUNTS"]),
+]
+
+
+class PrefixedStdout(io.TextIOBase):
+    """按线程缓存输出，整行写出并加上站点前缀，避免多站点日志交错"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", "") + text
+        *lines, self.local.buffer = buffer.split("\n")
+        if lines:
+            prefix = getattr(self.local, "prefix", "")
+            with self.lock:
+                for line in lines:
+                    self.stream.write(f"{prefix}{line}\n")
+                self.stream.flush()
+        return len(text)
+
+    def flush(self):
+        buffer = getattr(self.local, "buffer", "")
+        if buffer:
+            self.local.buffer = ""
+            self.write(buffer + "\n")
+        self.stream.flush()
+
+    def set_prefix(self, prefix):
+        self.local.prefix = prefix
+
+
+def now_str():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def select_scripts(scripts_input):
+    """根据输入参数筛选需要运行的脚本"""
+    run_all = scripts_input.lower() == "all"
+    selected = {name.strip() for name in scripts_input.split(",") if name.strip()}
+
+    scripts = []
+    for name, module_name, required_envs in SCRIPTS:
+        if not run_all and name not in selected:
+            continue
+
+        if not os.path.exists(os.path.join(ROOT_DIR, f"{module_name}.py")):
+            print(f"⚠️  脚本文件不存在: {module_name}.py")
+            continue
+
+        if run_all and not any(os.getenv(env) for env in required_envs):
+            print(f"⚠️  跳过 {name}: 未配置环境变量")
+            continue
+
+        scripts.append((name, module_name))
+    return scripts
+
+
+def run_site(name, module_name, stdout):
+    """在当前线程中导入并执行单个站点脚本，返回 (是否成功, 耗时)"""
+    stdout.set_prefix(f"[{name}] ")
+    start = time.monotonic()
+    print(f"▶️  开始执行: {name}")
+
+    success = True
+    try:
+        module = importlib.import_module(module_name)
+        result = module.main()
+        # agentrouter/996coder 的 main() 返回退出码
+        if isinstance(result, int) and result != 0:
+            success = False
+    except SystemExit as e:
+        success = e.code in (None, 0)
+    except Exception as e:
+        success = False
+        print(f"❌ {name} 执行异常: {e}")
+        print(traceback.format_exc())
+
+    elapsed = time.monotonic() - start
+    if success:
+        print(f"✅ {name} 执行成功（耗时 {elapsed:.1f}s）")
+    else:
+        print(f"❌ {name} 执行失败（耗时 {elapsed:.1f}s）")
+    sys.stdout.flush()
+    return success, elapsed
+
+
+def main():
+    scripts_input = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1] else "all"
+
+    print("==========================================")
+    print("开始执行签到任务")
+    print(f"当前时间: {now_str()}")
+    print(f"运行模式: {'所有脚本' if scripts_input.lower() == 'all' else f'指定脚本 - {scripts_input}'}")
+    print(f"并发站点数: {CHECKIN_CONCURRENCY}")
+    print("==========================================")
+
+    scripts = select_scripts(scripts_input)
+    if not scripts:
+        print("⚠️  没有需要执行的脚本")
+        return
+
+    stdout = PrefixedStdout(sys.stdout)
+    sys.stdout = stdout
+    start = time.monotonic()
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=CHECKIN_CONCURRENCY, thread_name_prefix="checkin") as executor:
+            futures = {
+                executor.submit(run_site, name, module_name, stdout): name
+                for name, module_name in scripts
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+    finally:
+        sys.stdout = stdout.stream
+
+    # 汇总推送模式下，所有站点结束后统一合并发送通知
+    notify = sys.modules.get("notify")
+    if notify is not None and getattr(notify, "PUSH_SPOOL", False):
+        notify.flush_spool()
+
+    print("")
+    print("==========================================")
+    print("✨ 所有签到任务执行完成")
+    for name, _ in scripts:
+        success, elapsed = results[name]
+        print(f"{'✅' if success else '❌'} {name}: {elapsed:.1f}s")
+    print(f"总耗时: {time.monotonic() - start:.1f}s")
+    print(f"完成时间: {now_str()}")
+    print("==========================================")
+
+
+if __name__ == "__main__":
+    main()
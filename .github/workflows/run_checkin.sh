@@ -117,6 +117,11 @@ run_script "agentrouter" "agentrouter_checkin.py" "AGENTROUTER_ACCOUNTS"
 run_script "996coder" "996coder_checkin.py" "CODER996_ACCOUNTS"
 run_script "gemai" "gemai_checkin.py" "GEMAI_ACCOUNTS"
 
+# 汇总推送模式：合并各脚本暂存的通知后统一发送
+if [ "${PUSH_SPOOL}" = "true" ] && [ -f notify.py ]; then
+  python notify.py --flush-spool || echo "⚠️  汇总推送失败"
+fi
+
 echo ""
 echo "=========================================="
 echo "✨ 所有签到任务执行完成"
@@ -4,82 +4,129 @@ GitHub Secrets 自动更新脚本
 用于在 GitHub Actions 中自动更新环境变量（如 refresh_token）
 """
 import os
-import sys
+import time
 import base64
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from nacl import encoding, public
 
+API_BASE = "https://api.github.com"
+REQUEST_TIMEOUT = 15  # 单次请求超时（秒）
+MAX_RETRIES = 3  # 5xx 及二级限流时的最大重试次数
+MAX_WORKERS = 4  # 并发更新的 Secret 数量
+SECRET_PREFIX = "NEW_"  # 签到脚本输出的新 token 环境变量前缀，去掉前缀即为 Secret 名称
 
-def encrypt_secret(public_key: str, secret_value: str) -> str:
-    """使用仓库的公钥加密 secret"""
-    public_key_obj = public.PublicKey(public_key.encode("utf-8"), encoding.Base64Encoder())
-    sealed_box = public.SealedBox(public_key_obj)
-    encrypted = sealed_box.encrypt(secret_value.encode("utf-8"))
-    return base64.b64encode(encrypted).decode("utf-8")
 
+class SecretsUpdater:
+    """批量更新仓库 Secrets：公钥只获取一次，所有请求复用同一个长连接会话"""
 
-def get_public_key(repo: str, token: str) -> tuple:
-    """获取仓库的公钥"""
-    url = f"https://api.github.com/repos/{repo}/actions/secrets/public-key"
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-
-    response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        data = response.json()
-        return data["key"], data["key_id"]
-    else:
-        raise Exception(f"获取公钥失败: {response.status_code} {response.text}")
-
-
-def update_secret(repo: str, token: str, secret_name: str, secret_value: str):
-    """更新 GitHub Secret"""
-    try:
-        # 获取公钥
-        public_key, key_id = get_public_key(repo, token)
-
-        # 加密 secret
-        encrypted_value = encrypt_secret(public_key, secret_value)
-
-        # 更新 secret
-        url = f"https://api.github.com/repos/{repo}/actions/secrets/{secret_name}"
-        headers = {
+    def __init__(self, repo: str, token: str):
+        self.repo = repo
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=MAX_WORKERS)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
             "Authorization": f"token {token}",
             "Accept": "application/vnd.github.v3+json"
-        }
-        data = {
-            "encrypted_value": encrypted_value,
-            "key_id": key_id
-        }
-
-        response = requests.put(url, headers=headers, json=data)
-        if response.status_code in [201, 204]:
-            print(f"✅ Secret {secret_name} 更新成功")
+        })
+        self.key_id = None
+        self.sealed_box = None
+
+    @staticmethod
+    def _should_retry(response) -> bool:
+        """5xx 或二级限流（429 / 带限流标记的 403）时重试"""
+        if response.status_code >= 500 or response.status_code == 429:
             return True
-        else:
-            print(f"❌ Secret {secret_name} 更新失败: {response.status_code} {response.text}")
-            return False
-
-    except Exception as e:
-        print(f"❌ 更新 Secret 异常: {e}")
+        if response.status_code == 403:
+            return (
+                "Retry-After" in response.headers
+                or response.headers.get("X-RateLimit-Remaining") == "0"
+                or "rate limit" in response.text.lower()
+            )
         return False
 
+    @staticmethod
+    def _retry_delay(response, attempt: int) -> float:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(int(retry_after), 60)
+        reset = response.headers.get("X-RateLimit-Reset")
+        if response.headers.get("X-RateLimit-Remaining") == "0" and reset and reset.isdigit():
+            return min(max(int(reset) - time.time(), 1), 60)
+        return 2 ** attempt
+
+    def request(self, method: str, url: str, **kwargs):
+        """发送请求，遇到可重试的错误时按 Retry-After 或指数退避重试"""
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                response = self.session.request(method, url, timeout=REQUEST_TIMEOUT, **kwargs)
+            except requests.RequestException:
+                if attempt == MAX_RETRIES:
+                    raise
+                time.sleep(2 ** attempt)
+                continue
+            if attempt == MAX_RETRIES or not self._should_retry(response):
+                return response
+            delay = self._retry_delay(response, attempt)
+            print(f"⏳ {method} {url} 返回 {response.status_code}，{delay:.0f} 秒后重试")
+            time.sleep(delay)
+
+    def load_public_key(self):
+        """获取仓库的公钥并缓存加密器"""
+        if self.sealed_box is not None:
+            return
+        response = self.request("GET", f"{API_BASE}/repos/{self.repo}/actions/secrets/public-key")
+        if response.status_code != 200:
+            raise Exception(f"获取公钥失败: {response.status_code} {response.text}")
+        data = response.json()
+        public_key_obj = public.PublicKey(data["key"].encode("utf-8"), encoding.Base64Encoder())
+        self.sealed_box = public.SealedBox(public_key_obj)
+        self.key_id = data["key_id"]
+
+    def update_secret(self, secret_name: str, secret_value: str) -> bool:
+        """更新单个 GitHub Secret"""
+        try:
+            self.load_public_key()
+            encrypted = self.sealed_box.encrypt(secret_value.encode("utf-8"))
+            data = {
+                "encrypted_value": base64.b64encode(encrypted).decode("utf-8"),
+                "key_id": self.key_id
+            }
+
+            response = self.request("PUT", f"{API_BASE}/repos/{self.repo}/actions/secrets/{secret_name}", json=data)
+            if response.status_code in [201, 204]:
+                print(f"✅ Secret {secret_name} 更新成功")
+                return True
+            else:
+                print(f"❌ Secret {secret_name} 更新失败: {response.status_code} {response.text}")
+                return False
+
+        except Exception as e:
+            print(f"❌ 更新 Secret {secret_name} 异常: {e}")
+            return False
 
-def read_token_from_log(log_file: str, token_name: str) -> str:
-    """从日志文件中读取新的 token"""
-    if not os.path.exists(log_file):
-        return None
-
-    with open(log_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            # 查找类似 "新Token: xxxx" 的行
-            if token_name in line and ":" in line:
-                parts = line.split(":", 1)
-                if len(parts) == 2:
-                    return parts[1].strip()
-    return None
+    def update_all(self, secrets: dict) -> dict:
+        """并发更新多个 Secret，返回 {Secret 名称: 是否成功}"""
+        if not secrets:
+            return {}
+        try:
+            self.load_public_key()
+        except Exception as e:
+            print(f"❌ {e}")
+            return {name: False for name in secrets}
+
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(secrets))) as executor:
+            futures = {name: executor.submit(self.update_secret, name, value) for name, value in secrets.items()}
+            return {name: future.result() for name, future in futures.items()}
+
+
+def collect_new_secrets() -> dict:
+    """收集签到脚本输出的 NEW_* 环境变量，返回 {Secret 名称: 新值}"""
+    return {
+        name[len(SECRET_PREFIX):]: value
+        for name, value in os.environ.items()
+        if name.startswith(SECRET_PREFIX) and len(name) > len(SECRET_PREFIX) and value.strip()
+    }
 
 
 def main():
@@ -99,14 +146,18 @@ def main():
     print(f"📦 仓库: {github_repo}")
     print("🔄 开始检查需要更新的 Secrets...")
 
-    # 检查是否有新的 ALIYUN_REFRESH_TOKEN
-    new_aliyun_token = os.getenv("NEW_ALIYUN_REFRESH_TOKEN")
-    if new_aliyun_token:
-        print(f"🔍 检测到新的阿里云盘 refresh_token")
-        update_secret(github_repo, github_token, "ALIYUN_REFRESH_TOKEN", new_aliyun_token)
+    # 收集所有 NEW_* 变量（如 NEW_ALIYUN_REFRESH_TOKEN -> ALIYUN_REFRESH_TOKEN）
+    new_secrets = collect_new_secrets()
+    if not new_secrets:
+        print("ℹ️ 没有需要更新的 Secrets")
+        return
+
+    print(f"🔍 检测到 {len(new_secrets)} 个新值: {', '.join(new_secrets)}")
+    results = SecretsUpdater(github_repo, github_token).update_all(new_secrets)
 
-    # 可以添加更多需要自动更新的 token
-    # 例如：百度网盘、夸克网盘等
+    failed = [name for name, success in results.items() if not success]
+    if failed:
+        print(f"⚠️ 以下 Secrets 更新失败: {', '.join(failed)}")
 
     print("✅ Secrets 检查完成")
 
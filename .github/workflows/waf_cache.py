@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WAF cookie 共享缓存
+anyrouter / gemai / agentrouter / 996coder 共用：按主机保存阿里云 WAF 下发的
+acw_tc / cdn_sec_tc / acw_sc__v2，同一次运行内的所有账号复用，并写入缓存目录跨运行复用。
+
+- 每个主机一个文件（waf_<host>.json），不同站点并发运行时互不覆盖；
+  写入前重新读取磁盘上的内容再合并，临时文件名唯一，避免多个进程/线程相互覆盖。
+- 服务端重新下发挑战说明缓存的 cookie 已失效，调用方应 invalidate 后重新求解。
+- 有效期默认 1800 秒：acw_tc 由 WAF 签发后约 30 分钟失效，超出后复用只会换来一次挑战。
+  GitHub Actions 两次定时运行相隔约 9 小时，跨运行复用只在手动重跑、青龙面板短间隔定时等场景生效，
+  主要收益来自同一次运行内多个账号共享。
+"""
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+DEFAULT_TTL = 1800
+WAF_COOKIE_NAMES = ("acw_tc", "cdn_sec_tc", "acw_sc__v2")
+
+
+class WafCookieCache:
+    """按主机缓存 WAF cookies，ttl <= 0 时禁用"""
+
+    def __init__(self, cache_dir, ttl=DEFAULT_TTL, cookie_names=WAF_COOKIE_NAMES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.cookie_names = set(cookie_names)
+        self.lock = threading.Lock()
+
+    def _path(self, host):
+        safe_host = re.sub(r"[^A-Za-z0-9._-]", "_", host)
+        return os.path.join(self.cache_dir, f"waf_{safe_host}.json")
+
+    def _read(self, host):
+        """读取主机缓存，不存在、损坏或已过期时返回空字典"""
+        try:
+            with open(self._path(host), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except Exception:
+            return {}
+        if not isinstance(entry, dict) or entry.get("expires_at", 0) <= time.time():
+            return {}
+        cookies = entry.get("cookies")
+        return cookies if isinstance(cookies, dict) else {}
+
+    def _write(self, host, cookies):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".waf_", suffix=".tmp", dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"cookies": cookies, "expires_at": time.time() + self.ttl}, f)
+            os.replace(tmp_path, self._path(host))
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def get(self, host):
+        """获取未过期的 WAF cookies"""
+        if self.ttl <= 0:
+            return None
+        with self.lock:
+            return self._read(host) or None
+
+    def update(self, host, cookies):
+        """与磁盘上的最新内容合并后保存，值有变化时才刷新过期时间"""
+        cookies = {k: v for k, v in cookies.items() if k in self.cookie_names and v}
+        if self.ttl <= 0 or not cookies:
+            return
+        with self.lock:
+            try:
+                current = self._read(host)
+                merged = dict(current, **cookies)
+                if merged != current:
+                    self._write(host, merged)
+            except Exception:
+                # 缓存写入失败不影响签到
+                pass
+
+    def invalidate(self, host):
+        """删除主机的 WAF cookies（服务端重新下发挑战时调用）"""
+        with self.lock:
+            try:
+                os.remove(self._path(host))
+            except OSError:
+                pass
@@ -18,14 +18,17 @@ new Env('996Coder签到')
 """
 
 import asyncio
+import base64
+import hashlib
 import json
 import os
 import random
 import re
-import tempfile
 import time
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
 
 # 时区支持
 try:
@@ -89,6 +92,13 @@ except ImportError:
 # 添加 notify 模块路径
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".github", "workflows"))
 
+# 可选加密模块（会话缓存依赖）
+try:
+    from nacl import secret
+    HAS_NACL = True
+except ImportError:
+    HAS_NACL = False
+
 # 可选通知模块
 hadsend = False
 try:
@@ -100,25 +110,56 @@ except Exception as e:
     def send(title, content):
         pass
 
+# 可选 WAF cookie 共享缓存模块（.github/workflows/waf_cache.py）
+try:
+    from waf_cache import WafCookieCache
+except ImportError:
+    class WafCookieCache:
+        """未找到 waf_cache 模块时不缓存 WAF cookies"""
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def get(self, host):
+            return None
+
+        def update(self, host, cookies):
+            pass
+
+        def invalidate(self, host):
+            pass
+
 
 # ==================== 配置常量 ====================
 BASE_URL = os.getenv("CODER996_BASE_URL") or "https://996coder.com"
 LOGIN_URL = f"{BASE_URL}/login"
+WAF_HOST = urlparse(BASE_URL).netloc
 CHECKIN_URL = f"{BASE_URL}/api/user/checkin"
 USER_INFO_URL = f"{BASE_URL}/api/user/self"
 TIMEOUT = int(os.getenv("CODER996_TIMEOUT", "30"))
 DEBUG_MODE = os.getenv("DEBUG_MODE", "false").lower() == "true"
 
+# 会话缓存配置
+CACHE_DIR = os.getenv("CHECKIN_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+SESSION_CACHE_ENABLED = os.getenv("SESSION_CACHE", "true").lower() == "true"
+SESSION_CACHE_FILE = os.path.join(CACHE_DIR, "996coder_sessions.json")
+WAF_CACHE_TTL = int(os.getenv("WAF_CACHE_TTL", "1800"))  # 秒，0 表示禁用缓存
+
 # 浏览器配置
 BROWSER_HEADLESS = os.getenv("BROWSER_HEADLESS", "true").lower() == "true"
 BROWSER_TIMEOUT = 20000  # 20秒
 PAGE_LOAD_TIMEOUT = 15000  # 15秒
+BROWSER_BASE_MEMORY_MB = 300  # 共享浏览器进程预估内存占用
+BROWSER_CONTEXT_MEMORY_MB = 250  # 单个账号上下文预估内存占用
+BROWSER_MAX_CONCURRENCY = 4  # 自动模式下的并发上限
+ACCOUNT_DELAY = 3  # 同一并发槽位内账号间延迟（秒）
 
 # User-Agent
 DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 
 # 余额转换率 (内部单位 -> 美元)
 QUOTA_TO_DOLLAR_RATE = 500000
+ALREADY_CHECKED_IN_KEYWORDS = ("已签到", "已经签到", "already")  # 接口明确表示今日已签到的消息关键字
 
 # 关键Cookie名称
 KEY_COOKIE_NAMES = ["session", "sessionid", "token", "auth", "jwt"]
@@ -158,6 +199,114 @@ POPUP_CLOSE_SELECTORS = [
 ]
 
 
+# 从 Regular-inspection 项目借鉴的高级反检测技术
+# 针对低配Docker环境（CPU<1核，内存<1GB）优化
+BROWSER_LAUNCH_ARGS = [
+    "--disable-blink-features=AutomationControlled",
+    "--disable-dev-shm-usage",
+    "--disable-web-security",
+    "--no-sandbox",
+    "--disable-infobars",
+    "--disable-popup-blocking",
+    "--disable-notifications",
+    "--disable-extensions",
+    "--ignore-certificate-errors",
+    "--allow-running-insecure-content",
+    "--disable-gpu",
+    "--window-size=1280,720",  # 降低分辨率减少渲染压力
+    "--disable-features=IsolateOrigins,site-per-process",
+    "--disable-site-isolation-trials",
+    "--disable-features=BlockInsecurePrivateNetworkRequests",
+    # 低配环境优化参数（移除--single-process避免崩溃）
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-breakpad",
+    "--disable-component-extensions-with-background-pages",
+    "--disable-features=TranslateUI",
+    "--disable-ipc-flooding-protection",
+    "--disable-renderer-backgrounding",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--no-first-run",
+    "--disable-hang-monitor",
+]
+
+# 更全面的Stealth脚本
+STEALTH_SCRIPT = """
+    // 1. 隐藏webdriver特征
+    Object.defineProperty(navigator, 'webdriver', {
+      get: () => undefined,
+    });
+
+    // 2. 修复语言特征
+    Object.defineProperty(navigator, 'languages', {
+      get: () => ['zh-CN', 'zh', 'en-US', 'en'],
+    });
+
+    // 3. 修复权限查询
+    const originalQuery = window.navigator.permissions.query;
+    window.navigator.permissions.query = (parameters) => (
+      parameters.name === 'notifications' ?
+        Promise.resolve({ state: Notification.permission }) :
+        originalQuery(parameters)
+    );
+
+    // 4. 伪装plugins
+    Object.defineProperty(navigator, 'plugins', {
+      get: () => [
+        { name: 'Chrome PDF Plugin', filename: 'internal-pdf-viewer', description: 'Portable Document Format' },
+        { name: 'Chrome PDF Viewer', filename: 'mhjfbmdgcfjbbpaeojofohoefgiehjai', description: '' },
+        { name: 'Native Client', filename: 'internal-nacl-plugin', description: '' },
+      ],
+    });
+
+    // 5. 修复WebGL指纹
+    try {
+        const getParameter = WebGLRenderingContext.prototype.getParameter;
+        WebGLRenderingContext.prototype.getParameter = function(parameter) {
+            if (parameter === 37445) { // UNMASKED_VENDOR_WEBGL
+                return 'Intel Inc.';
+            }
+            if (parameter === 37446) { // UNMASKED_RENDERER_WEBGL
+                return 'Intel Iris OpenGL Engine';
+            }
+            return getParameter.call(this, parameter);
+        };
+    } catch (e) {}
+
+    // 6. 修复chrome对象（重要！）
+    if (!window.chrome) {
+        window.chrome = {
+            runtime: {},
+            loadTimes: function() {},
+            csi: function() {},
+            app: {}
+        };
+    }
+
+    // 7. 隐藏headless特征
+    Object.defineProperty(navigator, 'maxTouchPoints', {
+        get: () => 1,
+    });
+
+    // 8. 修复navigator.platform
+    Object.defineProperty(navigator, 'platform', {
+        get: () => 'Win32',
+    });
+
+    // 9. 修复deviceMemory
+    Object.defineProperty(navigator, 'deviceMemory', {
+        get: () => 8,
+    });
+
+    // 10. 修复hardwareConcurrency
+    Object.defineProperty(navigator, 'hardwareConcurrency', {
+        get: () => 8,
+    });
+"""
+
+
 # ==================== 工具函数 ====================
 def safe_send_notify(title: str, content: str) -> bool:
     """安全的通知发送"""
@@ -176,6 +325,54 @@ def safe_send_notify(title: str, content: str) -> bool:
         return False
 
 
+def get_available_memory_mb() -> Optional[int]:
+    """获取可用内存（MB），优先读取容器 cgroup 限制，无法获取时返回 None"""
+    available = None
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    available = int(line.split()[1]) // 1024
+                    break
+    except Exception:
+        pass
+
+    # Docker 容器内 /proc/meminfo 显示的是宿主机内存，需结合 cgroup 限制
+    for limit_file, usage_file in [
+        ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current"),
+        ("/sys/fs/cgroup/memory/memory.limit_in_bytes", "/sys/fs/cgroup/memory/memory.usage_in_bytes"),
+    ]:
+        try:
+            with open(limit_file, "r") as f:
+                limit = f.read().strip()
+            if not limit.isdigit() or int(limit) >= 1 << 60:
+                continue
+            with open(usage_file, "r") as f:
+                usage = int(f.read().strip())
+            cgroup_available = (int(limit) - usage) // (1024 * 1024)
+            available = cgroup_available if available is None else min(available, cgroup_available)
+            break
+        except Exception:
+            continue
+
+    return available
+
+
+def resolve_browser_concurrency() -> int:
+    """计算同时运行的账号数：手动配置优先，否则按可用内存估算"""
+    configured = os.getenv("BROWSER_CONCURRENCY", "auto").strip().lower()
+    if configured.isdigit() and int(configured) > 0:
+        return int(configured)
+
+    available_mb = get_available_memory_mb()
+    if available_mb is None:
+        return 1
+
+    # 预留共享浏览器进程的内存，剩余部分按每个上下文的占用估算
+    concurrency = (available_mb - BROWSER_BASE_MEMORY_MB) // BROWSER_CONTEXT_MEMORY_MB
+    return max(1, min(BROWSER_MAX_CONCURRENCY, concurrency))
+
+
 # ==================== 认证器类 ====================
 class EmailAuthenticator:
     """邮箱密码认证"""
@@ -413,13 +610,165 @@ class EmailAuthenticator:
             return {"success": False, "error": f"邮箱密码认证失败: {str(e)}"}
 
 
+# ==================== 会话缓存 ====================
+class SessionCache:
+    """登录会话本地缓存：按账号保存 cookies，使用账号密码派生的密钥加密存储"""
+
+    def __init__(self, path: str = SESSION_CACHE_FILE):
+        self.path = path
+        self.enabled = SESSION_CACHE_ENABLED and HAS_NACL
+
+    @staticmethod
+    def _account_key(email: str) -> str:
+        return hashlib.sha256(f"{BASE_URL}|{email}".encode("utf-8")).hexdigest()[:32]
+
+    @staticmethod
+    def _box(email: str, password: str):
+        key = hashlib.sha256(f"{BASE_URL}|{email}|{password}".encode("utf-8")).digest()
+        return secret.SecretBox(key)
+
+    def _read_all(self) -> Dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    def _write_all(self, data: Dict):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def load(self, email: str, password: str) -> Optional[Dict]:
+        """读取并解密账号会话，不存在或无法解密时返回 None"""
+        if not self.enabled:
+            return None
+        token = self._read_all().get(self._account_key(email))
+        if not token:
+            return None
+        try:
+            plain = self._box(email, password).decrypt(base64.b64decode(token))
+            return json.loads(plain.decode("utf-8"))
+        except Exception as e:
+            logger.debug(f"会话缓存解密失败: {e}")
+            return None
+
+    def save(self, email: str, password: str, session: Dict):
+        """加密保存账号会话"""
+        if not self.enabled:
+            return
+        try:
+            session = dict(session, saved_at=int(time.time()))
+            encrypted = self._box(email, password).encrypt(json.dumps(session).encode("utf-8"))
+            data = self._read_all()
+            data[self._account_key(email)] = base64.b64encode(encrypted).decode("utf-8")
+            self._write_all(data)
+        except Exception as e:
+            logger.warning(f"会话缓存保存失败: {e}")
+
+    def remove(self, email: str):
+        """删除失效的账号会话"""
+        if not self.enabled:
+            return
+        try:
+            data = self._read_all()
+            if data.pop(self._account_key(email), None) is not None:
+                self._write_all(data)
+        except Exception as e:
+            logger.debug(f"会话缓存删除失败: {e}")
+
+
+session_cache = SessionCache()
+
+
+waf_cookie_cache = WafCookieCache(CACHE_DIR, WAF_CACHE_TTL, WAF_COOKIE_NAMES)
+
+
+# ==================== 浏览器池 ====================
+class BrowserPool:
+    """浏览器池：单次运行共享一个 Chromium 进程，为每个账号创建全新的 BrowserContext"""
+
+    def __init__(self, playwright):
+        self.playwright = playwright
+        self.browser = None
+        self._contexts: Set[BrowserContext] = set()
+        self._lock = asyncio.Lock()
+
+    async def _ensure_browser(self):
+        """启动（或在崩溃后重启）共享浏览器"""
+        if self.browser and self.browser.is_connected():
+            return self.browser
+
+        logger.info("启动共享 Chromium 浏览器...")
+        self.browser = await self.playwright.chromium.launch(
+            headless=BROWSER_HEADLESS,
+            args=BROWSER_LAUNCH_ARGS,
+        )
+        self._contexts.clear()
+        return self.browser
+
+    async def acquire(self) -> BrowserContext:
+        """创建一个全新的浏览器上下文，cookies/localStorage/IndexedDB 等存储互不可见"""
+        async with self._lock:
+            browser = await self._ensure_browser()
+            context = await browser.new_context(
+                user_agent=DEFAULT_USER_AGENT,
+                viewport={"width": 1920, "height": 1080},
+                java_script_enabled=True,
+            )
+            # Stealth 脚本挂在上下文上，对其后创建的所有页面生效
+            await context.add_init_script(STEALTH_SCRIPT)
+            self._contexts.add(context)
+            return context
+
+    async def release(self, context: BrowserContext):
+        """归还上下文：直接关闭，账号状态随上下文一并销毁"""
+        async with self._lock:
+            self._contexts.discard(context)
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    @asynccontextmanager
+    async def context(self):
+        """以上下文管理器方式借用浏览器上下文"""
+        context = await self.acquire()
+        try:
+            yield context
+        finally:
+            await self.release(context)
+
+    async def close(self):
+        """关闭所有上下文及共享浏览器"""
+        async with self._lock:
+            contexts = list(self._contexts)
+            self._contexts.clear()
+        for context in contexts:
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+        if self.browser:
+            try:
+                await self.browser.close()
+            except Exception:
+                pass
+            self.browser = None
+
+
 # ==================== 签到管理类 ====================
 class AgentRouterCheckIn:
     """996Coder 签到管理"""
 
-    def __init__(self, account_config: Dict, account_index: int):
+    def __init__(self, account_config: Dict, account_index: int, browser_pool: BrowserPool):
         self.account_config = account_config
         self.account_index = account_index
+        self.browser_pool = browser_pool
         self.account_name = account_config.get("name", f"账号{account_index + 1}")
 
     async def execute(self) -> Dict:
@@ -439,150 +788,117 @@ class AgentRouterCheckIn:
                 "error": "未配置邮箱或密码"
             }
 
+        # 优先使用缓存会话，免去浏览器登录
+        cached_result = await self._checkin_with_cached_session(email, password)
+        if cached_result:
+            return cached_result
+
         # 执行邮箱密码认证签到
         logger.info(f"\n{self.account_name}: 尝试邮箱密码认证...")
 
-        async with async_playwright() as playwright:
-            try:
-                result = await self._checkin_with_auth(playwright, "email", email, password)
-                return result
-            except Exception as e:
-                logger.error(f"{self.account_name}: 邮箱密码认证异常: {str(e)}")
-                return {
-                    "success": False,
-                    "account": self.account_name,
-                    "error": f"邮箱密码认证异常: {str(e)}"
-                }
+        try:
+            result = await self._checkin_with_auth("email", email, password)
+            return result
+        except Exception as e:
+            logger.error(f"{self.account_name}: 邮箱密码认证异常: {str(e)}")
+            return {
+                "success": False,
+                "account": self.account_name,
+                "error": f"邮箱密码认证异常: {str(e)}"
+            }
 
-    async def _checkin_with_auth(self, playwright, auth_type: str, email: str, password: str) -> Dict:
-        """使用指定认证方式签到"""
-        logger.info(f"{self.account_name}: 开始使用 {auth_type} 认证签到流程...")
+    async def _checkin_with_cached_session(self, email: str, password: str) -> Optional[Dict]:
+        """使用缓存会话签到，会话失效或签到未确认时返回 None 以回退到浏览器登录"""
+        session = session_cache.load(email, password)
+        if not session or not session.get("cookies"):
+            return None
 
-        effective_headless = BROWSER_HEADLESS
-
-        # 从 Regular-inspection 项目借鉴的高级反检测技术
-        # 针对低配Docker环境（CPU<1核，内存<1GB）优化
-        browser_launch_args = [
-            "--disable-blink-features=AutomationControlled",
-            "--disable-dev-shm-usage",
-            "--disable-web-security",
-            "--no-sandbox",
-            "--disable-infobars",
-            "--disable-popup-blocking",
-            "--disable-notifications",
-            "--disable-extensions",
-            "--ignore-certificate-errors",
-            "--allow-running-insecure-content",
-            "--disable-gpu",
-            "--window-size=1280,720",  # 降低分辨率减少渲染压力
-            "--disable-features=IsolateOrigins,site-per-process",
-            "--disable-site-isolation-trials",
-            "--disable-features=BlockInsecurePrivateNetworkRequests",
-            # 低配环境优化参数（移除--single-process避免崩溃）
-            "--disable-background-networking",
-            "--disable-background-timer-throttling",
-            "--disable-backgrounding-occluded-windows",
-            "--disable-breakpad",
-            "--disable-component-extensions-with-background-pages",
-            "--disable-features=TranslateUI",
-            "--disable-ipc-flooding-protection",
-            "--disable-renderer-backgrounding",
-            "--metrics-recording-only",
-            "--mute-audio",
-            "--no-first-run",
-            "--disable-hang-monitor",
-        ]
-
-        # 更全面的Stealth脚本
-        stealth_script = """
-            // 1. 隐藏webdriver特征
-            Object.defineProperty(navigator, 'webdriver', {
-              get: () => undefined,
-            });
-
-            // 2. 修复语言特征
-            Object.defineProperty(navigator, 'languages', {
-              get: () => ['zh-CN', 'zh', 'en-US', 'en'],
-            });
-
-            // 3. 修复权限查询
-            const originalQuery = window.navigator.permissions.query;
-            window.navigator.permissions.query = (parameters) => (
-              parameters.name === 'notifications' ?
-                Promise.resolve({ state: Notification.permission }) :
-                originalQuery(parameters)
-            );
-
-            // 4. 伪装plugins
-            Object.defineProperty(navigator, 'plugins', {
-              get: () => [
-                { name: 'Chrome PDF Plugin', filename: 'internal-pdf-viewer', description: 'Portable Document Format' },
-                { name: 'Chrome PDF Viewer', filename: 'mhjfbmdgcfjbbpaeojofohoefgiehjai', description: '' },
-                { name: 'Native Client', filename: 'internal-nacl-plugin', description: '' },
-              ],
-            });
-
-            // 5. 修复WebGL指纹
-            try {
-                const getParameter = WebGLRenderingContext.prototype.getParameter;
-                WebGLRenderingContext.prototype.getParameter = function(parameter) {
-                    if (parameter === 37445) { // UNMASKED_VENDOR_WEBGL
-                        return 'Intel Inc.';
-                    }
-                    if (parameter === 37446) { // UNMASKED_RENDERER_WEBGL
-                        return 'Intel Iris OpenGL Engine';
-                    }
-                    return getParameter.call(this, parameter);
-                };
-            } catch (e) {}
-
-            // 6. 修复chrome对象（重要！）
-            if (!window.chrome) {
-                window.chrome = {
-                    runtime: {},
-                    loadTimes: function() {},
-                    csi: function() {},
-                    app: {}
-                };
-            }
+        logger.info(f"{self.account_name}: 发现缓存会话，验证中...")
+        headers = {"User-Agent": DEFAULT_USER_AGENT, "Accept": "application/json"}
+        if session.get("user_id"):
+            headers["New-Api-User"] = str(session["user_id"])
 
-            // 7. 隐藏headless特征
-            Object.defineProperty(navigator, 'maxTouchPoints', {
-                get: () => 1,
-            });
-
-            // 8. 修复navigator.platform
-            Object.defineProperty(navigator, 'platform', {
-                get: () => 'Win32',
-            });
-
-            // 9. 修复deviceMemory
-            Object.defineProperty(navigator, 'deviceMemory', {
-                get: () => 8,
-            });
-
-            // 10. 修复hardwareConcurrency
-            Object.defineProperty(navigator, 'hardwareConcurrency', {
-                get: () => 8,
-            });
-        """
-
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # 启动浏览器
-            context = await playwright.chromium.launch_persistent_context(
-                user_data_dir=temp_dir,
-                headless=effective_headless,
-                user_agent=DEFAULT_USER_AGENT,
-                viewport={"width": 1920, "height": 1080},
-                args=browser_launch_args,
-                java_script_enabled=True,
-            )
+        try:
+            async with httpx.AsyncClient(cookies=session["cookies"], headers=headers, timeout=TIMEOUT) as client:
+                # 步骤1: 用户信息接口验证会话
+                response = await client.get(USER_INFO_URL)
+                logger.debug(f"API 请求：GET {USER_INFO_URL} {response.status_code}")
+                user_res = response.json() if response.status_code == 200 else {}
+                if not (user_res.get("success") and user_res.get("data")):
+                    logger.info(f"{self.account_name}: 缓存会话已失效，改用浏览器登录")
+                    session_cache.remove(email)
+                    return None
+
+                # 步骤2: 调用签到接口
+                response = await client.post(CHECKIN_URL)
+                logger.debug(f"API 请求：POST {CHECKIN_URL} {response.status_code}")
+                logger.debug(f"响应：{response.text[:300]}")
+                if response.status_code != 200:
+                    logger.info(f"{self.account_name}: 签到接口返回 {response.status_code}，改用浏览器登录")
+                    return None
+
+                checkin_res = response.json()
+                msg = checkin_res.get("message") or checkin_res.get("msg") or ""
+                already = any(keyword in msg.lower() for keyword in ALREADY_CHECKED_IN_KEYWORDS)
+                if checkin_res.get("success") is not True and not already:
+                    # 其余失败消息（如未登录、风控）无法确认签到，交给浏览器登录流程
+                    logger.info(f"{self.account_name}: 签到未确认（{msg or '无消息'}），改用浏览器登录")
+                    return None
+
+                reward = ""
+                data = checkin_res.get("data")
+                if checkin_res.get("success") and isinstance(data, dict):
+                    if "quota_awarded" in data:
+                        quota_val = data["quota_awarded"]
+                        reward = f"${round(quota_val / QUOTA_TO_DOLLAR_RATE, 2)} ({quota_val})"
+                    else:
+                        for key in ["reward", "amount", "quota", "balance"]:
+                            if key in data:
+                                reward = str(data[key])
+                                break
+
+                checkin_msg = (msg or "签到成功") if checkin_res.get("success") is True else f"接口返回: {msg}"
+                if reward:
+                    checkin_msg += f" | 奖励: {reward}"
+
+                # 步骤3: 签到后刷新余额
+                user_data = user_res["data"]
+                response = await client.get(USER_INFO_URL)
+                if response.status_code == 200:
+                    refreshed = response.json()
+                    if refreshed.get("success") and refreshed.get("data"):
+                        user_data = refreshed["data"]
+        except Exception as e:
+            logger.warning(f"{self.account_name}: 缓存会话签到失败，改用浏览器登录: {e}")
+            return None
 
-            page = await context.new_page()
+        quota_dollar = round(user_data.get("quota", 0) / QUOTA_TO_DOLLAR_RATE, 2)
+        used_dollar = round(user_data.get("used_quota", 0) / QUOTA_TO_DOLLAR_RATE, 2)
+        logger.info(f"{self.account_name}: 缓存会话签到完成: {checkin_msg}")
 
-            # 注入stealth脚本
-            await page.add_init_script(stealth_script)
-            logger.info(f"{self.account_name}: 已注入高级Stealth脚本以增强反检测能力")
+        return {
+            "success": True,
+            "account": self.account_name,
+            "auth_method": "session",
+            "user_info": {
+                "success": True,
+                "quota": quota_dollar,
+                "used": used_dollar,
+                "display": f"余额: ${quota_dollar:.2f}, 已用: ${used_dollar:.2f}"
+            },
+            "username": user_data.get("display_name") or user_data.get("username", ""),
+            "message": checkin_msg,
+            "checkin_reward": reward
+        }
+
+    async def _checkin_with_auth(self, auth_type: str, email: str, password: str) -> Dict:
+        """使用指定认证方式签到"""
+        logger.info(f"{self.account_name}: 开始使用 {auth_type} 认证签到流程...")
+
+        # 从共享浏览器池借用隔离的上下文（Stealth脚本已在上下文创建时注入）
+        async with self.browser_pool.context() as context:
+            page = await context.new_page()
+            logger.info(f"{self.account_name}: 已获取隔离的浏览器上下文")
 
             # 用于捕获签到信息和用户余额
             checkin_info = {"found": False, "message": "", "reward": ""}
@@ -594,6 +910,13 @@ class AgentRouterCheckIn:
                     url = response.url
                     method = response.request.method
 
+                    # 页面返回 WAF 挑战，说明缓存中的 WAF cookies 已失效
+                    if response.request.resource_type == "document" and response.status == 200:
+                        body = await response.text()
+                        if "<script>" in body and "arg1=" in body:
+                            logger.info(f"{self.account_name}: 遇到 WAF 挑战，清除缓存的 WAF cookies")
+                            waf_cookie_cache.invalidate(WAF_HOST)
+
                     # 关注所有API请求
                     if "/api/" in url:
                         # 打印请求方法和URL
@@ -662,183 +985,197 @@ class AgentRouterCheckIn:
 
             page.on("response", handle_response)
 
-            try:
-                # 步骤1: 获取 WAF cookies
-                await self._get_waf_cookies(page, context)
-
-                # 步骤2: 执行邮箱密码认证
-                authenticator = EmailAuthenticator(self.account_name, email, password)
-                auth_result = await authenticator.authenticate(page, context)
-
-                if not auth_result["success"]:
-                    return {
-                        "success": False,
-                        "account": self.account_name,
-                        "error": auth_result.get("error")
-                    }
+            # 步骤1: 获取 WAF cookies
+            await self._get_waf_cookies(page, context)
+
+            # 步骤2: 执行邮箱密码认证
+            authenticator = EmailAuthenticator(self.account_name, email, password)
+            auth_result = await authenticator.authenticate(page, context)
+
+            if not auth_result["success"]:
+                return {
+                    "success": False,
+                    "account": self.account_name,
+                    "error": auth_result.get("error")
+                }
 
-                logger.info(f"{self.account_name}: 认证成功")
+            logger.info(f"{self.account_name}: 认证成功")
 
-                # 获取认证后的 cookies
-                cookies = auth_result.get("cookies", {})
+            # 保存浏览器通过挑战后的 WAF cookies 供后续账号使用
+            waf_cookie_cache.update(
+                WAF_HOST, {c["name"]: c["value"] for c in await context.cookies() if c["name"] in WAF_COOKIE_NAMES}
+            )
+
+            # 获取认证后的 cookies
+            cookies = auth_result.get("cookies", {})
+
+            # 保存会话，后续运行可跳过浏览器登录
+            session_cache.save(email, password, {"cookies": cookies, "user_id": auth_result.get("user_id")})
+
+            # =================================================
+            # 新增：主动执行签到逻辑
+            # =================================================
+            logger.info(f"{self.account_name}: 正在尝试主动签到...")
+            
+            # 等待获取 User ID (最多等待10秒)
+            wait_count = 0
+            while not user_balance_info.get("user_id") and wait_count < 10:
+                logger.info(f"{self.account_name}: 等待 User ID 获取... ({wait_count+1}/10)")
+                await asyncio.sleep(1)
+                wait_count += 1
+            
+            # 获取 User ID (优先使用捕获到的，其次是auth结果中的)
+            current_user_id = user_balance_info.get("user_id") or auth_result.get("user_id")
+            
+            if current_user_id:
+                logger.info(f"{self.account_name}: 获取到 User ID: {current_user_id}")
+            else:
+                logger.warning(f"{self.account_name}: 未获取到 User ID，签到可能会失败")
 
-                # =================================================
-                # 新增：主动执行签到逻辑
-                # =================================================
-                logger.info(f"{self.account_name}: 正在尝试主动签到...")
+            # 使用 page.evaluate 在浏览器上下文中执行 fetch 请求
+            try:
+                logger.info(f"{self.account_name}: 尝试在浏览器中调用签到接口: {CHECKIN_URL} (POST)")
                 
-                # 等待获取 User ID (最多等待10秒)
-                wait_count = 0
-                while not user_balance_info.get("user_id") and wait_count < 10:
-                    logger.info(f"{self.account_name}: 等待 User ID 获取... ({wait_count+1}/10)")
-                    await asyncio.sleep(1)
-                    wait_count += 1
+                # 定义 fetch 执行脚本
+                fetch_script = r"""async ({url, userId}) => {
+                    try {
+                        const headers = {
+                            'Content-Type': 'application/json',
+                            'Accept': 'application/json, text/plain, */*'
+                        };
+                        if (userId) {
+                            headers['New-Api-User'] = userId;
+                        }
+                        const response = await fetch(url, {
+                            method: 'POST',
+                            headers: headers
+                        });
+                        const text = await response.text();
+                        return {
+                            status: response.status,
+                            text: text
+                        };
+                    } catch (e) {
+                        return {
+                            status: 0,
+                            text: e.toString()
+                        };
+                    }
+                }"""
+
+                # 执行 POST 请求
+                checkin_result = await page.evaluate(fetch_script, {"url": CHECKIN_URL, "userId": current_user_id})
                 
-                # 获取 User ID (优先使用捕获到的，其次是auth结果中的)
-                current_user_id = user_balance_info.get("user_id") or auth_result.get("user_id")
+                api_status = checkin_result["status"]
+                api_text = checkin_result["text"]
                 
-                if current_user_id:
-                    logger.info(f"{self.account_name}: 获取到 User ID: {current_user_id}")
-                else:
-                    logger.warning(f"{self.account_name}: 未获取到 User ID，签到可能会失败")
-
-                # 使用 page.evaluate 在浏览器上下文中执行 fetch 请求
-                try:
-                    logger.info(f"{self.account_name}: 尝试在浏览器中调用签到接口: {CHECKIN_URL} (POST)")
-                    
-                    # 定义 fetch 执行脚本
-                    fetch_script = r"""async ({url, userId}) => {
-                        try {
-                            const headers = {
-                                'Content-Type': 'application/json',
-                                'Accept': 'application/json, text/plain, */*'
-                            };
-                            if (userId) {
-                                headers['New-Api-User'] = userId;
-                            }
-                            const response = await fetch(url, {
-                                method: 'POST',
-                                headers: headers
-                            });
-                            const text = await response.text();
-                            return {
-                                status: response.status,
-                                text: text
-                            };
-                        } catch (e) {
-                            return {
-                                status: 0,
-                                text: e.toString()
-                            };
-                        }
-                    }"""
-
-                    # 执行 POST 请求
-                    checkin_result = await page.evaluate(fetch_script, {"url": CHECKIN_URL, "userId": current_user_id})
-                    
-                    api_status = checkin_result["status"]
-                    api_text = checkin_result["text"]
-                    
-                    logger.info(f"{self.account_name}: 签到接口响应状态: {api_status}")
-                    logger.debug(f"{self.account_name}: 签到接口响应内容: {api_text}")
-
-                    if api_status == 200:
-                        try:
-                            json_res = json.loads(api_text)
-                            msg = json_res.get("message") or json_res.get("msg") or ""
+                logger.info(f"{self.account_name}: 签到接口响应状态: {api_status}")
+                logger.debug(f"{self.account_name}: 签到接口响应内容: {api_text}")
+
+                if api_status == 200:
+                    try:
+                        json_res = json.loads(api_text)
+                        msg = json_res.get("message") or json_res.get("msg") or ""
+                        
+                        # 优先判断 success 字段
+                        if json_res.get("success"):
+                            logger.info(f"{self.account_name}: 签到成功！")
+                            checkin_info["found"] = True
+                            checkin_info["message"] = msg or "签到成功"
                             
-                            # 优先判断 success 字段
-                            if json_res.get("success"):
-                                logger.info(f"{self.account_name}: 签到成功！")
+                            if "data" in json_res:
+                                data = json_res["data"]
+                                if isinstance(data, dict):
+                                    # 提取 quota_awarded
+                                    if "quota_awarded" in data:
+                                        # 转换为美元显示 (假设除以 500000)
+                                        quota_val = data["quota_awarded"]
+                                        quota_usd = round(quota_val / QUOTA_TO_DOLLAR_RATE, 2)
+                                        checkin_info["reward"] = f"${quota_usd} ({quota_val})"
+                                        logger.info(f"{self.account_name}: 获得奖励: {checkin_info['reward']}")
+                                    
+                                    # 兼容其他字段
+                                    for key in ["reward", "amount", "quota", "balance"]:
+                                        if key in data and not checkin_info["reward"]:
+                                            checkin_info["reward"] = str(data[key])
+                                            break
+                        else:
+                            if msg:
+                                logger.info(f"{self.account_name}: 接口返回消息: {msg}")
                                 checkin_info["found"] = True
-                                checkin_info["message"] = msg or "签到成功"
-                                
-                                if "data" in json_res:
-                                    data = json_res["data"]
-                                    if isinstance(data, dict):
-                                        # 提取 quota_awarded
-                                        if "quota_awarded" in data:
-                                            # 转换为美元显示 (假设除以 500000)
-                                            quota_val = data["quota_awarded"]
-                                            quota_usd = round(quota_val / QUOTA_TO_DOLLAR_RATE, 2)
-                                            checkin_info["reward"] = f"${quota_usd} ({quota_val})"
-                                            logger.info(f"{self.account_name}: 获得奖励: {checkin_info['reward']}")
-                                        
-                                        # 兼容其他字段
-                                        for key in ["reward", "amount", "quota", "balance"]:
-                                            if key in data and not checkin_info["reward"]:
-                                                checkin_info["reward"] = str(data[key])
-                                                break
-                            else:
-                                if msg:
-                                    logger.info(f"{self.account_name}: 接口返回消息: {msg}")
-                                    checkin_info["found"] = True
-                                    checkin_info["message"] = f"接口返回: {msg}"
-                        except:
-                            pass
-                    elif api_status == 401:
-                         logger.warning(f"{self.account_name}: 签到失败(401)，可能是权限或Header缺失")
-                    else:
-                         logger.warning(f"{self.account_name}: 签到失败，状态码: {api_status}")
+                                checkin_info["message"] = f"接口返回: {msg}"
+                    except:
+                        pass
+                elif api_status == 401:
+                     logger.warning(f"{self.account_name}: 签到失败(401)，可能是权限或Header缺失")
+                else:
+                     logger.warning(f"{self.account_name}: 签到失败，状态码: {api_status}")
 
-                except Exception as e:
-                    logger.warning(f"{self.account_name}: 浏览器内调用签到接口失败: {e}")
+            except Exception as e:
+                logger.warning(f"{self.account_name}: 浏览器内调用签到接口失败: {e}")
 
-                # 等待一下，确保所有网络请求都被捕获
-                await page.wait_for_timeout(2000)
-                # =================================================
+            # 等待一下，确保所有网络请求都被捕获
+            await page.wait_for_timeout(2000)
+            # =================================================
 
-                # 步骤3: 检查网络监听中是否捕获到签到信息
-                logger.info(f"{self.account_name}: 检查签到状态...")
-                checkin_msg = "登录签到完成（签到在登录时自动触发）"
+            # 步骤3: 检查网络监听中是否捕获到签到信息
+            logger.info(f"{self.account_name}: 检查签到状态...")
+            checkin_msg = "登录签到完成（签到在登录时自动触发）"
 
-                if checkin_info["found"]:
-                    logger.info(f"{self.account_name}: 检测到签到响应")
-                    checkin_msg = checkin_info["message"]
-                    if checkin_info["reward"]:
-                        checkin_msg += f" | 奖励: {checkin_info['reward']}"
-                else:
-                    logger.info(f"{self.account_name}: {checkin_msg}")
-
-                # AgentRouter的签到机制说明：
-                # - 登录时自动完成签到，无需调用额外API
-                # - 用户余额信息从登录响应中获取
-
-                # 计算余额（转换为美元）
-                quota_dollar = round(user_balance_info["quota"] / QUOTA_TO_DOLLAR_RATE, 2)
-                used_dollar = round(user_balance_info["used_quota"] / QUOTA_TO_DOLLAR_RATE, 2)
-
-                # 构建用户信息
-                user_info = {
-                    "success": True,
-                    "quota": quota_dollar,
-                    "used": used_dollar,
-                    "display": f"余额: ${quota_dollar:.2f}, 已用: ${used_dollar:.2f}"
-                }
+            if checkin_info["found"]:
+                logger.info(f"{self.account_name}: 检测到签到响应")
+                checkin_msg = checkin_info["message"]
+                if checkin_info["reward"]:
+                    checkin_msg += f" | 奖励: {checkin_info['reward']}"
+            else:
+                logger.info(f"{self.account_name}: {checkin_msg}")
 
-                # 使用捕获的用户名（如果有）
-                username = user_balance_info.get("username") or auth_result.get("username")
+            # AgentRouter的签到机制说明：
+            # - 登录时自动完成签到，无需调用额外API
+            # - 用户余额信息从登录响应中获取
 
-                logger.info(f"{self.account_name}: 签到流程完成，结果：成功")
-                if quota_dollar > 0 or used_dollar > 0:
-                    logger.info(f"{self.account_name}: {user_info['display']}")
+            # 计算余额（转换为美元）
+            quota_dollar = round(user_balance_info["quota"] / QUOTA_TO_DOLLAR_RATE, 2)
+            used_dollar = round(user_balance_info["used_quota"] / QUOTA_TO_DOLLAR_RATE, 2)
 
-                return {
-                    "success": True,
-                    "account": self.account_name,
-                    "auth_method": auth_type,
-                    "user_info": user_info,
-                    "username": username,
-                    "message": checkin_msg,
-                    "checkin_reward": checkin_info.get("reward", "")
-                }
+            # 构建用户信息
+            user_info = {
+                "success": True,
+                "quota": quota_dollar,
+                "used": used_dollar,
+                "display": f"余额: ${quota_dollar:.2f}, 已用: ${used_dollar:.2f}"
+            }
 
-            finally:
-                await page.close()
-                await context.close()
+            # 使用捕获的用户名（如果有）
+            username = user_balance_info.get("username") or auth_result.get("username")
+
+            logger.info(f"{self.account_name}: 签到流程完成，结果：成功")
+            if quota_dollar > 0 or used_dollar > 0:
+                logger.info(f"{self.account_name}: {user_info['display']}")
+
+            return {
+                "success": True,
+                "account": self.account_name,
+                "auth_method": auth_type,
+                "user_info": user_info,
+                "username": username,
+                "message": checkin_msg,
+                "checkin_reward": checkin_info.get("reward", "")
+            }
 
     async def _get_waf_cookies(self, page: Page, context: BrowserContext):
-        """获取 WAF cookies"""
+        """获取 WAF cookies（优先使用同主机的缓存）"""
+        cached = waf_cookie_cache.get(WAF_HOST)
+        if cached:
+            try:
+                await context.add_cookies([
+                    {"name": name, "value": value, "url": BASE_URL} for name, value in cached.items()
+                ])
+                logger.info(f"{self.account_name}: 使用缓存的 WAF cookies")
+                return
+            except Exception as e:
+                logger.debug(f"{self.account_name}: 写入缓存的 WAF cookies 失败: {e}")
+
         try:
             logger.info(f"{self.account_name}: 获取 WAF cookies...")
             await page.goto(LOGIN_URL, wait_until="domcontentloaded", timeout=BROWSER_TIMEOUT)
@@ -850,6 +1187,7 @@ class AgentRouterCheckIn:
 
             if waf_cookies:
                 logger.info(f"{self.account_name}: 获取到 {len(waf_cookies)} 个 WAF cookies")
+                waf_cookie_cache.update(WAF_HOST, {c["name"]: c["value"] for c in waf_cookies})
             else:
                 logger.warning(f"{self.account_name}: 未获取到 WAF cookies")
         except Exception as e:
@@ -880,6 +1218,26 @@ def load_accounts() -> Optional[List[Dict]]:
         return None
 
 
+# ---------------- 每日签到记录（.github/workflows/checkin_ledger.py） ----------------
+try:
+    from checkin_ledger import CheckinLedger
+except ImportError:
+    class CheckinLedger:
+        """未找到 checkin_ledger 模块时不记录、不跳过"""
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def succeeded(self, account):
+            return None
+
+        def record(self, account):
+            pass
+
+
+ledger = CheckinLedger("996coder", CACHE_DIR)
+
+
 async def main_async():
     """异步主函数"""
     logger.info("="*80)
@@ -897,24 +1255,64 @@ async def main_async():
 
     logger.info(f"\n找到 {len(accounts)} 个账号配置\n")
 
-    # 执行签到
-    results = []
+    # 今日已签到成功的账号直接跳过
+    results: List[Optional[Dict]] = [None] * len(accounts)
+    pending = []
     for i, account in enumerate(accounts):
-        try:
-            checkin = AgentRouterCheckIn(account, i)
-            result = await checkin.execute()
-            results.append(result)
-        except Exception as e:
-            logger.error(f"账号 {i+1} 处理异常: {e}")
-            results.append({
-                "success": False,
+        signed_at = ledger.succeeded(account.get("email", ""))
+        if signed_at:
+            logger.info(f"⏭️ 账号 {i+1} 今日 {signed_at} 已签到成功，跳过（FORCE_CHECKIN=true 可强制签到）")
+            results[i] = {
+                "success": True,
                 "account": account.get("name", f"账号{i+1}"),
-                "error": str(e)
-            })
+                "message": f"今日 {signed_at} 已签到成功",
+                "auth_method": "签到记录"
+            }
+        else:
+            pending.append(i)
+
+    if not pending:
+        logger.info("所有账号今日均已签到成功，无需执行")
+        return 0
+
+    # 并发数（受可用内存约束）
+    concurrency = min(resolve_browser_concurrency(), len(pending))
+    logger.info(f"账号并发数: {concurrency}")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_account(order: int, i: int, account: Dict, browser_pool: BrowserPool) -> Dict:
+        async with semaphore:
+            try:
+                checkin = AgentRouterCheckIn(account, i, browser_pool)
+                result = await checkin.execute()
+            except Exception as e:
+                logger.error(f"账号 {i+1} 处理异常: {e}")
+                result = {
+                    "success": False,
+                    "account": account.get("name", f"账号{i+1}"),
+                    "error": str(e)
+                }
+
+            if result.get("success"):
+                ledger.record(account.get("email", ""))
+
+            # 账号间延迟（占用槽位，保持每个槽位内的节奏）
+            if order < len(pending) - concurrency:
+                await asyncio.sleep(ACCOUNT_DELAY)
+            return result
+
+    # 执行签到（所有账号共享同一个浏览器进程，结果按账号顺序返回）
+    async with async_playwright() as playwright:
+        browser_pool = BrowserPool(playwright)
+        try:
+            pending_results = await asyncio.gather(
+                *(run_account(order, i, accounts[i], browser_pool) for order, i in enumerate(pending))
+            )
+        finally:
+            await browser_pool.close()
 
-        # 账号间延迟
-        if i < len(accounts) - 1:
-            await asyncio.sleep(3)
+    for i, result in zip(pending, pending_results):
+        results[i] = result
 
     # 统计结果
     success_count = sum(1 for r in results if r.get("success"))
@@ -22,10 +22,11 @@ import json
 import os
 import random
 import re
-import tempfile
 import time
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
 
 # 时区支持
 try:
@@ -97,19 +98,47 @@ except Exception as e:
     def send(title, content):
         pass
 
+# 可选 WAF cookie 共享缓存模块（.github/workflows/waf_cache.py）
+try:
+    from waf_cache import WafCookieCache
+except ImportError:
+    class WafCookieCache:
+        """未找到 waf_cache 模块时不缓存 WAF cookies"""
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def get(self, host):
+            return None
+
+        def update(self, host, cookies):
+            pass
+
+        def invalidate(self, host):
+            pass
+
 
 # ==================== 配置常量 ====================
 BASE_URL = os.getenv("AGENTROUTER_BASE_URL") or "https://agentrouter.org"
 LOGIN_URL = f"{BASE_URL}/login"
+WAF_HOST = urlparse(BASE_URL).netloc
 CHECKIN_URL = f"{BASE_URL}/api/user/sign_in"
 USER_INFO_URL = f"{BASE_URL}/api/user/self"
 TIMEOUT = int(os.getenv("AGENTROUTER_TIMEOUT", "30"))
 DEBUG_MODE = os.getenv("DEBUG_MODE", "false").lower() == "true"
 
+# 缓存配置
+CACHE_DIR = os.getenv("CHECKIN_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+WAF_CACHE_TTL = int(os.getenv("WAF_CACHE_TTL", "1800"))  # 秒，0 表示禁用缓存
+
 # 浏览器配置
 BROWSER_HEADLESS = os.getenv("BROWSER_HEADLESS", "true").lower() == "true"
 BROWSER_TIMEOUT = 20000  # 20秒
 PAGE_LOAD_TIMEOUT = 15000  # 15秒
+BROWSER_BASE_MEMORY_MB = 300  # 共享浏览器进程预估内存占用
+BROWSER_CONTEXT_MEMORY_MB = 250  # 单个账号上下文预估内存占用
+BROWSER_MAX_CONCURRENCY = 4  # 自动模式下的并发上限
+ACCOUNT_DELAY = 3  # 同一并发槽位内账号间延迟（秒）
 
 # User-Agent
 DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
@@ -155,6 +184,114 @@ POPUP_CLOSE_SELECTORS = [
 ]
 
 
+# 从 Regular-inspection 项目借鉴的高级反检测技术
+# 针对低配Docker环境（CPU<1核，内存<1GB）优化
+BROWSER_LAUNCH_ARGS = [
+    "--disable-blink-features=AutomationControlled",
+    "--disable-dev-shm-usage",
+    "--disable-web-security",
+    "--no-sandbox",
+    "--disable-infobars",
+    "--disable-popup-blocking",
+    "--disable-notifications",
+    "--disable-extensions",
+    "--ignore-certificate-errors",
+    "--allow-running-insecure-content",
+    "--disable-gpu",
+    "--window-size=1280,720",  # 降低分辨率减少渲染压力
+    "--disable-features=IsolateOrigins,site-per-process",
+    "--disable-site-isolation-trials",
+    "--disable-features=BlockInsecurePrivateNetworkRequests",
+    # 低配环境优化参数（移除--single-process避免崩溃）
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-breakpad",
+    "--disable-component-extensions-with-background-pages",
+    "--disable-features=TranslateUI",
+    "--disable-ipc-flooding-protection",
+    "--disable-renderer-backgrounding",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--no-first-run",
+    "--disable-hang-monitor",
+]
+
+# 更全面的Stealth脚本
+STEALTH_SCRIPT = """
+    // 1. 隐藏webdriver特征
+    Object.defineProperty(navigator, 'webdriver', {
+      get: () => undefined,
+    });
+
+    // 2. 修复语言特征
+    Object.defineProperty(navigator, 'languages', {
+      get: () => ['zh-CN', 'zh', 'en-US', 'en'],
+    });
+
+    // 3. 修复权限查询
+    const originalQuery = window.navigator.permissions.query;
+    window.navigator.permissions.query = (parameters) => (
+      parameters.name === 'notifications' ?
+        Promise.resolve({ state: Notification.permission }) :
+        originalQuery(parameters)
+    );
+
+    // 4. 伪装plugins
+    Object.defineProperty(navigator, 'plugins', {
+      get: () => [
+        { name: 'Chrome PDF Plugin', filename: 'internal-pdf-viewer', description: 'Portable Document Format' },
+        { name: 'Chrome PDF Viewer', filename: 'mhjfbmdgcfjbbpaeojofohoefgiehjai', description: '' },
+        { name: 'Native Client', filename: 'internal-nacl-plugin', description: '' },
+      ],
+    });
+
+    // 5. 修复WebGL指纹
+    try {
+        const getParameter = WebGLRenderingContext.prototype.getParameter;
+        WebGLRenderingContext.prototype.getParameter = function(parameter) {
+            if (parameter === 37445) { // UNMASKED_VENDOR_WEBGL
+                return 'Intel Inc.';
+            }
+            if (parameter === 37446) { // UNMASKED_RENDERER_WEBGL
+                return 'Intel Iris OpenGL Engine';
+            }
+            return getParameter.call(this, parameter);
+        };
+    } catch (e) {}
+
+    // 6. 修复chrome对象（重要！）
+    if (!window.chrome) {
+        window.chrome = {
+            runtime: {},
+            loadTimes: function() {},
+            csi: function() {},
+            app: {}
+        };
+    }
+
+    // 7. 隐藏headless特征
+    Object.defineProperty(navigator, 'maxTouchPoints', {
+        get: () => 1,
+    });
+
+    // 8. 修复navigator.platform
+    Object.defineProperty(navigator, 'platform', {
+        get: () => 'Win32',
+    });
+
+    // 9. 修复deviceMemory
+    Object.defineProperty(navigator, 'deviceMemory', {
+        get: () => 8,
+    });
+
+    // 10. 修复hardwareConcurrency
+    Object.defineProperty(navigator, 'hardwareConcurrency', {
+        get: () => 8,
+    });
+"""
+
+
 # ==================== 工具函数 ====================
 def safe_send_notify(title: str, content: str) -> bool:
     """安全的通知发送"""
@@ -173,6 +310,54 @@ def safe_send_notify(title: str, content: str) -> bool:
         return False
 
 
+def get_available_memory_mb() -> Optional[int]:
+    """获取可用内存（MB），优先读取容器 cgroup 限制，无法获取时返回 None"""
+    available = None
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    available = int(line.split()[1]) // 1024
+                    break
+    except Exception:
+        pass
+
+    # Docker 容器内 /proc/meminfo 显示的是宿主机内存，需结合 cgroup 限制
+    for limit_file, usage_file in [
+        ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current"),
+        ("/sys/fs/cgroup/memory/memory.limit_in_bytes", "/sys/fs/cgroup/memory/memory.usage_in_bytes"),
+    ]:
+        try:
+            with open(limit_file, "r") as f:
+                limit = f.read().strip()
+            if not limit.isdigit() or int(limit) >= 1 << 60:
+                continue
+            with open(usage_file, "r") as f:
+                usage = int(f.read().strip())
+            cgroup_available = (int(limit) - usage) // (1024 * 1024)
+            available = cgroup_available if available is None else min(available, cgroup_available)
+            break
+        except Exception:
+            continue
+
+    return available
+
+
+def resolve_browser_concurrency() -> int:
+    """计算同时运行的账号数：手动配置优先，否则按可用内存估算"""
+    configured = os.getenv("BROWSER_CONCURRENCY", "auto").strip().lower()
+    if configured.isdigit() and int(configured) > 0:
+        return int(configured)
+
+    available_mb = get_available_memory_mb()
+    if available_mb is None:
+        return 1
+
+    # 预留共享浏览器进程的内存，剩余部分按每个上下文的占用估算
+    concurrency = (available_mb - BROWSER_BASE_MEMORY_MB) // BROWSER_CONTEXT_MEMORY_MB
+    return max(1, min(BROWSER_MAX_CONCURRENCY, concurrency))
+
+
 # ==================== 认证器类 ====================
 class EmailAuthenticator:
     """邮箱密码认证"""
@@ -410,13 +595,92 @@ class EmailAuthenticator:
             return {"success": False, "error": f"邮箱密码认证失败: {str(e)}"}
 
 
+# ==================== WAF cookie 缓存 ====================
+waf_cookie_cache = WafCookieCache(CACHE_DIR, WAF_CACHE_TTL, WAF_COOKIE_NAMES)
+
+
+# ==================== 浏览器池 ====================
+class BrowserPool:
+    """浏览器池：单次运行共享一个 Chromium 进程，为每个账号创建全新的 BrowserContext"""
+
+    def __init__(self, playwright):
+        self.playwright = playwright
+        self.browser = None
+        self._contexts: Set[BrowserContext] = set()
+        self._lock = asyncio.Lock()
+
+    async def _ensure_browser(self):
+        """启动（或在崩溃后重启）共享浏览器"""
+        if self.browser and self.browser.is_connected():
+            return self.browser
+
+        logger.info("启动共享 Chromium 浏览器...")
+        self.browser = await self.playwright.chromium.launch(
+            headless=BROWSER_HEADLESS,
+            args=BROWSER_LAUNCH_ARGS,
+        )
+        self._contexts.clear()
+        return self.browser
+
+    async def acquire(self) -> BrowserContext:
+        """创建一个全新的浏览器上下文，cookies/localStorage/IndexedDB 等存储互不可见"""
+        async with self._lock:
+            browser = await self._ensure_browser()
+            context = await browser.new_context(
+                user_agent=DEFAULT_USER_AGENT,
+                viewport={"width": 1920, "height": 1080},
+                java_script_enabled=True,
+            )
+            # Stealth 脚本挂在上下文上，对其后创建的所有页面生效
+            await context.add_init_script(STEALTH_SCRIPT)
+            self._contexts.add(context)
+            return context
+
+    async def release(self, context: BrowserContext):
+        """归还上下文：直接关闭，账号状态随上下文一并销毁"""
+        async with self._lock:
+            self._contexts.discard(context)
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    @asynccontextmanager
+    async def context(self):
+        """以上下文管理器方式借用浏览器上下文"""
+        context = await self.acquire()
+        try:
+            yield context
+        finally:
+            await self.release(context)
+
+    async def close(self):
+        """关闭所有上下文及共享浏览器"""
+        async with self._lock:
+            contexts = list(self._contexts)
+            self._contexts.clear()
+        for context in contexts:
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+        if self.browser:
+            try:
+                await self.browser.close()
+            except Exception:
+                pass
+            self.browser = None
+
+
 # ==================== 签到管理类 ====================
 class AgentRouterCheckIn:
     """AgentRouter 签到管理"""
 
-    def __init__(self, account_config: Dict, account_index: int):
+    def __init__(self, account_config: Dict, account_index: int, browser_pool: BrowserPool):
         self.account_config = account_config
         self.account_index = account_index
+        self.browser_pool = browser_pool
         self.account_name = account_config.get("name", f"账号{account_index + 1}")
 
     async def execute(self) -> Dict:
@@ -439,147 +703,25 @@ class AgentRouterCheckIn:
         # 执行邮箱密码认证签到
         logger.info(f"\n{self.account_name}: 尝试邮箱密码认证...")
 
-        async with async_playwright() as playwright:
-            try:
-                result = await self._checkin_with_auth(playwright, "email", email, password)
-                return result
-            except Exception as e:
-                logger.error(f"{self.account_name}: 邮箱密码认证异常: {str(e)}")
-                return {
-                    "success": False,
-                    "account": self.account_name,
-                    "error": f"邮箱密码认证异常: {str(e)}"
-                }
+        try:
+            result = await self._checkin_with_auth("email", email, password)
+            return result
+        except Exception as e:
+            logger.error(f"{self.account_name}: 邮箱密码认证异常: {str(e)}")
+            return {
+                "success": False,
+                "account": self.account_name,
+                "error": f"邮箱密码认证异常: {str(e)}"
+            }
 
-    async def _checkin_with_auth(self, playwright, auth_type: str, email: str, password: str) -> Dict:
+    async def _checkin_with_auth(self, auth_type: str, email: str, password: str) -> Dict:
         """使用指定认证方式签到"""
         logger.info(f"{self.account_name}: 开始使用 {auth_type} 认证签到流程...")
 
-        effective_headless = BROWSER_HEADLESS
-
-        # 从 Regular-inspection 项目借鉴的高级反检测技术
-        # 针对低配Docker环境（CPU<1核，内存<1GB）优化
-        browser_launch_args = [
-            "--disable-blink-features=AutomationControlled",
-            "--disable-dev-shm-usage",
-            "--disable-web-security",
-            "--no-sandbox",
-            "--disable-infobars",
-            "--disable-popup-blocking",
-            "--disable-notifications",
-            "--disable-extensions",
-            "--ignore-certificate-errors",
-            "--allow-running-insecure-content",
-            "--disable-gpu",
-            "--window-size=1280,720",  # 降低分辨率减少渲染压力
-            "--disable-features=IsolateOrigins,site-per-process",
-            "--disable-site-isolation-trials",
-            "--disable-features=BlockInsecurePrivateNetworkRequests",
-            # 低配环境优化参数（移除--single-process避免崩溃）
-            "--disable-background-networking",
-            "--disable-background-timer-throttling",
-            "--disable-backgrounding-occluded-windows",
-            "--disable-breakpad",
-            "--disable-component-extensions-with-background-pages",
-            "--disable-features=TranslateUI",
-            "--disable-ipc-flooding-protection",
-            "--disable-renderer-backgrounding",
-            "--metrics-recording-only",
-            "--mute-audio",
-            "--no-first-run",
-            "--disable-hang-monitor",
-        ]
-
-        # 更全面的Stealth脚本
-        stealth_script = """
-            // 1. 隐藏webdriver特征
-            Object.defineProperty(navigator, 'webdriver', {
-              get: () => undefined,
-            });
-
-            // 2. 修复语言特征
-            Object.defineProperty(navigator, 'languages', {
-              get: () => ['zh-CN', 'zh', 'en-US', 'en'],
-            });
-
-            // 3. 修复权限查询
-            const originalQuery = window.navigator.permissions.query;
-            window.navigator.permissions.query = (parameters) => (
-              parameters.name === 'notifications' ?
-                Promise.resolve({ state: Notification.permission }) :
-                originalQuery(parameters)
-            );
-
-            // 4. 伪装plugins
-            Object.defineProperty(navigator, 'plugins', {
-              get: () => [
-                { name: 'Chrome PDF Plugin', filename: 'internal-pdf-viewer', description: 'Portable Document Format' },
-                { name: 'Chrome PDF Viewer', filename: 'mhjfbmdgcfjbbpaeojofohoefgiehjai', description: '' },
-                { name: 'Native Client', filename: 'internal-nacl-plugin', description: '' },
-              ],
-            });
-
-            // 5. 修复WebGL指纹
-            try {
-                const getParameter = WebGLRenderingContext.prototype.getParameter;
-                WebGLRenderingContext.prototype.getParameter = function(parameter) {
-                    if (parameter === 37445) { // UNMASKED_VENDOR_WEBGL
-                        return 'Intel Inc.';
-                    }
-                    if (parameter === 37446) { // UNMASKED_RENDERER_WEBGL
-                        return 'Intel Iris OpenGL Engine';
-                    }
-                    return getParameter.call(this, parameter);
-                };
-            } catch (e) {}
-
-            // 6. 修复chrome对象（重要！）
-            if (!window.chrome) {
-                window.chrome = {
-                    runtime: {},
-                    loadTimes: function() {},
-                    csi: function() {},
-                    app: {}
-                };
-            }
-
-            // 7. 隐藏headless特征
-            Object.defineProperty(navigator, 'maxTouchPoints', {
-                get: () => 1,
-            });
-
-            // 8. 修复navigator.platform
-            Object.defineProperty(navigator, 'platform', {
-                get: () => 'Win32',
-            });
-
-            // 9. 修复deviceMemory
-            Object.defineProperty(navigator, 'deviceMemory', {
-                get: () => 8,
-            });
-
-            // 10. 修复hardwareConcurrency
-            Object.defineProperty(navigator, 'hardwareConcurrency', {
-                get: () => 8,
-            });
-        """
-
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # 启动浏览器
-            context = await playwright.chromium.launch_persistent_context(
-                user_data_dir=temp_dir,
-                headless=effective_headless,
-                user_agent=DEFAULT_USER_AGENT,
-                viewport={"width": 1920, "height": 1080},
-                args=browser_launch_args,
-                java_script_enabled=True,
-            )
-
+        # 从共享浏览器池借用隔离的上下文（Stealth脚本已在上下文创建时注入）
+        async with self.browser_pool.context() as context:
             page = await context.new_page()
-
-            # 注入stealth脚本
-            await page.add_init_script(stealth_script)
-            logger.info(f"{self.account_name}: 已注入高级Stealth脚本以增强反检测能力")
+            logger.info(f"{self.account_name}: 已获取隔离的浏览器上下文")
 
             # 用于捕获签到信息和用户余额
             checkin_info = {"found": False, "message": "", "reward": ""}
@@ -591,6 +733,13 @@ class AgentRouterCheckIn:
                     url = response.url
                     method = response.request.method
 
+                    # 页面返回 WAF 挑战，说明缓存中的 WAF cookies 已失效
+                    if response.request.resource_type == "document" and response.status == 200:
+                        body = await response.text()
+                        if "<script>" in body and "arg1=" in body:
+                            logger.info(f"{self.account_name}: 遇到 WAF 挑战，清除缓存的 WAF cookies")
+                            waf_cookie_cache.invalidate(WAF_HOST)
+
                     # 关注所有API请求
                     if "/api/" in url:
                         # 打印请求方法和URL
@@ -657,80 +806,91 @@ class AgentRouterCheckIn:
 
             page.on("response", handle_response)
 
-            try:
-                # 步骤1: 获取 WAF cookies
-                await self._get_waf_cookies(page, context)
+            # 步骤1: 获取 WAF cookies
+            await self._get_waf_cookies(page, context)
 
-                # 步骤2: 执行邮箱密码认证
-                authenticator = EmailAuthenticator(self.account_name, email, password)
-                auth_result = await authenticator.authenticate(page, context)
+            # 步骤2: 执行邮箱密码认证
+            authenticator = EmailAuthenticator(self.account_name, email, password)
+            auth_result = await authenticator.authenticate(page, context)
 
-                if not auth_result["success"]:
-                    return {
-                        "success": False,
-                        "account": self.account_name,
-                        "error": auth_result.get("error")
-                    }
+            if not auth_result["success"]:
+                return {
+                    "success": False,
+                    "account": self.account_name,
+                    "error": auth_result.get("error")
+                }
 
-                logger.info(f"{self.account_name}: 认证成功")
+            logger.info(f"{self.account_name}: 认证成功")
 
-                # 获取认证后的 cookies
-                cookies = auth_result.get("cookies", {})
+            # 保存浏览器通过挑战后的 WAF cookies 供后续账号使用
+            waf_cookie_cache.update(
+                WAF_HOST, {c["name"]: c["value"] for c in await context.cookies() if c["name"] in WAF_COOKIE_NAMES}
+            )
 
-                # 等待一下，确保所有网络请求都被捕获
-                await page.wait_for_timeout(2000)
+            # 获取认证后的 cookies
+            cookies = auth_result.get("cookies", {})
 
-                # 步骤3: 检查网络监听中是否捕获到签到信息
-                logger.info(f"{self.account_name}: 检查签到状态...")
-                checkin_msg = "登录签到完成（签到在登录时自动触发）"
-
-                if checkin_info["found"]:
-                    logger.info(f"{self.account_name}: 检测到签到响应")
-                    checkin_msg = checkin_info["message"]
-                    if checkin_info["reward"]:
-                        checkin_msg += f" | 奖励: {checkin_info['reward']}"
-                else:
-                    logger.info(f"{self.account_name}: {checkin_msg}")
-
-                # AgentRouter的签到机制说明：
-                # - 登录时自动完成签到，无需调用额外API
-                # - 用户余额信息从登录响应中获取
-
-                # 计算余额（转换为美元）
-                quota_dollar = round(user_balance_info["quota"] / QUOTA_TO_DOLLAR_RATE, 2)
-                used_dollar = round(user_balance_info["used_quota"] / QUOTA_TO_DOLLAR_RATE, 2)
-
-                # 构建用户信息
-                user_info = {
-                    "success": True,
-                    "quota": quota_dollar,
-                    "used": used_dollar,
-                    "display": f"余额: ${quota_dollar:.2f}, 已用: ${used_dollar:.2f}"
-                }
+            # 等待一下，确保所有网络请求都被捕获
+            await page.wait_for_timeout(2000)
 
-                # 使用捕获的用户名（如果有）
-                username = user_balance_info.get("username") or auth_result.get("username")
+            # 步骤3: 检查网络监听中是否捕获到签到信息
+            logger.info(f"{self.account_name}: 检查签到状态...")
+            checkin_msg = "登录签到完成（签到在登录时自动触发）"
 
-                logger.info(f"{self.account_name}: 签到流程完成，结果：成功")
-                if quota_dollar > 0 or used_dollar > 0:
-                    logger.info(f"{self.account_name}: {user_info['display']}")
+            if checkin_info["found"]:
+                logger.info(f"{self.account_name}: 检测到签到响应")
+                checkin_msg = checkin_info["message"]
+                if checkin_info["reward"]:
+                    checkin_msg += f" | 奖励: {checkin_info['reward']}"
+            else:
+                logger.info(f"{self.account_name}: {checkin_msg}")
 
-                return {
-                    "success": True,
-                    "account": self.account_name,
-                    "auth_method": auth_type,
-                    "user_info": user_info,
-                    "username": username,
-                    "message": checkin_msg,
-                    "checkin_reward": checkin_info.get("reward", "")
-                }
+            # AgentRouter的签到机制说明：
+            # - 登录时自动完成签到，无需调用额外API
+            # - 用户余额信息从登录响应中获取
 
-            finally:
-                await page.close()
-                await context.close()
+            # 计算余额（转换为美元）
+            quota_dollar = round(user_balance_info["quota"] / QUOTA_TO_DOLLAR_RATE, 2)
+            used_dollar = round(user_balance_info["used_quota"] / QUOTA_TO_DOLLAR_RATE, 2)
+
+            # 构建用户信息
+            user_info = {
+                "success": True,
+                "quota": quota_dollar,
+                "used": used_dollar,
+                "display": f"余额: ${quota_dollar:.2f}, 已用: ${used_dollar:.2f}"
+            }
+
+            # 使用捕获的用户名（如果有）
+            username = user_balance_info.get("username") or auth_result.get("username")
+
+            logger.info(f"{self.account_name}: 签到流程完成，结果：成功")
+            if quota_dollar > 0 or used_dollar > 0:
+                logger.info(f"{self.account_name}: {user_info['display']}")
+
+            return {
+                "success": True,
+                "account": self.account_name,
+                "auth_method": auth_type,
+                "user_info": user_info,
+                "username": username,
+                "message": checkin_msg,
+                "checkin_reward": checkin_info.get("reward", "")
+            }
 
     async def _get_waf_cookies(self, page: Page, context: BrowserContext):
-        """获取 WAF cookies"""
+        """获取 WAF cookies（优先使用同主机的缓存）"""
+        cached = waf_cookie_cache.get(WAF_HOST)
+        if cached:
+            try:
+                await context.add_cookies([
+                    {"name": name, "value": value, "url": BASE_URL} for name, value in cached.items()
+                ])
+                logger.info(f"{self.account_name}: 使用缓存的 WAF cookies")
+                return
+            except Exception as e:
+                logger.debug(f"{self.account_name}: 写入缓存的 WAF cookies 失败: {e}")
+
         try:
             logger.info(f"{self.account_name}: 获取 WAF cookies...")
             await page.goto(LOGIN_URL, wait_until="domcontentloaded", timeout=BROWSER_TIMEOUT)
@@ -742,6 +902,7 @@ class AgentRouterCheckIn:
 
             if waf_cookies:
                 logger.info(f"{self.account_name}: 获取到 {len(waf_cookies)} 个 WAF cookies")
+                waf_cookie_cache.update(WAF_HOST, {c["name"]: c["value"] for c in waf_cookies})
             else:
                 logger.warning(f"{self.account_name}: 未获取到 WAF cookies")
         except Exception as e:
@@ -772,6 +933,26 @@ def load_accounts() -> Optional[List[Dict]]:
         return None
 
 
+# ---------------- 每日签到记录（.github/workflows/checkin_ledger.py） ----------------
+try:
+    from checkin_ledger import CheckinLedger
+except ImportError:
+    class CheckinLedger:
+        """未找到 checkin_ledger 模块时不记录、不跳过"""
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def succeeded(self, account):
+            return None
+
+        def record(self, account):
+            pass
+
+
+ledger = CheckinLedger("agentrouter", CACHE_DIR)
+
+
 async def main_async():
     """异步主函数"""
     logger.info("="*80)
@@ -789,24 +970,64 @@ async def main_async():
 
     logger.info(f"\n找到 {len(accounts)} 个账号配置\n")
 
-    # 执行签到
-    results = []
+    # 今日已签到成功的账号直接跳过
+    results: List[Optional[Dict]] = [None] * len(accounts)
+    pending = []
     for i, account in enumerate(accounts):
-        try:
-            checkin = AgentRouterCheckIn(account, i)
-            result = await checkin.execute()
-            results.append(result)
-        except Exception as e:
-            logger.error(f"账号 {i+1} 处理异常: {e}")
-            results.append({
-                "success": False,
+        signed_at = ledger.succeeded(account.get("email", ""))
+        if signed_at:
+            logger.info(f"⏭️ 账号 {i+1} 今日 {signed_at} 已签到成功，跳过（FORCE_CHECKIN=true 可强制签到）")
+            results[i] = {
+                "success": True,
                 "account": account.get("name", f"账号{i+1}"),
-                "error": str(e)
-            })
+                "message": f"今日 {signed_at} 已签到成功",
+                "auth_method": "签到记录"
+            }
+        else:
+            pending.append(i)
+
+    if not pending:
+        logger.info("所有账号今日均已签到成功，无需执行")
+        return 0
+
+    # 并发数（受可用内存约束）
+    concurrency = min(resolve_browser_concurrency(), len(pending))
+    logger.info(f"账号并发数: {concurrency}")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_account(order: int, i: int, account: Dict, browser_pool: BrowserPool) -> Dict:
+        async with semaphore:
+            try:
+                checkin = AgentRouterCheckIn(account, i, browser_pool)
+                result = await checkin.execute()
+            except Exception as e:
+                logger.error(f"账号 {i+1} 处理异常: {e}")
+                result = {
+                    "success": False,
+                    "account": account.get("name", f"账号{i+1}"),
+                    "error": str(e)
+                }
+
+            if result.get("success"):
+                ledger.record(account.get("email", ""))
+
+            # 账号间延迟（占用槽位，保持每个槽位内的节奏）
+            if order < len(pending) - concurrency:
+                await asyncio.sleep(ACCOUNT_DELAY)
+            return result
+
+    # 执行签到（所有账号共享同一个浏览器进程，结果按账号顺序返回）
+    async with async_playwright() as playwright:
+        browser_pool = BrowserPool(playwright)
+        try:
+            pending_results = await asyncio.gather(
+                *(run_account(order, i, accounts[i], browser_pool) for order, i in enumerate(pending))
+            )
+        finally:
+            await browser_pool.close()
 
-        # 账号间延迟
-        if i < len(accounts) - 1:
-            await asyncio.sleep(3)
+    for i, result in zip(pending, pending_results):
+        results[i] = result
 
     # 统计结果
     success_count = sum(1 for r in results if r.get("success"))
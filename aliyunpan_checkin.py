@@ -5,9 +5,12 @@ cron: 3 11 * * *
 new Env('阿里云盘签到')
 """
 
+import base64
+import hashlib
 import json
 import os
 import sys
+import re
 import io
 
 # 设置标准输出编码为UTF-8（解决Windows环境emoji显示问题）
@@ -20,6 +23,8 @@ import random
 import time
 import subprocess
 import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 # 时区支持
@@ -31,10 +36,18 @@ except ImportError:
 
 urllib3.disable_warnings()
 
+# 可选加密模块（Token 缓存依赖）
+try:
+    from nacl import secret
+    HAS_NACL = True
+except ImportError:
+    HAS_NACL = False
+
 # ---------------- 日志类 ----------------
 class Logger:
     def __init__(self):
         self.debug_mode = os.getenv("DEBUG_MODE", "false").lower() == "true"
+        self.lock = threading.Lock()  # 多线程签到时保证每条日志整行输出
 
     def log(self, level, message):
         if BEIJING_TZ:
@@ -42,7 +55,8 @@ class Logger:
         else:
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         formatted_msg = f"{timestamp} {level} {message}"
-        print(formatted_msg)
+        with self.lock:
+            print(formatted_msg)
 
     def info(self, message):
         self.log("INFO", message)
@@ -80,6 +94,34 @@ except ImportError:
 # 配置项
 auto_update_token = os.getenv("AUTO_UPDATE_TOKEN", "true").lower() == "true"
 show_token_in_notification = os.getenv("SHOW_TOKEN_IN_NOTIFICATION", "false").lower() == "true"  # 通知中是否显示token
+token_cache_enabled = os.getenv("ALIYUN_TOKEN_CACHE", "true").lower() == "true"  # 缓存访问令牌，有效期内不刷新
+CACHE_DIR = os.getenv("CHECKIN_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+TOKEN_CACHE_FILE = os.path.join(CACHE_DIR, "aliyunpan_tokens.json")
+TOKEN_EXPIRY_MARGIN = 600  # 访问令牌剩余有效期低于该秒数时重新刷新
+TOKEN_CACHE_RETENTION = 30 * 86400  # 超过该秒数未更新的缓存记录（已轮换掉的旧 refresh_token）将被清理
+account_delay = os.getenv("ALIYUN_ACCOUNT_DELAY", "10-20")  # 账号间启动间隔（秒），支持 "10-20" 随机范围
+account_concurrency = max(1, int(os.getenv("ALIYUN_CONCURRENCY", "1")))  # 同时处理的账号数
+
+
+def create_session():
+    """创建账号独享的长连接会话（同一账号的签到与信息查询并发复用连接，账号之间互不共享 cookie 和连接）"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=3)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def parse_delay_range(value):
+    """解析延迟配置，支持单个数值或 "最小-最大" 范围"""
+    try:
+        if "-" in value:
+            low, high = (float(part) for part in value.split("-", 1))
+            return min(low, high), max(low, high)
+        return float(value), float(value)
+    except ValueError:
+        logger.warning(f"ALIYUN_ACCOUNT_DELAY 格式错误: {value}，使用默认值 10-20")
+        return 10.0, 20.0
 
 # ---------------- 统一通知函数 ----------------
 def safe_send_notify(title, content):
@@ -93,180 +135,6 @@ def safe_send_notify(title, content):
     else:
         logger.info(f"通知: {title}")
 
-def update_qinglong_env_database(var_name, new_value, old_value=None):
-    """通过数据库直接更新青龙面板环境变量"""
-    try:
-        logger.info("尝试通过数据库更新青龙面板环境变量...")
-
-        # 青龙面板数据库路径
-        db_paths = [
-            "/ql/data/db/database.sqlite",
-            "/ql/db/database.sqlite",
-            "/ql/data/database.sqlite"
-        ]
-
-        db_path = None
-        for path in db_paths:
-            if os.path.exists(path):
-                db_path = path
-                logger.info(f"找到数据库文件: {path}")
-                break
-
-        if not db_path:
-            logger.error("未找到青龙面板数据库文件")
-            return False
-
-        # 连接数据库
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        # 先查询表结构
-        cursor.execute("PRAGMA table_info(envs)")
-        columns = [column[1] for column in cursor.fetchall()]
-
-        # 查询现有环境变量
-        cursor.execute("SELECT * FROM envs WHERE name = ?", (var_name,))
-        existing_env = cursor.fetchone()
-
-        if existing_env:
-            # 更新现有环境变量（兼容不同版本的字段）
-            logger.info(f"更新现有环境变量: {var_name}")
-            if 'updated_at' in columns:
-                current_time = now_beijing().strftime('%Y-%m-%d %H:%M:%S')
-                cursor.execute("UPDATE envs SET value = ?, updated_at = ? WHERE name = ?",
-                             (new_value, current_time, var_name))
-            else:
-                cursor.execute("UPDATE envs SET value = ? WHERE name = ?",
-                             (new_value, var_name))
-        else:
-            # 创建新环境变量
-            logger.info(f"创建新环境变量: {var_name}")
-            current_time = now_beijing().strftime('%Y-%m-%d %H:%M:%S')
-
-            if 'updated_at' in columns and 'created_at' in columns:
-                cursor.execute("""
-                    INSERT INTO envs (name, value, created_at, updated_at, status)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (var_name, new_value, current_time, current_time, 1))
-            else:
-                # 简化版本，只插入必要字段
-                cursor.execute("INSERT INTO envs (name, value) VALUES (?, ?)",
-                             (var_name, new_value))
-
-        # 提交更改
-        conn.commit()
-        conn.close()
-
-        logger.info(f"成功通过数据库更新环境变量 {var_name}")
-        return True
-
-    except Exception as e:
-        logger.error(f"数据库更新失败: {e}")
-        return False
-
-def update_qinglong_env_api(var_name, new_value, old_value=None):
-    """通过青龙面板API更新环境变量"""
-    try:
-        logger.info("尝试通过青龙面板API更新环境变量...")
-
-        # 查找青龙面板配置文件
-        config_paths = [
-            "/ql/config/auth.json",
-            "/ql/data/config/auth.json",
-            "/ql/config/config.json"
-        ]
-
-        config_data = None
-        for config_path in config_paths:
-            if os.path.exists(config_path):
-                try:
-                    with open(config_path, 'r', encoding='utf-8') as f:
-                        config_data = json.load(f)
-                    logger.info(f"找到配置文件: {config_path}")
-                    break
-                except:
-                    continue
-
-        if not config_data:
-            logger.error("未找到青龙面板配置文件")
-            return False
-
-        # 获取API配置
-        token = config_data.get('token') or config_data.get('auth', {}).get('token')
-        if not token:
-            logger.error("配置文件中未找到token")
-            return False
-
-        # API基础URL
-        api_base = "http://localhost:5700"
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
-
-        # 查询现有环境变量
-        logger.info("查询现有环境变量...")
-        response = requests.get(f"{api_base}/api/envs", headers=headers, timeout=10)
-
-        logger.debug(f"API 请求：GET {api_base}/api/envs {response.status_code}")
-        logger.debug(f"响应：{response.text[:300]}")
-
-        if response.status_code != 200:
-            logger.error(f"查询环境变量失败: {response.status_code}")
-            return False
-
-        envs_data = response.json()
-        if not envs_data.get("code") == 200:
-            logger.error(f"API返回错误: {envs_data}")
-            return False
-
-        existing_env = None
-        for env in envs_data.get("data", []):
-            if env.get("name") == var_name:
-                existing_env = env
-                break
-
-        if existing_env:
-            # 更新现有环境变量
-            logger.info(f"更新现有环境变量: {var_name}")
-            env_id = existing_env.get("id") or existing_env.get("_id")
-            update_data = {
-                "name": var_name,
-                "value": new_value,
-                "id": env_id
-            }
-            response = requests.put(f"{api_base}/api/envs", headers=headers, json=update_data, timeout=10)
-
-            logger.debug(f"API 请求：PUT {api_base}/api/envs {response.status_code}")
-            logger.debug(f"响应：{response.text[:300]}")
-        else:
-            # 创建新环境变量
-            logger.info(f"创建新环境变量: {var_name}")
-            create_data = {
-                "name": var_name,
-                "value": new_value
-            }
-            response = requests.post(f"{api_base}/api/envs", headers=headers, json=create_data, timeout=10)
-
-            logger.debug(f"API 请求：POST {api_base}/api/envs {response.status_code}")
-            logger.debug(f"响应：{response.text[:300]}")
-
-        if response.status_code == 200:
-            result = response.json()
-            if result.get("code") == 200:
-                logger.info(f"成功通过API更新环境变量 {var_name}")
-                return True
-            else:
-                logger.error(f"API操作失败: {result}")
-                return False
-        else:
-            logger.error(f"API请求失败: {response.status_code}")
-            return False
-
-    except Exception as e:
-        logger.error(f"API更新失败: {e}")
-        return False
-
 def update_qinglong_env_cmd(var_name, new_value, old_value=None):
     """使用ql命令更新环境变量"""
     try:
@@ -324,46 +192,6 @@ def update_qinglong_env_cmd(var_name, new_value, old_value=None):
         logger.warning(f"ql命令方法失败: {e}")
         return False
 
-def update_environment_variable(var_name, new_value, old_value=None):
-    """更新环境变量（支持多种环境）"""
-    if not auto_update_token:
-        logger.info("自动更新Token功能已禁用")
-        return False
-
-    try:
-        logger.info(f"正在尝试自动更新环境变量 {var_name}...")
-
-        # 检查是否在青龙面板环境
-        if os.path.exists('/ql'):
-            logger.info("检测到青龙面板环境，尝试多种更新方式...")
-
-            # 方法1: 数据库直接更新（最可靠）
-            if update_qinglong_env_database(var_name, new_value, old_value):
-                return True
-
-            # 方法2: API更新
-            if update_qinglong_env_api(var_name, new_value, old_value):
-                return True
-
-            # 方法3: ql命令更新
-            if update_qinglong_env_cmd(var_name, new_value, old_value):
-                return True
-
-            logger.error("所有青龙面板更新方式都失败了")
-            return False
-
-        # 检查是否在Docker环境
-        elif os.path.exists('/.dockerenv'):
-            return update_docker_env(var_name, new_value)
-
-        # 其他环境（本地运行等）
-        else:
-            return update_local_env(var_name, new_value)
-
-    except Exception as e:
-        logger.error(f"自动更新环境变量失败: {e}")
-        return False
-
 def update_docker_env(var_name, new_value):
     """Docker环境下的处理"""
     try:
@@ -426,13 +254,363 @@ def update_local_env(var_name, new_value):
                     logger.warning(f"更新 {env_file} 失败: {e}")
                     continue
 
-        logger.info("未找到 .env 文件，仅更新了当前进程环境变量")
-        return True
+        # 只改了当前进程的环境变量，下次运行仍会读到旧值
+        logger.warning("未找到 .env 文件，仅更新了当前进程环境变量，需手动更新")
+        return False
 
     except Exception as e:
         logger.warning(f"本地环境处理失败: {e}")
         return False
 
+class EnvWriteBack:
+    """
+    环境变量批量回写：运行期间只登记轮换后的新值，全部账号处理完后统一写回。
+    多账号共用一个变量时按旧值替换其中对应的片段；青龙面板下数据库只打开一次并在单个事务中提交，
+    API 方式只认证一次、只查询一次环境变量列表。
+    """
+
+    DB_PATHS = [
+        "/ql/data/db/database.sqlite",
+        "/ql/db/database.sqlite",
+        "/ql/data/database.sqlite"
+    ]
+    CONFIG_PATHS = [
+        "/ql/config/auth.json",
+        "/ql/data/config/auth.json",
+        "/ql/config/config.json"
+    ]
+    API_BASE = "http://localhost:5700"
+
+    def __init__(self):
+        self.pending = {}  # 变量名 -> [(旧值, 新值), ...]
+        self.lock = threading.Lock()
+        self.durable = False  # 新值是否已持久写回，下次运行一定会读到新值
+
+    def queue(self, var_name, new_value, old_value=None):
+        """登记待回写的新值"""
+        with self.lock:
+            self.pending.setdefault(var_name, []).append((old_value, new_value))
+        logger.info(f"已登记环境变量 {var_name} 的新值，将在运行结束时统一回写")
+
+    def merge(self, var_name, current_value):
+        """将登记的新值合并到变量当前值中"""
+        value = current_value or ""
+        entries = self.pending[var_name]
+        for old_value, new_value in entries:
+            if old_value and old_value in value:
+                value = value.replace(old_value, new_value)
+            elif len(entries) == 1 and ("&" not in value and "\n" not in value):
+                # 单账号配置直接替换整个值
+                value = new_value
+            else:
+                logger.warning(f"{var_name} 当前值中未找到旧Token，跳过该账号的回写")
+        return value
+
+    def commit(self):
+        """统一写回所有登记的新值，返回是否全部成功"""
+        if not self.pending:
+            return True
+
+        logger.info(f"开始回写 {len(self.pending)} 个环境变量...")
+        try:
+            # 检查是否在青龙面板环境
+            if os.path.exists('/ql'):
+                logger.info("检测到青龙面板环境，尝试多种更新方式...")
+
+                # 方法1: 数据库直接更新（最可靠）
+                if self._commit_database():
+                    self.durable = True
+                    return True
+
+                # 方法2: API更新
+                if self._commit_api():
+                    self.durable = True
+                    return True
+
+                # 方法3: ql命令更新
+                if all(
+                    update_qinglong_env_cmd(var_name, self.merge(var_name, os.getenv(var_name, "")))
+                    for var_name in self.pending
+                ):
+                    self.durable = True
+                    return True
+
+                logger.error("所有青龙面板更新方式都失败了")
+                return False
+
+            # 检查是否在Docker环境（只写入临时文件，不算持久写回）
+            elif os.path.exists('/.dockerenv'):
+                return all(
+                    update_docker_env(var_name, self.merge(var_name, os.getenv(var_name, "")))
+                    for var_name in self.pending
+                )
+
+            # 其他环境（本地运行等）
+            else:
+                # GitHub Actions 中输出 NEW_* 变量，由后续步骤的 update_secrets.py 统一写回仓库 Secrets，
+                # 本次运行内无法确认写回结果
+                if os.getenv("GITHUB_ENV"):
+                    return self._export_github_env()
+                self.durable = all(
+                    update_local_env(var_name, self.merge(var_name, os.getenv(var_name, "")))
+                    for var_name in self.pending
+                )
+                return self.durable
+
+        except Exception as e:
+            logger.error(f"自动更新环境变量失败: {e}")
+            return False
+
+    def _export_github_env(self):
+        """将合并后的新值以 NEW_变量名 写入 $GITHUB_ENV，供后续步骤使用"""
+        try:
+            values = {var_name: self.merge(var_name, os.getenv(var_name, "")) for var_name in self.pending}
+            # 写入 GITHUB_ENV 前先登记打码，避免新值出现在后续步骤的日志中；
+            # 直接写原始 stdout，经 run_checkin.py 加上站点前缀后 Actions 将无法识别该命令
+            for value in values.values():
+                for secret in re.split(r"[&\n]", value):
+                    if secret.strip():
+                        sys.__stdout__.write(f"::add-mask::{secret.strip()}\n")
+            sys.__stdout__.flush()
+
+            with open(os.environ["GITHUB_ENV"], "a", encoding="utf-8") as f:
+                for var_name, value in values.items():
+                    delimiter = f"EOF_{hashlib.md5(os.urandom(8)).hexdigest()}"
+                    f.write(f"NEW_{var_name}<<{delimiter}\n{value}\n{delimiter}\n")
+            logger.info(f"已输出 {', '.join('NEW_' + name for name in self.pending)} 供更新 GitHub Secrets")
+            return True
+        except Exception as e:
+            logger.warning(f"写入 GITHUB_ENV 失败: {e}")
+            return False
+
+    def _commit_database(self):
+        """通过数据库直接更新，所有变量在同一事务中提交"""
+        try:
+            logger.info("尝试通过数据库更新青龙面板环境变量...")
+
+            db_path = next((path for path in self.DB_PATHS if os.path.exists(path)), None)
+            if not db_path:
+                logger.error("未找到青龙面板数据库文件")
+                return False
+            logger.info(f"找到数据库文件: {db_path}")
+
+            conn = sqlite3.connect(db_path)
+            try:
+                cursor = conn.cursor()
+
+                # 表结构只查询一次（兼容不同版本的字段）
+                cursor.execute("PRAGMA table_info(envs)")
+                columns = [column[1] for column in cursor.fetchall()]
+                current_time = now_beijing().strftime('%Y-%m-%d %H:%M:%S')
+
+                with conn:
+                    for var_name in self.pending:
+                        cursor.execute("SELECT value FROM envs WHERE name = ?", (var_name,))
+                        existing_env = cursor.fetchone()
+                        new_value = self.merge(var_name, existing_env[0] if existing_env else os.getenv(var_name, ""))
+
+                        if existing_env:
+                            logger.info(f"更新现有环境变量: {var_name}")
+                            if 'updated_at' in columns:
+                                cursor.execute("UPDATE envs SET value = ?, updated_at = ? WHERE name = ?",
+                                             (new_value, current_time, var_name))
+                            else:
+                                cursor.execute("UPDATE envs SET value = ? WHERE name = ?",
+                                             (new_value, var_name))
+                        else:
+                            logger.info(f"创建新环境变量: {var_name}")
+                            if 'updated_at' in columns and 'created_at' in columns:
+                                cursor.execute("""
+                                    INSERT INTO envs (name, value, created_at, updated_at, status)
+                                    VALUES (?, ?, ?, ?, ?)
+                                """, (var_name, new_value, current_time, current_time, 1))
+                            else:
+                                # 简化版本，只插入必要字段
+                                cursor.execute("INSERT INTO envs (name, value) VALUES (?, ?)",
+                                             (var_name, new_value))
+            finally:
+                conn.close()
+
+            logger.info(f"成功通过数据库更新环境变量: {', '.join(self.pending)}")
+            return True
+
+        except Exception as e:
+            logger.error(f"数据库更新失败: {e}")
+            return False
+
+    def _load_api_token(self):
+        """读取青龙面板配置文件中的 API token"""
+        for config_path in self.CONFIG_PATHS:
+            if os.path.exists(config_path):
+                try:
+                    with open(config_path, 'r', encoding='utf-8') as f:
+                        config_data = json.load(f)
+                    logger.info(f"找到配置文件: {config_path}")
+                    return config_data.get('token') or config_data.get('auth', {}).get('token')
+                except Exception:
+                    continue
+        return None
+
+    def _commit_api(self):
+        """通过青龙面板API更新，只认证一次、只查询一次环境变量列表"""
+        try:
+            logger.info("尝试通过青龙面板API更新环境变量...")
+
+            token = self._load_api_token()
+            if not token:
+                logger.error("未找到青龙面板配置文件或token")
+                return False
+
+            session = requests.Session()
+            session.headers.update({
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json"
+            })
+
+            # 查询现有环境变量
+            logger.info("查询现有环境变量...")
+            response = session.get(f"{self.API_BASE}/api/envs", timeout=10)
+
+            logger.debug(f"API 请求：GET {self.API_BASE}/api/envs {response.status_code}")
+            logger.debug(f"响应：{response.text[:300]}")
+
+            if response.status_code != 200:
+                logger.error(f"查询环境变量失败: {response.status_code}")
+                return False
+
+            envs_data = response.json()
+            if not envs_data.get("code") == 200:
+                logger.error(f"API返回错误: {envs_data}")
+                return False
+
+            envs = {env.get("name"): env for env in envs_data.get("data", [])}
+            all_success = True
+            for var_name in self.pending:
+                existing_env = envs.get(var_name)
+                new_value = self.merge(var_name, existing_env.get("value") if existing_env else os.getenv(var_name, ""))
+
+                if existing_env:
+                    logger.info(f"更新现有环境变量: {var_name}")
+                    update_data = {
+                        "name": var_name,
+                        "value": new_value,
+                        "id": existing_env.get("id") or existing_env.get("_id")
+                    }
+                    response = session.put(f"{self.API_BASE}/api/envs", json=update_data, timeout=10)
+                else:
+                    logger.info(f"创建新环境变量: {var_name}")
+                    response = session.post(f"{self.API_BASE}/api/envs", json=[{"name": var_name, "value": new_value}], timeout=10)
+
+                logger.debug(f"API 请求：{response.request.method} {self.API_BASE}/api/envs {response.status_code}")
+                logger.debug(f"响应：{response.text[:300]}")
+
+                if response.status_code == 200 and response.json().get("code") == 200:
+                    logger.info(f"成功通过API更新环境变量 {var_name}")
+                else:
+                    logger.error(f"API操作失败: {response.status_code} {response.text[:200]}")
+                    all_success = False
+
+            return all_success
+
+        except Exception as e:
+            logger.error(f"API更新失败: {e}")
+            return False
+
+
+env_writer = EnvWriteBack()
+
+
+class TokenCache:
+    """访问令牌本地缓存：按环境变量中的 refresh_token 保存 access_token、过期时间及最新 refresh_token，使用 refresh_token 派生的密钥加密"""
+
+    def __init__(self, path=TOKEN_CACHE_FILE):
+        self.path = path
+        self.enabled = token_cache_enabled and HAS_NACL
+
+    @staticmethod
+    def _account_key(refresh_token):
+        return hashlib.sha256(f"aliyunpan|{refresh_token}".encode("utf-8")).hexdigest()[:32]
+
+    @staticmethod
+    def _box(refresh_token):
+        key = hashlib.sha256(f"aliyunpan|token|{refresh_token}".encode("utf-8")).digest()
+        return secret.SecretBox(key)
+
+    def _read_all(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    def _write_all(self, data):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def load(self, refresh_token):
+        """读取并解密令牌，不存在或无法解密时返回 None"""
+        if not self.enabled:
+            return None
+        entry = self._read_all().get(self._account_key(refresh_token))
+        token = entry.get("token") if isinstance(entry, dict) else entry
+        if not token:
+            return None
+        try:
+            plain = self._box(refresh_token).decrypt(base64.b64decode(token))
+            return json.loads(plain.decode("utf-8"))
+        except Exception as e:
+            logger.debug(f"Token缓存解密失败: {e}")
+            return None
+
+    def save(self, refresh_token, tokens, old_refresh_token=None):
+        """加密保存令牌，refresh_token 已持久写回环境变量时移除旧记录"""
+        if not self.enabled:
+            return
+        try:
+            encrypted = self._box(refresh_token).encrypt(json.dumps(tokens).encode("utf-8"))
+            now = int(time.time())
+            data = {
+                key: entry for key, entry in self._read_all().items()
+                if not isinstance(entry, dict) or entry.get("saved_at", 0) > now - TOKEN_CACHE_RETENTION
+            }
+            data[self._account_key(refresh_token)] = {
+                "token": base64.b64encode(encrypted).decode("utf-8"),
+                "saved_at": now,
+            }
+            if old_refresh_token and old_refresh_token != refresh_token:
+                data.pop(self._account_key(old_refresh_token), None)
+            self._write_all(data)
+        except Exception as e:
+            logger.warning(f"Token缓存保存失败: {e}")
+
+    def rekey(self, old_refresh_token, new_refresh_token, keep_old=False):
+        """
+        将缓存记录复制到新 refresh_token 名下；新值已持久写回时移除旧记录，
+        否则（写回失败、仅输出 NEW_* 或只改了进程环境变量）新旧值都保留，下次运行无论读到哪个值都能命中
+        """
+        tokens = self.load(old_refresh_token)
+        if tokens:
+            self.save(new_refresh_token, tokens, None if keep_old else old_refresh_token)
+
+    def remove(self, refresh_token):
+        """删除失效的令牌"""
+        if not self.enabled:
+            return
+        try:
+            data = self._read_all()
+            if data.pop(self._account_key(refresh_token), None) is not None:
+                self._write_all(data)
+        except Exception as e:
+            logger.debug(f"Token缓存删除失败: {e}")
+
+
+token_cache = TokenCache()
+
+
 class AliYun:
     name = "阿里云盘"
 
@@ -440,22 +618,41 @@ class AliYun:
         self.refresh_token = refresh_token
         self.index = index
         self.new_refresh_token = None
+        self.user_id = None
+        self.signed_at = None
+        self.session = create_session()
 
     def update_token(self):
-        """更新访问令牌"""
+        """更新访问令牌（缓存的访问令牌仍有效时直接复用）"""
+        env_refresh_token = self.refresh_token
+        cached = token_cache.load(env_refresh_token)
+        if cached:
+            self.user_id = cached.get("user_id")
+            remaining = cached.get("expires_at", 0) - time.time()
+            if cached.get("access_token") and remaining > TOKEN_EXPIRY_MARGIN:
+                logger.info(f"使用缓存的访问令牌（剩余 {int(remaining // 60)} 分钟），跳过刷新")
+                return cached["access_token"], None
+
+        # 上次刷新得到的 refresh_token 未能写回环境变量时，使用缓存中的最新值刷新
+        refresh_token = (cached or {}).get("refresh_token") or self.refresh_token
+
         try:
             logger.info("开始更新访问令牌...")
-            logger.debug(f"Token预览: {self.refresh_token[:20]}...{self.refresh_token[-10:]}")
+            logger.debug(f"Token预览: {refresh_token[:20]}...{refresh_token[-10:]}")
 
             url = "https://auth.aliyundrive.com/v2/account/token"
-            data = {"grant_type": "refresh_token", "refresh_token": self.refresh_token}
+            data = {"grant_type": "refresh_token", "refresh_token": refresh_token}
 
-            response = requests.post(url=url, json=data, timeout=15)
+            response = self.session.post(url=url, json=data, timeout=15)
 
             logger.debug(f"API 请求：POST {url} {response.status_code}")
             logger.debug(f"响应：{response.text[:300]}")
 
             if response.status_code != 200:
+                # 只有 refresh_token 被明确拒绝时才删除缓存；5xx/429 等临时错误保留缓存中轮换后的 token，下次运行继续使用
+                if response.status_code == 401 or (response.status_code == 400 and (
+                        'InvalidParameter.RefreshToken' in response.text or 'refresh_token' in response.text.lower())):
+                    token_cache.remove(env_refresh_token)
                 try:
                     error_detail = response.json()
                     error_msg = error_detail.get('message', '未知错误')
@@ -492,28 +689,31 @@ class AliYun:
 
             if access_token:
                 logger.info("访问令牌更新成功")
+                self.user_id = result.get("user_id") or self.user_id
 
                 # 检查是否有新的refresh_token
                 if new_refresh_token and new_refresh_token != self.refresh_token:
                     logger.info(f"检测到新的refresh_token: {new_refresh_token[:20]}...{new_refresh_token[-10:]}")
                     self.new_refresh_token = new_refresh_token
 
-                    # 尝试自动更新环境变量
+                    # 登记新值，所有账号处理完后统一写回环境变量
                     if auto_update_token:
-                        logger.info("正在尝试自动更新环境变量...")
-                        success = update_environment_variable("ALIYUN_REFRESH_TOKEN", new_refresh_token, self.refresh_token)
-
-                        if success:
-                            logger.info("环境变量自动更新成功")
-                            # 更新当前实例的token
-                            self.refresh_token = new_refresh_token
-                        else:
-                            logger.warning("环境变量自动更新失败，请手动更新")
-                            logger.info(f"请手动设置: ALIYUN_REFRESH_TOKEN={new_refresh_token}")
+                        env_writer.queue("ALIYUN_REFRESH_TOKEN", new_refresh_token, self.refresh_token)
                     else:
                         logger.info("建议手动更新环境变量中的refresh_token为新值")
                         logger.info(f"新值: {new_refresh_token}")
 
+                # 缓存令牌，先按当前环境变量中的 refresh_token 保存，写回成功后再迁移到新值
+                token_cache.save(
+                    env_refresh_token,
+                    {
+                        "access_token": access_token,
+                        "expires_at": time.time() + int(result.get("expires_in", 7200)),
+                        "refresh_token": new_refresh_token or refresh_token,
+                        "user_id": self.user_id,
+                    },
+                )
+
                 return access_token, None
             else:
                 logger.error("响应中缺少access_token")
@@ -539,7 +739,7 @@ class AliYun:
                 "Content-Type": "application/json"
             }
 
-            response = requests.post(url=url, headers=headers, json={}, timeout=15)
+            response = self.session.post(url=url, headers=headers, json={}, timeout=15)
 
             logger.debug(f"API 请求：POST {url} {response.status_code}")
             logger.debug(f"响应：{response.text[:300]}")
@@ -573,7 +773,7 @@ class AliYun:
                 "Content-Type": "application/json"
             }
 
-            response = requests.post(url=url, headers=headers, json={}, timeout=15)
+            response = self.session.post(url=url, headers=headers, json={}, timeout=15)
 
             logger.debug(f"API 请求：POST {url} {response.status_code}")
             logger.debug(f"响应：{response.text[:300]}")
@@ -610,7 +810,7 @@ class AliYun:
                 "Content-Type": "application/json"
             }
 
-            response = requests.post(url=url, headers=headers, json={}, timeout=15)
+            response = self.session.post(url=url, headers=headers, json={}, timeout=15)
 
             logger.debug(f"API 请求：POST {url} {response.status_code}")
             logger.debug(f"响应：{response.text[:300]}")
@@ -622,7 +822,7 @@ class AliYun:
                 except:
                     error_msg = f"签到请求失败，HTTP状态码: {response.status_code}"
                 logger.error(f"签到失败: {error_msg}")
-                return error_msg, False
+                return error_msg, False, ""
 
             result = response.json()
 
@@ -630,7 +830,7 @@ class AliYun:
             if not result.get("success", False):
                 error_msg = result.get("message", "签到失败")
                 logger.error(f"签到失败: {error_msg}")
-                return error_msg, False
+                return error_msg, False, ""
 
             sign_days = result.get("result", {}).get("signInCount", 0)
             logger.info(f"累计签到: {sign_days}天")
@@ -724,14 +924,20 @@ class AliYun:
             logger.error(f"Token更新失败: {error_msg}")
             return full_error_msg, False
 
-        # 2. 执行签到
-        sign_msg, is_success, reward_info = self.sign(access_token)
-
-        # 3. 获取用户信息（签到后获取）
-        user_name, display_phone = self.get_user_info(access_token)
-
-        # 4. 获取存储信息（签到后获取）
-        used_gb, total_gb = self.get_storage_info(access_token)
+        # 今日已签到成功的账号直接跳过（按用户 ID 识别，refresh_token 轮换后仍有效）
+        self.signed_at = ledger.succeeded(self.user_id)
+        if self.signed_at:
+            logger.info(f"⏭️ 账号{self.index} 今日 {self.signed_at} 已签到成功，跳过（FORCE_CHECKIN=true 可强制签到）")
+            return f"今日 {self.signed_at} 已签到成功", True
+
+        # 2. 并发执行签到、获取用户信息和存储信息（三者互不依赖）
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            sign_future = executor.submit(self.sign, access_token)
+            user_future = executor.submit(self.get_user_info, access_token)
+            storage_future = executor.submit(self.get_storage_info, access_token)
+            sign_msg, is_success, reward_info = sign_future.result()
+            user_name, display_phone = user_future.result()
+            used_gb, total_gb = storage_future.result()
 
         # 5. 组合结果消息（统一模板格式）
         final_msg = f"""🌐 域名：aliyundrive.com
@@ -751,7 +957,7 @@ class AliYun:
         # Token更新状态
         if self.new_refresh_token:
             if auto_update_token:
-                final_msg += f"\n🔄 Token：已自动更新"
+                final_msg += f"\n🔄 Token：检测到新token，运行结束时自动回写"
             else:
                 final_msg += f"\n🔄 Token：检测到新token，请手动更新"
 
@@ -764,6 +970,26 @@ class AliYun:
         logger.info(f"{'签到完成' if is_success else '签到失败'}")
         return final_msg, is_success
 
+# ---------------- 每日签到记录（.github/workflows/checkin_ledger.py） ----------------
+try:
+    from checkin_ledger import CheckinLedger
+except ImportError:
+    class CheckinLedger:
+        """未找到 checkin_ledger 模块时不记录、不跳过"""
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def succeeded(self, account):
+            return None
+
+        def record(self, account):
+            pass
+
+
+ledger = CheckinLedger("aliyunpan", CACHE_DIR)
+
+
 def main():
     """主程序入口"""
     logger.info(f"==== 阿里云盘签到开始 - {now_beijing().strftime('%Y-%m-%d %H:%M:%S')} ====")
@@ -791,27 +1017,24 @@ def main():
 
     success_count = 0
     total_count = len(tokens)
+    delay_range = parse_delay_range(account_delay)
 
-    for index, token in enumerate(tokens):
+    def run_account(index, token):
+        """处理单个账号，返回 (是否成功, 用户 ID)"""
         try:
-            # 账号间随机等待
-            if index > 0:
-                delay = random.uniform(10, 20)
-                logger.info(f"随机等待 {delay:.1f} 秒后处理下一个账号...")
-                time.sleep(delay)
-
-            # 执行签到
             aliyun = AliYun(token, index + 1)
-            result_msg, is_success = aliyun.main()
-
-            if is_success:
-                success_count += 1
+            with aliyun.session:
+                result_msg, is_success = aliyun.main()
+            if aliyun.signed_at:
+                # 今日已签到成功，不重复通知
+                return True, aliyun.user_id
 
             # 发送单个账号通知（统一标题格式）
             status = "成功" if is_success else "失败"
             title = f"[阿里云盘]签到{status}"
 
             safe_send_notify(title, result_msg)
+            return is_success, aliyun.user_id
 
         except Exception as e:
             error_msg = f"账号{index + 1}: 执行异常 - {str(e)}"
@@ -819,6 +1042,43 @@ def main():
 
             title = f"[阿里云盘]账号{index + 1}签到失败"
             safe_send_notify(title, error_msg)
+            return False, None
+
+    # 账号按间隔依次启动，等待间隔与上一个账号的执行重叠
+    futures = []
+    with ThreadPoolExecutor(max_workers=account_concurrency) as executor:
+        for index, token in enumerate(tokens):
+            # 今日已签到成功的账号直接跳过（用户 ID 取自令牌缓存，缓存未命中时在刷新令牌后再判断）
+            signed_at = ledger.succeeded((token_cache.load(token) or {}).get("user_id"))
+            if signed_at:
+                logger.info(f"⏭️ 账号{index + 1} 今日 {signed_at} 已签到成功，跳过（FORCE_CHECKIN=true 可强制签到）")
+                success_count += 1
+                continue
+
+            # 账号间随机等待
+            if futures:
+                delay = random.uniform(*delay_range)
+                logger.info(f"随机等待 {delay:.1f} 秒后启动下一个账号...")
+                time.sleep(delay)
+
+            futures.append((token, executor.submit(run_account, index, token)))
+
+        for token, future in futures:
+            is_success, user_id = future.result()
+            if is_success:
+                success_count += 1
+                ledger.record(user_id)
+
+    # 统一写回轮换后的 refresh_token（多账号合并为一次写入）
+    if env_writer.pending:
+        if env_writer.commit():
+            logger.info("环境变量自动更新成功")
+        else:
+            logger.warning("环境变量自动更新失败，请手动更新")
+            logger.info(f"请手动设置: ALIYUN_REFRESH_TOKEN={env_writer.merge('ALIYUN_REFRESH_TOKEN', aliyun_tokens)}")
+        # 只有确认新值已持久写回时才丢弃旧值下的缓存
+        for old_token, new_token in env_writer.pending["ALIYUN_REFRESH_TOKEN"]:
+            token_cache.rekey(old_token, new_token, keep_old=not env_writer.durable)
 
     # 发送汇总通知（统一格式）
     if total_count > 1:
@@ -10,8 +10,12 @@ import io
 if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
+import hashlib
+import json
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from curl_cffi import requests
@@ -20,11 +24,13 @@ from curl_cffi import requests
 class Logger:
     def __init__(self):
         self.debug_mode = os.getenv("DEBUG_MODE", "false").lower() == "true"
+        self.lock = threading.Lock()  # 多账号并发时保证每条日志整行输出
 
     def log(self, level, message):
         timestamp = datetime.now().strftime("%H:%M:%S")
         formatted_msg = f"{timestamp} {level} {message}"
-        print(formatted_msg)
+        with self.lock:
+            print(formatted_msg)
 
     def info(self, message):
         self.log("INFO", message)
@@ -62,8 +68,17 @@ def safe_send_notify(title, content):
     else:
         logger.info(f"通知: {title}")
 
+# ---------------- 请求会话 ----------------
+REQUEST_TIMEOUT = 20  # 单次请求超时（秒）
+ACCOUNT_CONCURRENCY = max(1, int(os.getenv("DF_CONCURRENCY", "1")))  # 同时处理的账号数
+
+
+def create_session():
+    """创建账号会话：同一账号的签到与统计请求复用 TLS 连接，保持 chrome110 指纹"""
+    return requests.Session(impersonate="chrome110", timeout=REQUEST_TIMEOUT)
+
 # ---------------- 签到逻辑 ----------------
-def sign(DEEPFLOOD_COOKIE, df_random):
+def sign(DEEPFLOOD_COOKIE, df_random, session=None):
     """执行签到"""
     if not DEEPFLOOD_COOKIE:
         return "invalid", "无有效Cookie"
@@ -78,9 +93,14 @@ def sign(DEEPFLOOD_COOKIE, df_random):
         'Cookie': DEEPFLOOD_COOKIE
     }
 
+    # 未传入会话时临时创建，用完即关闭
+    owns_session = session is None
+    if owns_session:
+        session = create_session()
+
     try:
         url = f"https://www.deepflood.com/api/attendance?random={df_random}"
-        response = requests.post(url, headers=headers, impersonate="chrome110")
+        response = session.post(url, headers=headers)
 
         logger.debug(f"API 请求：POST {url} {response.status_code}")
         logger.debug(f"响应：{response.text[:300]}")
@@ -103,10 +123,54 @@ def sign(DEEPFLOOD_COOKIE, df_random):
     except Exception as e:
         logger.error(f"签到失败，原因：请求异常 - {str(e)}")
         return "error", str(e)
+    finally:
+        if owns_session:
+            session.close()
 
 # ---------------- 查询签到收益统计函数 ----------------
-def get_signin_stats(DEEPFLOOD_COOKIE, days=30):
-    """查询前days天内的签到收益统计"""
+# ---------------- 鸡腿收支记录 ----------------
+CACHE_DIR = os.getenv("CHECKIN_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+CREDIT_LEDGER_DAYS = 35  # 本地保留的收支记录天数（不小于统计天数）
+CREDIT_MAX_PAGES = 10  # 单次最多查询的页数
+
+
+class CreditLedger:
+    """鸡腿收支记录：按账号保存已查询过的收支记录，每次只需查询新增记录"""
+
+    def __init__(self, cookie):
+        # 与每日签到记录一样以 cookie 中的 session 标识账号，cookie 更新后记录仍然有效
+        digest = hashlib.sha256(f"deepflood|{account_id(cookie, 'session')}".encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(CACHE_DIR, f"deepflood_credit_{digest}.json")
+
+    @staticmethod
+    def record_key(record):
+        """收支记录标识：时间戳 + 变动后余额"""
+        return f"{record[3]}|{record[1]}"
+
+    def load(self):
+        """读取已保存的记录列表（按时间倒序），每条为 {key, amount, description, time}"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data.get("records", [])
+        except (OSError, ValueError):
+            return []
+
+    def save(self, records):
+        cutoff = time.time() - CREDIT_LEDGER_DAYS * 86400
+        records = [record for record in records if record["time"] >= cutoff]
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"records": records}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"收支记录保存失败: {e}")
+
+
+def get_signin_stats(DEEPFLOOD_COOKIE, days=30, session=None):
+    """查询前days天内的签到收益统计（增量查询：遇到已记录的收支记录即停止，统计基于本地记录）"""
     if not DEEPFLOOD_COOKIE:
         return None, "无有效Cookie"
 
@@ -122,67 +186,85 @@ def get_signin_stats(DEEPFLOOD_COOKIE, days=30):
         'Cookie': DEEPFLOOD_COOKIE
     }
 
+    owns_session = session is None
+    if owns_session:
+        session = create_session()
+
     try:
         # 使用UTC+8时区（上海时区）
         shanghai_tz = ZoneInfo("Asia/Shanghai")
         now_shanghai = datetime.now(shanghai_tz)
 
         # 计算查询开始时间：当前时间减去指定天数
-        query_start_time = now_shanghai - timedelta(days=days)
+        query_start = (now_shanghai - timedelta(days=days)).timestamp()
+
+        credit_ledger = CreditLedger(DEEPFLOOD_COOKIE)
+        known_records = credit_ledger.load()
+        known_keys = {record["key"] for record in known_records}
 
-        # 获取多页数据以确保覆盖指定天数内的所有数据
-        all_records = []
+        # 从最新一页开始查询，遇到已记录或超出保留范围的记录即停止
+        new_records = []
+        complete = False
         page = 1
 
-        while page <= 10:  # 最多查询10页
+        while page <= CREDIT_MAX_PAGES:
             url = f"https://www.deepflood.com/api/account/credit/page-{page}"
-            response = requests.get(url, headers=headers, impersonate="chrome110")
+            response = session.get(url, headers=headers)
 
             logger.debug(f"API 请求：GET {url} {response.status_code}")
             logger.debug(f"响应：{response.text[:300]}")
 
             data = response.json()
 
-            if not data.get("success") or not data.get("data"):
+            if not data.get("success"):
                 break
 
-            records = data.get("data", [])
+            records = data.get("data") or []
             if not records:
+                complete = True
                 break
 
-            # 检查最后一条记录的时间，如果超出查询范围就停止
-            last_record_time = datetime.fromisoformat(
-                records[-1][3].replace('Z', '+00:00'))
-            last_record_time_shanghai = last_record_time.astimezone(shanghai_tz)
-            if last_record_time_shanghai < query_start_time:
-                # 只添加在查询范围内的记录
-                for record in records:
-                    record_time = datetime.fromisoformat(
-                        record[3].replace('Z', '+00:00'))
-                    record_time_shanghai = record_time.astimezone(shanghai_tz)
-                    if record_time_shanghai >= query_start_time:
-                        all_records.append(record)
+            for amount, balance, description, timestamp in records:
+                key = CreditLedger.record_key((amount, balance, description, timestamp))
+                if key in known_keys:
+                    complete = True
+                    break
+                record_time = datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp()
+                if record_time < query_start:
+                    complete = True
+                    break
+                new_records.append({
+                    'key': key,
+                    'amount': amount,
+                    'description': description,
+                    'time': record_time
+                })
+
+            if complete:
                 break
-            else:
-                all_records.extend(records)
 
             page += 1
             time.sleep(0.5)
+        else:
+            # 达到页数上限仍未遇到已记录或超出范围的记录，未查询的部分会成为缺口
+            logger.warning(f"收支记录超过{CREDIT_MAX_PAGES}页仍未衔接到已记录的条目")
+
+        all_records = new_records + known_records
+        if complete:
+            credit_ledger.save(all_records)
+        else:
+            # 查询中断时不保存，避免记录出现缺口
+            logger.warning("收支记录查询未完成，本次结果不保存")
 
         # 筛选指定天数内的签到收益记录
         signin_records = []
         for record in all_records:
-            amount, balance, description, timestamp = record
-            record_time = datetime.fromisoformat(
-                timestamp.replace('Z', '+00:00'))
-            record_time_shanghai = record_time.astimezone(shanghai_tz)
-
-            # 只统计指定天数内的签到收益
-            if (record_time_shanghai >= query_start_time and
+            description = record['description']
+            if (record['time'] >= query_start and
                     "签到收益" in description and "鸡腿" in description):
                 signin_records.append({
-                    'amount': amount,
-                    'date': record_time_shanghai.strftime('%Y-%m-%d'),
+                    'amount': record['amount'],
+                    'date': datetime.fromtimestamp(record['time'], shanghai_tz).strftime('%Y-%m-%d'),
                     'description': description
                 })
 
@@ -220,6 +302,9 @@ def get_signin_stats(DEEPFLOOD_COOKIE, days=30):
     except Exception as e:
         logger.error(f"查询失败，原因：{str(e)}")
         return None, f"查询异常: {str(e)}"
+    finally:
+        if owns_session:
+            session.close()
 
 # ---------------- 显示签到统计信息 ----------------
 def print_signin_stats(stats, account_name):
@@ -232,8 +317,31 @@ def print_signin_stats(stats, account_name):
     logger.info(f"  总获得鸡腿: {stats['total_amount']} 个")
     logger.info(f"  平均每日鸡腿: {stats['average']} 个")
 
+# ---------------- 每日签到记录（.github/workflows/checkin_ledger.py） ----------------
+try:
+    from checkin_ledger import CheckinLedger, account_id
+except ImportError:
+    class CheckinLedger:
+        """未找到 checkin_ledger 模块时不记录、不跳过"""
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def succeeded(self, account):
+            return None
+
+        def record(self, account):
+            pass
+
+    def account_id(credential, *fields):
+        return credential.strip()
+
+
+ledger = CheckinLedger("deepflood", CACHE_DIR)
+
 # ---------------- 主流程 ----------------
-if __name__ == "__main__":
+def main():
+    """主程序入口"""
     df_random = os.getenv("DF_RANDOM", "true")
 
     # 读取Cookie
@@ -245,43 +353,68 @@ if __name__ == "__main__":
 
     if len(cookie_list) == 0:
         logger.error("未找到任何Cookie，请设置DEEPFLOOD_COOKIE环境变量")
-        exit(1)
+        return
 
     logger.info("==== 开始执行签到任务 ====")
 
-    # 执行签到
-    for i, cookie in enumerate(cookie_list):
-        account_index = i + 1
-        display_user = f"账号{account_index}"
+    def run_account(display_user, cookie):
+        """处理单个账号，同一账号的签到与统计复用一个会话，返回是否签到成功"""
+        with create_session() as session:
+            logger.info(f"\n==== {display_user} 开始签到 ====")
 
-        logger.info(f"\n==== {display_user} 开始签到 ====")
+            result, msg = sign(cookie, df_random, session)
 
-        result, msg = sign(cookie, df_random)
+            if result in ["success", "already"]:
+                # 查询签到收益统计
+                stats, stats_msg = get_signin_stats(cookie, 30, session)
+                if stats:
+                    print_signin_stats(stats, display_user)
 
-        if result in ["success", "already"]:
-            # 查询签到收益统计
-            stats, stats_msg = get_signin_stats(cookie, 30)
-            if stats:
-                print_signin_stats(stats, display_user)
-
-            # 发送通知（统一格式）
-            notification_msg = f"""🌐 域名：www.deepflood.com
+                # 发送通知（统一格式）
+                notification_msg = f"""🌐 域名：www.deepflood.com
 
 👤 {display_user}：
 📝 签到：{msg}"""
-            if stats:
-                notification_msg += f"\n📊 统计：{stats['period']}已签到{stats['days_count']}天，共获得{stats['total_amount']}个鸡腿，平均{stats['average']}个/天"
-            notification_msg += f"\n⏰ 时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+                if stats:
+                    notification_msg += f"\n📊 统计：{stats['period']}已签到{stats['days_count']}天，共获得{stats['total_amount']}个鸡腿，平均{stats['average']}个/天"
+                notification_msg += f"\n⏰ 时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
 
-            safe_send_notify("[DeepFlood]签到成功", notification_msg)
-        else:
-            # 发送失败通知
-            notification_msg = f"""🌐 域名：www.deepflood.com
+                safe_send_notify("[DeepFlood]签到成功", notification_msg)
+                return True
+            else:
+                # 发送失败通知
+                notification_msg = f"""🌐 域名：www.deepflood.com
 
 👤 {display_user}：
 📝 签到：{msg}
 ⏰ 时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"""
-            safe_send_notify("[DeepFlood]签到失败", notification_msg)
+                safe_send_notify("[DeepFlood]签到失败", notification_msg)
+                return False
+
+    # 执行签到（DF_CONCURRENCY 大于 1 时多账号并发）
+    futures = []
+    with ThreadPoolExecutor(max_workers=ACCOUNT_CONCURRENCY) as executor:
+        for i, cookie in enumerate(cookie_list):
+            account_index = i + 1
+            display_user = f"账号{account_index}"
+
+            # 今日已签到成功的账号直接跳过
+            signed_at = ledger.succeeded(account_id(cookie, "session"))
+            if signed_at:
+                logger.info(f"⏭️ {display_user} 今日 {signed_at} 已签到成功，跳过（FORCE_CHECKIN=true 可强制签到）")
+                continue
+
+            futures.append((display_user, cookie, executor.submit(run_account, display_user, cookie)))
+
+        for display_user, cookie, future in futures:
+            try:
+                if future.result():
+                    ledger.record(account_id(cookie, "session"))
+            except Exception as e:
+                logger.error(f"{display_user} 签到任务异常: {e}")
 
     logger.info("==== 所有账号签到完成 ====")
     logger.info(f"完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+if __name__ == "__main__":
+    main()
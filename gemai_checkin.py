@@ -21,6 +21,7 @@ import random
 import re
 import time
 from datetime import datetime
+from urllib.parse import urlparse
 
 # 时区支持
 try:
@@ -87,9 +88,28 @@ except ImportError:
 except Exception as e:
     logger.error(f"通知模块加载失败: {e}")
 
+# ---------------- WAF cookie 共享缓存（.github/workflows/waf_cache.py） ----------------
+try:
+    from waf_cache import WafCookieCache
+except ImportError:
+    class WafCookieCache:
+        """未找到 waf_cache 模块时不缓存 WAF cookies"""
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def get(self, host):
+            return None
+
+        def update(self, host, cookies):
+            pass
+
+        def invalidate(self, host):
+            pass
+
 if not HAS_EXECJS:
-    logger.warning("未安装 PyExecJS，WAF 挑战可能失败")
-    logger.warning("   安装方法：pip install PyExecJS")
+    logger.info("未安装 PyExecJS，WAF 挑战仅使用内置算法求解")
+    logger.info("   如需兜底方案：pip install PyExecJS")
 
 
 # ---------------- 配置项 ----------------
@@ -98,6 +118,12 @@ DEBUG_MODE = os.getenv("DEBUG_MODE", "false").lower() == "true"
 VERIFY_SSL = os.getenv("GEMAI_VERIFY_SSL", "true").lower() == "true"
 MAX_RETRIES = int(os.getenv("GEMAI_MAX_RETRIES", "3"))
 BASE_URL = os.getenv("GEMAI_BASE_URL") or "https://api.gemai.cc"  # 支持自定义域名
+WAF_HOST = urlparse(BASE_URL).netloc
+
+# WAF cookie 缓存配置（同一主机的 WAF cookie 在多账号、多次运行间共享）
+CACHE_DIR = os.getenv("CHECKIN_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+WAF_CACHE_TTL = int(os.getenv("WAF_CACHE_TTL", "1800"))  # 秒，0 表示禁用缓存
+WAF_COOKIE_NAMES = ["acw_tc", "cdn_sec_tc", "acw_sc__v2"]
 
 
 # ---------------- 统一通知函数 ----------------
@@ -257,8 +283,23 @@ def get_user_info(session):
         return False, None, None, 0, 0
 
 
+waf_cookie_cache = WafCookieCache(CACHE_DIR, WAF_CACHE_TTL, WAF_COOKIE_NAMES)
+
+
+def session_waf_cookies(session):
+    """提取会话中的 WAF cookies"""
+    return {c.name: c.value for c in session.cookies if c.name in WAF_COOKIE_NAMES}
+
+
 def get_basic_waf_cookies(session):
     """获取基础 WAF cookies（通过访问登录页）"""
+    cached = waf_cookie_cache.get(WAF_HOST)
+    if cached:
+        for name, value in cached.items():
+            session.cookies.set(name, value)
+        logger.info("使用缓存的 WAF cookies")
+        return True
+
     try:
         logger.info("访问登录页获取基础 WAF cookies...")
 
@@ -271,6 +312,7 @@ def get_basic_waf_cookies(session):
         # 等待一下让 cookies 生效
         time.sleep(1)
 
+        waf_cookie_cache.update(WAF_HOST, session_waf_cookies(session))
         logger.info("基础 WAF cookies 获取成功")
         return True
 
@@ -279,119 +321,182 @@ def get_basic_waf_cookies(session):
         return False
 
 
-def execute_waf_challenge(session, challenge_html, url):
-    """执行 WAF JavaScript 挑战"""
+# ---------------- WAF 挑战求解 ----------------
+# 阿里云 WAF acw_sc__v2 算法：arg1 按位置表重排后，与固定掩码逐字节异或
+WAF_ARG1_POSITIONS = [
+    0xf, 0x23, 0x1d, 0x18, 0x21, 0x10, 0x1, 0x26, 0xa, 0x9,
+    0x13, 0x1f, 0x28, 0x1b, 0x16, 0x17, 0x19, 0xd, 0x6, 0xb,
+    0x27, 0x12, 0x14, 0x8, 0xe, 0x15, 0x20, 0x1a, 0x2, 0x1e,
+    0x7, 0x4, 0x11, 0x5, 0x3, 0x1c, 0x22, 0x25, 0xc, 0x24,
+]
+WAF_XOR_MASK = bytes.fromhex("3000176000856006061501533003690027800375")
+WAF_ARG1_PATTERN = re.compile(r"arg1\s*=\s*['\"]([0-9A-Fa-f]{40})['\"]")
+
+# arg1 -> acw_sc__v2，同一次运行内所有账号共享
+waf_solution_cache = {}
+# 内置算法算出的 cookie 值 -> 对应的 arg1，用于判断算法是否已被服务端更换
+waf_native_solutions = {}
+waf_native_rejected = False
+
+
+def solve_acw_sc_v2(arg1):
+    """内置算法计算 acw_sc__v2"""
+    if len(arg1) != len(WAF_ARG1_POSITIONS):
+        return None
+    reordered = bytes.fromhex("".join(arg1[pos - 1] for pos in WAF_ARG1_POSITIONS))
+    return bytes(a ^ b for a, b in zip(reordered, WAF_XOR_MASK)).hex()
+
+
+def solve_waf_with_execjs(challenge_html, url):
+    """使用 PyExecJS 执行挑战脚本计算 acw_sc__v2（内置算法失效时的兜底方案）"""
     if not HAS_EXECJS:
         logger.error("未安装 PyExecJS，无法处理 WAF 挑战")
-        return False
+        return None
+
+    # 提取 JavaScript 代码
+    js_match = re.search(r'<script>(.*?)</script>', challenge_html, re.DOTALL)
+    if not js_match:
+        logger.debug('未找到 JavaScript 挑战代码')
+        return None
+
+    js_code = js_match.group(1)
+
+    logger.debug(f'WAF JavaScript 长度: {len(js_code)}')
+
+    # 从 BASE_URL 提取 host 和 pathname
+    from urllib.parse import urlparse
+    parsed_base = urlparse(BASE_URL)
+    base_host = parsed_base.netloc
+    parsed_url = urlparse(url)
+    url_pathname = parsed_url.path
+
+    # 构建完整的浏览器环境模拟，并用 try-catch 包裹 WAF 代码
+    js_env = f"""
+    // 模拟 document 对象
+    var document = {{
+        cookie: '',
+        set cookie(val) {{
+            this._cookie = val;
+        }},
+        get cookie() {{
+            return this._cookie || '';
+        }},
+        getElementById: function() {{ return null; }},
+        getElementsByTagName: function() {{ return []; }},
+        createElement: function() {{ return {{}}; }},
+        body: {{}},
+        head: {{}}
+    }};
+
+    // 模拟 location 对象（包含所有可能的属性和方法）
+    var location = {{
+        href: '{url}',
+        protocol: '{parsed_url.scheme}:',
+        host: '{base_host}',
+        hostname: '{base_host}',
+        port: '',
+        pathname: '{url_pathname}',
+        search: '',
+        hash: '',
+        origin: '{BASE_URL}',
+        reload: function() {{}},
+        replace: function() {{}},
+        assign: function() {{}},
+        toString: function() {{ return this.href; }}
+    }};
+
+    // 模拟 navigator 对象
+    var navigator = {{
+        userAgent: 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+        platform: 'Win32',
+        language: 'zh-CN',
+        languages: ['zh-CN', 'zh', 'en'],
+        onLine: true,
+        cookieEnabled: true
+    }};
+
+    // 模拟 window 对象
+    var window = this;
+    window.location = location;
+    window.document = document;
+    window.navigator = navigator;
+    window.setTimeout = function(fn, delay) {{ if (typeof fn === 'function') try {{ fn(); }} catch(e) {{}} }};
+    window.setInterval = function() {{}};
+    window.clearTimeout = function() {{}};
+    window.clearInterval = function() {{}};
+    window.addEventListener = function() {{}};
+    window.removeEventListener = function() {{}};
+
+    // 用 try-catch 包裹 WAF JavaScript，忽略执行错误
+    try {{
+        {js_code}
+    }} catch(e) {{
+        // 忽略执行错误，只要 cookie 被设置就行
+    }}
+
+    // 返回设置的 cookie
+    document.cookie;
+    """
+
+    # 执行 JavaScript
+    ctx = execjs.compile(js_env)
+    result = ctx.eval('document.cookie')
+
+    logger.debug(f'JavaScript 执行结果: {result[:100] if result else "None"}...')
+
+    if result:
+        cookie_match = re.search(r'acw_sc__v2=([^;]+)', result)
+        if cookie_match:
+            return cookie_match.group(1)
+
+    logger.debug('未能从 JavaScript 结果中提取 acw_sc__v2')
+    return None
+
+
+def execute_waf_challenge(session, challenge_html, url):
+    """解决 WAF JavaScript 挑战：优先使用缓存与内置算法，必要时回退到 PyExecJS"""
+    global waf_native_rejected
 
     try:
         logger.info("检测到 WAF 挑战，尝试解决...")
+        # 服务端重新下发挑战，说明缓存中的 WAF cookies 已失效
+        waf_cookie_cache.invalidate(WAF_HOST)
 
-        # 提取 JavaScript 代码
-        js_match = re.search(r'<script>(.*?)</script>', challenge_html, re.DOTALL)
-        if not js_match:
-            logger.debug('未找到 JavaScript 挑战代码')
+        arg1_match = WAF_ARG1_PATTERN.search(challenge_html)
+        arg1 = arg1_match.group(1) if arg1_match else None
+
+        # 刚提交内置算法结果，服务端又对同一个 arg1 发起挑战，说明算法已变化，本次运行改用 PyExecJS；
+        # arg1 不同只是 cookie 过期后的新挑战，继续用内置算法求解
+        try:
+            current = session.cookies.get('acw_sc__v2')
+        except Exception:
+            current = None
+        if arg1 and current and waf_native_solutions.get(current) == arg1 and not waf_native_rejected:
+            logger.warning('内置 WAF 算法结果被拒绝，改用 PyExecJS 求解')
+            waf_native_rejected = True
+            waf_solution_cache.clear()
+
+        acw_sc_v2 = waf_solution_cache.get(arg1) if arg1 else None
+        if acw_sc_v2:
+            logger.debug('命中 WAF 挑战缓存')
+        elif arg1 and not waf_native_rejected:
+            acw_sc_v2 = solve_acw_sc_v2(arg1)
+            if acw_sc_v2:
+                waf_native_solutions[acw_sc_v2] = arg1
+
+        if not acw_sc_v2:
+            acw_sc_v2 = solve_waf_with_execjs(challenge_html, url)
+
+        if not acw_sc_v2:
             return False
 
-        js_code = js_match.group(1)
-
-        logger.debug(f'WAF JavaScript 长度: {len(js_code)}')
-
-        # 从 BASE_URL 提取 host 和 pathname
-        from urllib.parse import urlparse
-        parsed_base = urlparse(BASE_URL)
-        base_host = parsed_base.netloc
-        parsed_url = urlparse(url)
-        url_pathname = parsed_url.path
-
-        # 构建完整的浏览器环境模拟，并用 try-catch 包裹 WAF 代码
-        js_env = f"""
-        // 模拟 document 对象
-        var document = {{
-            cookie: '',
-            set cookie(val) {{
-                this._cookie = val;
-            }},
-            get cookie() {{
-                return this._cookie || '';
-            }},
-            getElementById: function() {{ return null; }},
-            getElementsByTagName: function() {{ return []; }},
-            createElement: function() {{ return {{}}; }},
-            body: {{}},
-            head: {{}}
-        }};
-
-        // 模拟 location 对象（包含所有可能的属性和方法）
-        var location = {{
-            href: '{url}',
-            protocol: '{parsed_url.scheme}:',
-            host: '{base_host}',
-            hostname: '{base_host}',
-            port: '',
-            pathname: '{url_pathname}',
-            search: '',
-            hash: '',
-            origin: '{BASE_URL}',
-            reload: function() {{}},
-            replace: function() {{}},
-            assign: function() {{}},
-            toString: function() {{ return this.href; }}
-        }};
-
-        // 模拟 navigator 对象
-        var navigator = {{
-            userAgent: 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            platform: 'Win32',
-            language: 'zh-CN',
-            languages: ['zh-CN', 'zh', 'en'],
-            onLine: true,
-            cookieEnabled: true
-        }};
-
-        // 模拟 window 对象
-        var window = this;
-        window.location = location;
-        window.document = document;
-        window.navigator = navigator;
-        window.setTimeout = function(fn, delay) {{ if (typeof fn === 'function') try {{ fn(); }} catch(e) {{}} }};
-        window.setInterval = function() {{}};
-        window.clearTimeout = function() {{}};
-        window.clearInterval = function() {{}};
-        window.addEventListener = function() {{}};
-        window.removeEventListener = function() {{}};
-
-        // 用 try-catch 包裹 WAF JavaScript，忽略执行错误
-        try {{
-            {js_code}
-        }} catch(e) {{
-            // 忽略执行错误，只要 cookie 被设置就行
-        }}
-
-        // 返回设置的 cookie
-        document.cookie;
-        """
-
-        # 执行 JavaScript
-        ctx = execjs.compile(js_env)
-        result = ctx.eval('document.cookie')
-
-        logger.debug(f'JavaScript 执行结果: {result[:100] if result else "None"}...')
-
-        # 解析 cookie
-        if result and 'acw_sc__v2=' in result:
-            # 提取 acw_sc__v2 的值
-            cookie_match = re.search(r'acw_sc__v2=([^;]+)', result)
-            if cookie_match:
-                acw_sc_v2 = cookie_match.group(1)
-                session.cookies.set('acw_sc__v2', acw_sc_v2)
-                logger.info('WAF 挑战已解决')
-                logger.debug(f'设置 acw_sc__v2: {acw_sc_v2[:20]}...')
-                return True
-
-        logger.debug('未能从 JavaScript 结果中提取 acw_sc__v2')
-        return False
+        if arg1:
+            waf_solution_cache[arg1] = acw_sc_v2
+        session.cookies.set('acw_sc__v2', acw_sc_v2)
+        waf_cookie_cache.update(WAF_HOST, session_waf_cookies(session))
+        logger.info('WAF 挑战已解决')
+        logger.debug(f'设置 acw_sc__v2: {acw_sc_v2[:20]}...')
+        return True
 
     except Exception as e:
         logger.error(f'执行 WAF 挑战失败: {str(e)[:100]}')
@@ -567,9 +672,31 @@ def check_in_account(account_info, account_index):
         logger.error(f'{account_name}: 签到过程中出错 - {error_msg}')
         return "error", error_msg, None, 0, None
     finally:
+        # 保存服务端续期后的 WAF cookies 供后续账号使用
+        waf_cookie_cache.update(WAF_HOST, session_waf_cookies(session))
         session.close()
 
 
+# ---------------- 每日签到记录（.github/workflows/checkin_ledger.py） ----------------
+try:
+    from checkin_ledger import CheckinLedger
+except ImportError:
+    class CheckinLedger:
+        """未找到 checkin_ledger 模块时不记录、不跳过"""
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def succeeded(self, account):
+            return None
+
+        def record(self, account):
+            pass
+
+
+ledger = CheckinLedger("gemai", CACHE_DIR)
+
+
 def main():
     """主函数"""
     logger.info("="*50)
@@ -593,14 +720,28 @@ def main():
     fail_count = 0
     error_count = 0
 
+    processed = 0
     for i, account in enumerate(accounts):
         name = f"账号{i + 1}"
 
+        # 今日已签到成功的账号直接跳过
+        signed_at = ledger.succeeded(account.get('api_user', ''))
+        if signed_at:
+            success_count += 1
+            logger.info(f"⏭️ {name} 今日 {signed_at} 已签到成功，跳过（FORCE_CHECKIN=true 可强制签到）")
+            continue
+
+        # 账号间延迟
+        if processed > 0:
+            time.sleep(3)
+        processed += 1
+
         try:
             status, msg, user_info, reward, username = check_in_account(account, i)
 
             if status == "success":
                 success_count += 1
+                ledger.record(account.get('api_user', ''))
                 logger.info(f"{name} 签到成功: {msg}")
                 if user_info:
                     logger.info(f"{user_info}")
@@ -675,10 +816,6 @@ def main():
 
             safe_send_notify("[GemAI]签到异常", notify_content)
 
-        # 账号间延迟
-        if i < len(accounts) - 1:
-            time.sleep(3)
-
     logger.info("="*50)
     logger.info("  所有账号签到完成")
     logger.info(f"  成功: {success_count} | 失败: {fail_count} | 出错: {error_count}")
@@ -315,6 +315,27 @@ class IkuuuSigner:
 
         return final_msg, checkin_success
 
+# ---------------- 每日签到记录（.github/workflows/checkin_ledger.py） ----------------
+CACHE_DIR = os.getenv("CHECKIN_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+try:
+    from checkin_ledger import CheckinLedger
+except ImportError:
+    class CheckinLedger:
+        """未找到 checkin_ledger 模块时不记录、不跳过"""
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def succeeded(self, account):
+            return None
+
+        def record(self, account):
+            pass
+
+
+ledger = CheckinLedger("ikuuu", CACHE_DIR)
+
+
 def main():
     """主程序入口"""
     logger.info(f"==== ikuuu签到开始 - {now_beijing().strftime('%Y-%m-%d %H:%M:%S')} ====")
@@ -345,13 +366,22 @@ def main():
     success_count = 0
     total_count = len(emails)
 
+    processed = 0
     for index, (email, passwd) in enumerate(zip(emails, passwords)):
         try:
+            # 今日已签到成功的账号直接跳过
+            signed_at = ledger.succeeded(email)
+            if signed_at:
+                logger.info(f"⏭️ 账号{index + 1} 今日 {signed_at} 已签到成功，跳过（FORCE_CHECKIN=true 可强制签到）")
+                success_count += 1
+                continue
+
             # 账号间随机等待
-            if index > 0:
+            if processed > 0:
                 delay = random.uniform(5, 15)
                 logger.info(f"随机等待 {delay:.1f} 秒后处理下一个账号...")
                 time.sleep(delay)
+            processed += 1
 
             # 执行签到
             signer = IkuuuSigner(email, passwd, index + 1)
@@ -359,6 +389,7 @@ def main():
 
             if is_success:
                 success_count += 1
+                ledger.record(email)
 
             # 发送单个账号通知（统一标题格式）
             status = "成功" if is_success else "失败"
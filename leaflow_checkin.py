@@ -15,7 +15,8 @@ import re
 import time
 import json
 import random
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 
 try:
     from zoneinfo import ZoneInfo
@@ -72,7 +73,8 @@ LEAFLOW_DOMAIN = (os.getenv("LEAFLOW_DOMAIN") or "https://leaflow.net").rstrip("
 BASE = (os.getenv("LEAFLOW_BASE") or "https://checkin.leaflow.net").rstrip("/")
 TIMEOUT = int(os.getenv("TIMEOUT", "60"))
 RETRY_TIMES = int(os.getenv("RETRY_TIMES", "3"))
-RETRY_DELAY = int(os.getenv("RETRY_DELAY", "5"))
+RETRY_DELAY = int(os.getenv("RETRY_DELAY", "5"))  # 退避基准间隔（秒），第 n 次重试约为 RETRY_DELAY * 2^(n-1)
+RETRY_MAX_DELAY = int(os.getenv("RETRY_MAX_DELAY", "60"))  # 单次重试等待上限（秒），包括服务器下发的 Retry-After
 NOTIFY_ON_ALREADY = os.getenv("NOTIFY_ON_ALREADY", "true").lower() == "true"  # 已签到是否通知
 DEBUG_MODE = os.getenv("DEBUG_MODE", "false").lower() == "true"  # 调试模式
 
@@ -87,6 +89,11 @@ UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like
 def now_sh():
     return datetime.now(tz=SH_TZ) if SH_TZ else datetime.now()
 
+
+# 登录"记住我" cookie，在重新登录前保持不变，用作账号标识
+REMEMBER_COOKIE = 'remember_web_59ba36addc2b2f9401580f014c7f58ea4e30989d'
+
+
 def parse_cookie_array(cookie_str: str) -> list:
     """
     解析 JSON 数组格式的 cookie 配置
@@ -103,7 +110,7 @@ def parse_cookie_array(cookie_str: str) -> list:
             if not isinstance(item, dict):
                 raise ValueError(f"Cookie 数组第 {i+1} 个元素必须是 JSON 对象格式")
             # 检查必需的 cookie 键
-            required_keys = ['leaflow_session', 'remember_web_59ba36addc2b2f9401580f014c7f58ea4e30989d', 'XSRF-TOKEN']
+            required_keys = ['leaflow_session', REMEMBER_COOKIE, 'XSRF-TOKEN']
             missing_keys = [key for key in required_keys if key not in item]
             if missing_keys:
                 raise ValueError(f"Cookie 数组第 {i+1} 个元素缺少必需的键: {', '.join(missing_keys)}")
@@ -147,12 +154,90 @@ def build_session(account_config):
     logger.debug("会话构建完成")
     return s
 
+# ---------------- 页面解析规则（模块加载时预编译） ----------------
+RE_HIDDEN_INPUT = re.compile(r'<input[^>]+type=["\']hidden["\'][^>]*>', re.I)
+RE_INPUT_NAME = re.compile(r'name=["\']([^"\']+)["\']')
+RE_INPUT_VALUE = re.compile(r'value=["\']([^"\']*)["\']')
+
+# 奖励提取前的清理规则（按顺序执行）
+RE_SCRIPT = re.compile(r'<script[^>]*>.*?</script>', re.DOTALL | re.I)
+RE_STYLE = re.compile(r'<style[^>]*>.*?</style>', re.DOTALL | re.I)
+RE_HISTORY_DIV = re.compile(r'<div[^>]*class=["\'][^"\']*history[^"\']*["\'][^>]*>.*?</div>', re.DOTALL | re.I)
+RE_HISTORY_TEXT = re.compile(r'签到历史.*?(?=<div|$)', re.DOTALL | re.I)
+
+# 奖励金额规则：(级别, 必需关键字, 规则)，按顺序取第一个金额合理的结果
+# 必需关键字不全时规则不可能匹配，直接跳过，避免对整页做无效的回溯匹配
+REWARD_RULES = [
+    # 🆕 优先级1：明确匹配"今日/今天/本次/签到成功"相关的奖励
+    ("优先级", ("今日", "获得"), re.compile(r'今日.*?获得.*?([\d.]+)\s*元', re.I)),
+    ("优先级", ("今天", "获得"), re.compile(r'今天.*?获得.*?([\d.]+)\s*元', re.I)),
+    ("优先级", ("本次", "获得"), re.compile(r'本次.*?获得.*?([\d.]+)\s*元', re.I)),
+    ("优先级", ("签到成功", "获得"), re.compile(r'签到成功.*?获得.*?([\d.]+)\s*元', re.I)),
+    ("优先级", ("今日签到",), re.compile(r'今日签到.*?([\d.]+)\s*元', re.I)),
+    ("优先级", ("恭喜", "获得"), re.compile(r'恭喜.*?获得.*?([\d.]+)\s*元', re.I)),
+    ("优先级", ("成功", "奖励"), re.compile(r'成功.*?奖励.*?([\d.]+)\s*元', re.I)),
+    # 🆕 优先级2：通用模式（从前往后找第一个，而非最大值）
+    ("通用模式", ("+",), re.compile(r'\+\s*([\d.]+)\s*元', re.I)),
+    ("通用模式", (), None),  # ([\d.]+)\s*元，由 first_yuan_amount 从"元"向前查找
+    ("通用模式", ("获得",), re.compile(r'获得.*?([\d.]+)\s*元', re.I)),
+    ("通用模式", ("奖励",), re.compile(r'奖励.*?([\d.]+)\s*元', re.I)),
+    ("通用模式", ("领取",), re.compile(r'领取.*?([\d.]+)\s*元', re.I)),
+]
+
+# 签到状态规则：(中文关键字, 英文锚点, 英文规则)
+# 中文关键字直接做子串查找；中文未命中时才生成小写页面，英文规则仅在锚点出现时执行
+CHECKIN_BUTTON_RULE = (("立即签到",), ("checkin",), re.compile(r'<button[^>]+name=["\']checkin["\']'))
+ALREADY_RULE = (("今日已签到", "明天再来", "已签到"), ("already",), re.compile(r'already\s+checked'))
+SUCCESS_RULE = (("签到成功", "获得奖励", "领取成功", "恭喜"), ("success",), re.compile(r'check-?in\s+success'))
+INVALID_RULE = (("请登录", "未登录"), ("please", "session"), re.compile(r'please\s+log\s*in|session\s+expired'))
+
+
+class PageText:
+    """待解析的页面，小写形式按需生成一次"""
+
+    def __init__(self, html: str):
+        self.html = html
+        self._lower = None
+
+    @property
+    def lower(self) -> str:
+        if self._lower is None:
+            self._lower = self.html.lower()
+        return self._lower
+
+    def matches(self, rule) -> bool:
+        """判断页面是否命中某类签到状态"""
+        keywords, anchors, pattern = rule
+        if any(keyword in self.html for keyword in keywords):
+            return True
+        return any(anchor in self.lower for anchor in anchors) and pattern.search(self.lower) is not None
+
+
+def first_yuan_amount(text: str):
+    """
+    等价于 re.search(r'([\d.]+)\s*元', text).group(1)：
+    从每个"元"向前跳过空白、收集紧邻的数字，避免正则在每个字符位置上尝试匹配
+    """
+    pos = text.find("元")
+    while pos != -1:
+        end = pos
+        while end > 0 and text[end - 1].isspace():
+            end -= 1
+        start = end
+        while start > 0 and (text[start - 1] == "." or text[start - 1].isdecimal()):
+            start -= 1
+        if start < end:
+            return text[start:end]
+        pos = text.find("元", pos + 1)
+    return None
+
+
 def extract_csrf(html: str) -> dict:
     data = {}
-    for m in re.finditer(r'<input[^>]+type=["\']hidden["\'][^>]*>', html, re.I):
+    for m in RE_HIDDEN_INPUT.finditer(html):
         tag = m.group(0)
-        name_match = re.search(r'name=["\']([^"\']+)["\']', tag)
-        value_match = re.search(r'value=["\']([^"\']*)["\']', tag)
+        name_match = RE_INPUT_NAME.search(tag)
+        value_match = RE_INPUT_VALUE.search(tag)
         if name_match:
             data[name_match.group(1)] = value_match.group(1) if value_match else ""
     return data
@@ -165,64 +250,35 @@ def extract_reward(html: str) -> float:
         return 0
 
     # 清理脚本和样式标签
-    text_cleaned = re.sub(r'<script[^>]*>.*?</script>', '', html, flags=re.DOTALL | re.I)
-    text_cleaned = re.sub(r'<style[^>]*>.*?</style>', '', text_cleaned, flags=re.DOTALL | re.I)
+    text_cleaned = RE_SCRIPT.sub('', html)
+    text_cleaned = RE_STYLE.sub('', text_cleaned)
 
     # 🆕 移除签到历史区域（避免误匹配历史金额）
-    text_cleaned = re.sub(
-        r'<div[^>]*class=["\'][^"\']*history[^"\']*["\'][^>]*>.*?</div>',
-        '',
-        text_cleaned,
-        flags=re.DOTALL | re.I
-    )
-    text_cleaned = re.sub(
-        r'签到历史.*?(?=<div|$)',
-        '',
-        text_cleaned,
-        flags=re.DOTALL | re.I
-    )
+    text_cleaned = RE_HISTORY_DIV.sub('', text_cleaned)
+    text_cleaned = RE_HISTORY_TEXT.sub('', text_cleaned)
 
     logger.debug(f"清理后的HTML片段: {text_cleaned[:300]}...")
 
-    # 🆕 优先级1：明确匹配"今日/今天/本次/签到成功"相关的奖励
-    priority_patterns = [
-        r'今日.*?获得.*?([\d.]+)\s*元',
-        r'今天.*?获得.*?([\d.]+)\s*元',
-        r'本次.*?获得.*?([\d.]+)\s*元',
-        r'签到成功.*?获得.*?([\d.]+)\s*元',
-        r'今日签到.*?([\d.]+)\s*元',
-        r'恭喜.*?获得.*?([\d.]+)\s*元',
-        r'成功.*?奖励.*?([\d.]+)\s*元',
-    ]
-
-    for pattern in priority_patterns:
-        match = re.search(pattern, text_cleaned, re.I)
-        if match:
-            try:
-                amount = float(match.group(1))
-                if 0.01 <= amount <= 10:
-                    logger.debug(f"优先级匹配成功: {pattern} -> {amount} 元")
-                    return amount
-            except (ValueError, IndexError):
-                continue
+    # 所有规则都以"元"结尾，页面中没有"元"时无需逐条匹配
+    if "元" not in text_cleaned:
+        logger.debug("未匹配到任何金额")
+        return 0
 
-    # 🆕 优先级2：通用模式（从前往后找第一个，而非最大值）
-    general_patterns = [
-        r'\+\s*([\d.]+)\s*元',
-        r'([\d.]+)\s*元',
-        r'获得.*?([\d.]+)\s*元',
-        r'奖励.*?([\d.]+)\s*元',
-        r'领取.*?([\d.]+)\s*元',
-    ]
-    for pattern in general_patterns:
-        match = re.search(pattern, text_cleaned, re.I)  # 🔄 改为 search（找第一个）
-        if match:
+    for level, keywords, pattern in REWARD_RULES:
+        if not all(keyword in text_cleaned for keyword in keywords):
+            continue
+        if pattern is None:
+            value = first_yuan_amount(text_cleaned)
+        else:
+            match = pattern.search(text_cleaned)
+            value = match.group(1) if match else None
+        if value is not None:
             try:
-                amount = float(match.group(1))
+                amount = float(value)
                 if 0.01 <= amount <= 10:
-                    logger.debug(f"通用模式匹配: {pattern} -> {amount} 元")
+                    logger.debug(f"{level}匹配成功: {pattern.pattern if pattern else 'first_yuan_amount'} -> {amount} 元")
                     return amount
-            except (ValueError, IndexError):
+            except ValueError:
                 continue
 
     logger.debug("未匹配到任何金额")
@@ -308,103 +364,180 @@ def parse_result(html: str) -> tuple[str, str, float]:
     if not html:
         return "unknown", "页面内容为空", 0
 
+    page = PageText(html)
+
     # 🔧 优先检测：如果存在"立即签到"按钮，说明未签到（此时不提取金额）
-    if re.search(r'立即签到|<button[^>]+name=["\']checkin["\']', html, re.I):
+    if page.matches(CHECKIN_BUTTON_RULE):
         logger.debug("检测到'立即签到'按钮，判断为未签到状态")
         return "unknown", "检测到签到按钮，需要执行签到", 0
 
     # 🔧 修复：更精确的已签到模式
-    already_patterns = [
-        r'今日已签到',
-        r'明天再来',
-        r'已签到',
-        r'already\s+checked',
-    ]
-    for pattern in already_patterns:
-        if re.search(pattern, html, re.I):
-            # ✅ 只有确认已签到后才提取金额
-            amount = extract_reward(html)
-            if amount > 0:
-                return "already", f"今日已签到，获得 {amount} 元", amount
-            return "already", "今日已签到", 0
-
-    success_patterns = [
-        r'签到成功',
-        r'获得奖励',
-        r'领取成功',
-        r'恭喜',
-        r'check-?in\s+success',
-    ]
-    for pattern in success_patterns:
-        if re.search(pattern, html, re.I):
-            # ✅ 只有确认签到成功后才提取金额
-            amount = extract_reward(html)
-            if amount > 0:
-                return "success", f"签到成功，获得 {amount} 元", amount
-            return "success", "签到成功", 0
-
-    invalid_patterns = [
-        r'请登录',
-        r'please\s+log\s*in',
-        r'未登录',
-        r'session\s+expired',
-    ]
-    for pattern in invalid_patterns:
-        if re.search(pattern, html, re.I):
-            return "invalid", "登录失效，请更新 Cookie", 0
-
-    if "error" in html.lower() or "错误" in html:
+    if page.matches(ALREADY_RULE):
+        # ✅ 只有确认已签到后才提取金额
+        amount = extract_reward(html)
+        if amount > 0:
+            return "already", f"今日已签到，获得 {amount} 元", amount
+        return "already", "今日已签到", 0
+
+    if page.matches(SUCCESS_RULE):
+        # ✅ 只有确认签到成功后才提取金额
+        amount = extract_reward(html)
+        if amount > 0:
+            return "success", f"签到成功，获得 {amount} 元", amount
+        return "success", "签到成功", 0
+
+    if page.matches(INVALID_RULE):
+        return "invalid", "登录失效，请更新 Cookie", 0
+
+    if "error" in page.lower or "错误" in html:
         return "fail", "页面返回错误", 0
     return "unknown", "未识别到明确状态", 0
 
-def sign_once_impl(session) -> tuple[str, str, float]:
+# ---------------- 重试策略 ----------------
+RETRYABLE_STATUS = {408, 423, 425, 429, 500, 502, 503, 504}  # 可重试的HTTP状态码，其余 4xx 视为确定性失败
+
+
+def parse_retry_after(response):
+    """解析 Retry-After 响应头（秒数或HTTP日期），返回等待秒数，没有时返回 None"""
+    value = (response.headers.get("Retry-After") or "").strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+        if retry_at.tzinfo is None:
+            # HTTP 日期按规范为 GMT，"-0000" 等写法解析为无时区时间，不能按本地时区计算
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def record_response(state: dict, response):
+    """记录响应的状态码与重试提示，供重试策略使用"""
+    state["http_status"] = response.status_code
+    state["retry_after"] = parse_retry_after(response)
+    if response.status_code >= 400:
+        state["retryable"] = response.status_code in RETRYABLE_STATUS
+
+
+class RetryPolicy:
     """
-    使用已构建的 session 执行签到
-    优化：先访问签到主页预热并检测是否已签到，未签到才执行POST请求
+    签到重试策略：优先遵循服务器下发的 Retry-After；
+    423（XSRF-TOKEN 已由服务器刷新）短暂等待即可；其余按带抖动的指数退避等待
     """
-    logger.info("开始执行签到...")
-    try:
-        kwargs = {"timeout": TIMEOUT, "allow_redirects": True}
-        if USE_CURL_CFFI:
-            kwargs["impersonate"] = "chrome120"
 
-        # 步骤1：访问签到主页（预热session，刷新XSRF-TOKEN，获取CSRF token）
-        logger.debug("访问签到主页...")
-        r1 = session.get(f"{BASE}/", **kwargs)
+    def __init__(self, base_delay=RETRY_DELAY, max_delay=RETRY_MAX_DELAY):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempts = []  # 每次尝试的记录：序号、结果、HTTP状态码、耗时、随后等待时间
+
+    def record(self, attempt, status, http_status, elapsed):
+        self.attempts.append({
+            "attempt": attempt,
+            "status": status,
+            "http_status": http_status,
+            "elapsed": round(elapsed, 2),
+            "wait": 0,
+        })
+
+    def next_delay(self, attempt, http_status=None, retry_after=None):
+        """计算第 attempt 次尝试失败后的等待时间"""
+        if retry_after is not None:
+            delay = min(retry_after, self.max_delay)
+        elif http_status == 423:
+            delay = random.uniform(1, 2)
+        else:
+            backoff = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+            delay = backoff / 2 + random.uniform(0, backoff / 2)
+        self.attempts[-1]["wait"] = round(delay, 1)
+        return delay
+
+    def summary(self) -> str:
+        parts = []
+        for item in self.attempts:
+            part = f"#{item['attempt']} {item['status']}"
+            if item["http_status"]:
+                part += f"({item['http_status']})"
+            part += f" {item['elapsed']}s"
+            if item["wait"]:
+                part += f"，等待 {item['wait']}s"
+            parts.append(part)
+        return "；".join(parts)
+
+
+def fetch_checkin_page(session, state: dict, kwargs: dict):
+    """
+    访问签到主页并预检签到状态
+    返回 (状态, 消息, 金额, CSRF字段)，CSRF字段为 None 时表示无需（或无法）继续提交
+    """
+    # 步骤1：访问签到主页（预热session，刷新XSRF-TOKEN，获取CSRF token）
+    logger.debug("访问签到主页...")
+    r1 = session.get(f"{BASE}/", **kwargs)
+    record_response(state, r1)
+
+    logger.debug(f"API 请求：GET {BASE}/ {r1.status_code}")
+    logger.debug(f"响应：{r1.text[:300]}")
+
+    if "login" in r1.url.lower():
+        logger.error("被重定向到登录页，Cookie 已失效")
+        return "invalid", "被重定向到登录页，Cookie 已失效", 0, None
 
-        logger.debug(f"API 请求：GET {BASE}/ {r1.status_code}")
-        logger.debug(f"响应：{r1.text[:300]}")
+    if r1.status_code == 403:
+        logger.error("403 Forbidden（触发风控）")
+        return "error", "403 Forbidden（触发风控）", 0, None
 
-        if "login" in r1.url.lower():
-            logger.error("被重定向到登录页，Cookie 已失效")
-            return "invalid", "被重定向到登录页，Cookie 已失效", 0
+    if r1.status_code != 200:
+        logger.error(f"首页返回 {r1.status_code}")
+        return "error", f"首页返回 {r1.status_code}", 0, None
 
-        if r1.status_code == 403:
-            logger.error("403 Forbidden（触发风控）")
-            return "error", "403 Forbidden（触发风控）", 0
+    html1 = r1.text or ""
 
-        if r1.status_code != 200:
-            logger.error(f"首页返回 {r1.status_code}")
-            return "error", f"首页返回 {r1.status_code}", 0
+    if any(x in html1 for x in ["请登录", "未登录"]):
+        logger.error("页面提示未登录")
+        return "invalid", "页面提示未登录", 0, None
 
-        html1 = r1.text or ""
+    # 步骤2：预检是否已签到（避免不必要的POST请求）
+    logger.debug("检测签到状态...")
+    status_precheck, msg_precheck, amount_precheck = parse_result(html1)
+    if status_precheck == "already":
+        # 已签到，直接返回，无需POST
+        logger.info(f"检测到已签到状态: {msg_precheck}")
+        return status_precheck, msg_precheck, amount_precheck, None
 
-        if any(x in html1 for x in ["请登录", "未登录"]):
-            logger.error("页面提示未登录")
-            return "invalid", "页面提示未登录", 0
+    return "unknown", "", 0, extract_csrf(html1)
 
-        # 步骤2：预检是否已签到（避免不必要的POST请求）
-        logger.debug("检测签到状态...")
-        status_precheck, msg_precheck, amount_precheck = parse_result(html1)
-        if status_precheck == "already":
-            # 已签到，直接返回，无需POST
-            logger.info(f"检测到已签到状态: {msg_precheck}")
-            return status_precheck, msg_precheck, amount_precheck
 
-        # 步骤3：未签到，准备CSRF token并执行POST签到请求
+def sign_once_impl(session, state=None) -> tuple[str, str, float]:
+    """
+    使用已构建的 session 执行签到
+    优化：先访问签到主页预热并检测是否已签到，未签到才执行POST请求
+    state 在多次尝试间传递：csrf 为上次响应页面中的表单字段（存在时跳过首页直接提交），
+    执行后写入 http_status / retry_after / retryable 供重试策略使用
+    """
+    logger.info("开始执行签到...")
+    if state is None:
+        state = {}
+    state.update(http_status=None, retry_after=None, retryable=True)
+    csrf = state.pop("csrf", None)
+
+    try:
+        kwargs = {"timeout": TIMEOUT, "allow_redirects": True}
+        if USE_CURL_CFFI:
+            kwargs["impersonate"] = "chrome120"
+
+        if csrf:
+            logger.debug("复用上次响应中的CSRF字段，跳过首页请求")
+        else:
+            status, msg, amount, csrf = fetch_checkin_page(session, state, kwargs)
+            if csrf is None:
+                return status, msg, amount
+
+        # 步骤3：未签到，使用CSRF token执行POST签到请求
         logger.debug("准备执行POST签到请求...")
         form_data = {"checkin": ""}
-        form_data.update(extract_csrf(html1))
+        form_data.update(csrf)
 
         headers_post = {
             "Content-Type": "application/x-www-form-urlencoded",
@@ -413,6 +546,7 @@ def sign_once_impl(session) -> tuple[str, str, float]:
         }
 
         r2 = session.post(f"{BASE}/index.php", data=form_data, headers=headers_post, **kwargs)
+        record_response(state, r2)
 
         logger.debug(f"API 请求：POST {BASE}/index.php {r2.status_code}")
         logger.debug(f"响应：{r2.text[:300]}")
@@ -422,6 +556,12 @@ def sign_once_impl(session) -> tuple[str, str, float]:
             return "error", "POST 被拒绝 403", 0
 
         html2 = r2.text or ""
+        if r2.status_code in RETRYABLE_STATUS:
+            # 423/429/5xx：服务器已下发新的 XSRF-TOKEN 或要求稍后再试，保留页面中的新表单字段供下次直接提交
+            state["csrf"] = extract_csrf(html2) or None
+            logger.warning(f"签到请求返回 {r2.status_code}")
+            return "error", f"签到请求返回 {r2.status_code}", 0
+
         status, msg, amount = parse_result(html2)
 
         # 步骤4：如果POST后状态不明确，再次访问首页确认
@@ -431,10 +571,13 @@ def sign_once_impl(session) -> tuple[str, str, float]:
             r3 = session.get(f"{BASE}/", **kwargs)
             logger.debug(f"API 请求：GET {BASE}/ {r3.status_code}")
             logger.debug(f"响应：{r3.text[:300]}")
-            status2, msg2, amount2 = parse_result(r3.text or "")
+            html3 = r3.text or ""
+            status2, msg2, amount2 = parse_result(html3)
             if status2 != "unknown":
                 logger.info(f"签到完成: {msg2}")
                 return status2, msg2, amount2
+            # 首页仍可签到时，保留最新的表单字段供下次尝试直接提交
+            state["csrf"] = extract_csrf(html3) or None
 
         logger.info(f"签到完成: {msg}")
         return status, msg, amount
@@ -449,6 +592,7 @@ def sign_once_impl(session) -> tuple[str, str, float]:
         logger.error(f"{e.__class__.__name__}: {str(e)[:100]}")
         return "error", f"{e.__class__.__name__}: {str(e)[:100]}", 0
 
+
 def sign_with_retry(account_config, name: str) -> tuple[str, str, float, dict]:
     """
     执行签到并返回账户信息
@@ -461,31 +605,44 @@ def sign_with_retry(account_config, name: str) -> tuple[str, str, float, dict]:
         logger.error(f"Cookie 配置错误: {str(e)}")
         return "error", f"Cookie 配置错误: {str(e)}", 0, {}
 
-    # 执行签到（带重试，首次可能423，重试时会使用服务器下发的新XSRF-TOKEN）
+    # 执行签到（带重试，首次可能423，重试时会使用服务器下发的新XSRF-TOKEN及表单字段）
     status = "unknown"
     msg = ""
     amount = 0
+    policy = RetryPolicy()
+    state = {}
     for attempt in range(1, RETRY_TIMES + 1):
         if attempt > 1:
             logger.warning(f"第 {attempt}/{RETRY_TIMES} 次重试...")
-            time.sleep(RETRY_DELAY)
 
-        status, msg, amount = sign_once_impl(session)
+        started = time.monotonic()
+        status, msg, amount = sign_once_impl(session, state)
+        policy.record(attempt, status, state.get("http_status"), time.monotonic() - started)
 
         # 如果Cookie失效，直接返回，不再重试
         if status == "invalid":
+            logger.info(f"签到尝试记录: {policy.summary()}")
             return status, msg, amount, {}
 
         # 签到成功或已签到，跳出重试循环
         if status in ("success", "already"):
             break
 
+        # 确定性失败（403 风控、404 等），重试也不会成功
+        if not state.get("retryable", True):
+            logger.warning(f"{msg}，不再重试")
+            break
+
         if attempt < RETRY_TIMES:
-            logger.warning(f"{msg}，{RETRY_DELAY}秒后重试...")
+            delay = policy.next_delay(attempt, state.get("http_status"), state.get("retry_after"))
+            logger.warning(f"{msg}，{delay:.1f}秒后重试...")
+            time.sleep(delay)
+
+    logger.info(f"签到尝试记录: {policy.summary()}")
 
     # 如果签到失败多次，添加重试说明
     if status not in ("success", "already", "invalid"):
-        msg = f"{msg}（重试 {RETRY_TIMES} 次后失败）"
+        msg = f"{msg}（尝试 {len(policy.attempts)} 次后失败）"
 
     # 签到后获取账户信息（此时余额已包含签到奖励）
     user_info, info_msg = get_user_balance_info(session)
@@ -565,6 +722,27 @@ def safe_send_notify(title, content):
         logger.error(f"通知推送失败: {e}")
         return False
 
+# ---------------- 每日签到记录（.github/workflows/checkin_ledger.py） ----------------
+CACHE_DIR = os.getenv("CHECKIN_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+try:
+    from checkin_ledger import CheckinLedger
+except ImportError:
+    class CheckinLedger:
+        """未找到 checkin_ledger 模块时不记录、不跳过"""
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def succeeded(self, account):
+            return None
+
+        def record(self, account):
+            pass
+
+
+ledger = CheckinLedger("leaflow", CACHE_DIR)
+
+
 def main():
     logger.info("="*50)
     logger.info("  Leaflow 签到脚本 v3.2（账户信息增强版）")
@@ -599,8 +777,21 @@ def main():
     fail_count = 0
     total_amount = 0.0
 
+    processed = 0
     for i, account_config in enumerate(cookie_list, 1):
         name = f"账号{i}"
+        account_key = account_config.get(REMEMBER_COOKIE, "")
+
+        # 今日已签到成功的账号直接跳过
+        signed_at = ledger.succeeded(account_key)
+        if signed_at:
+            already_count += 1
+            logger.info(f"⏭️ {name} 今日 {signed_at} 已签到成功，跳过（FORCE_CHECKIN=true 可强制签到）")
+            continue
+
+        if processed > 0:
+            time.sleep(random.uniform(2, 5))
+        processed += 1
 
         logger.info("")
         logger.info(f"==== {name} 开始签到 ====")
@@ -608,6 +799,9 @@ def main():
 
         status, msg, amount, user_info = sign_with_retry(account_config, name)
 
+        if status in ("success", "already"):
+            ledger.record(account_key)
+
         if status == "success":
             success_count += 1
             if amount > 0:
@@ -642,9 +836,6 @@ def main():
             notify_msg = build_notify_message(name, msg, user_info)
             safe_send_notify("[Leaflow]签到失败", notify_msg)
 
-        if i < len(cookie_list):
-            time.sleep(random.uniform(2, 5))
-
     logger.info("")
     logger.info("="*50)
     logger.info("  所有账号签到完成")
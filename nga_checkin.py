@@ -12,6 +12,7 @@ import io
 if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
+import heapq
 import requests
 import os
 import time
@@ -153,7 +154,7 @@ class NGAUser:
             return "签到失败: 未知错误", False, False
 
     def daily_missions(self):
-        """执行日常任务"""
+        """执行日常任务（生成器，产出需要等待的秒数）"""
         logger.info(f"账号{self.index} 开始执行日常任务...")
 
         missions = [
@@ -171,7 +172,7 @@ class NGAUser:
                     logger.info(f"    {mission_name} 完成")
                 else:
                     logger.warning(f"    {mission_name} 可能已完成或失败")
-                time.sleep(random.uniform(1, 3))
+                yield random.uniform(1, 3)
             except Exception as e:
                 logger.error(f"    {mission_name} 执行异常: {e}")
 
@@ -179,7 +180,7 @@ class NGAUser:
         return completed_missions
 
     def video_missions(self):
-        """执行看视频任务"""
+        """执行看视频任务（生成器，产出需要等待的秒数）"""
         logger.info(f"账号{self.index} 开始执行看视频任务(免广告)...")
         logger.info("    此过程较慢，请耐心等待...")
 
@@ -190,23 +191,23 @@ class NGAUser:
         # 执行4次免广告任务
         for i in range(4):
             delay = random.randint(30, 45)
-            logger.info(f"    免广告任务第 {i+1}/4 次，等待 {delay} 秒...")
-            time.sleep(delay)
+            logger.info(f"    账号{self.index} 免广告任务第 {i+1}/4 次，等待 {delay} 秒...")
+            yield delay
             self.nga_get("mission", "video_view_task_counter_add_v2_for_adfree", verbose=True)
 
         logger.info(f"账号{self.index} 开始执行看视频得N币任务...")
         # 执行5次N币任务
         for i in range(5):
             delay = random.randint(30, 45)
-            logger.info(f"    N币任务第 {i+1}/5 次，等待 {delay} 秒...")
-            time.sleep(delay)
+            logger.info(f"    账号{self.index} N币任务第 {i+1}/5 次，等待 {delay} 秒...")
+            yield delay
             self.nga_get("mission", "video_view_task_counter_add_v2", verbose=True)
 
         logger.info(f"账号{self.index} 视频任务完成")
         return "视频任务完成"
 
     def share_missions(self):
-        """执行分享任务"""
+        """执行分享任务（生成器，产出需要等待的秒数）"""
         logger.info(f"账号{self.index} 开始执行分享任务...")
 
         tid = random.randint(12345678, 24692245)
@@ -214,7 +215,7 @@ class NGAUser:
         for i in range(5):
             logger.info(f"    分享任务第 {i+1}/5 次")
             self.nga_get("data_query", "topic_share_log_v2", f"event=4&tid={tid}")
-            time.sleep(random.uniform(1, 2))
+            yield random.uniform(1, 2)
 
         logger.info(f"    领取分享奖励")
         reward_result = self.nga_get("mission", "check_mission", "mid=149&get_success_repeat=1&no_compatible_fix=1")
@@ -246,7 +247,11 @@ class NGAUser:
             return "资产查询失败"
 
     def run_all_tasks(self):
-        """执行所有任务并返回结果"""
+        """顺序执行所有任务并返回结果"""
+        return run_steps(self.run_tasks())
+
+    def run_tasks(self):
+        """执行所有任务（生成器，产出需要等待的秒数，结束时返回 (结果消息, 是否成功)）"""
         logger.info(f"\n==== 账号{self.index} 开始执行 ====")
         logger.info(f"用户ID: {self.uid}")
         logger.info(f"开始时间: {now_beijing().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -264,16 +269,16 @@ class NGAUser:
 
         try:
             # 2. 日常任务
-            daily_results = self.daily_missions()
+            daily_results = yield from self.daily_missions()
             if daily_results:
                 results.append(f"日常任务: 完成{len(daily_results)}个任务")
 
             # 3. 视频任务
-            video_result = self.video_missions()
+            video_result = yield from self.video_missions()
             results.append(video_result)
 
             # 4. 分享任务
-            share_result = self.share_missions()
+            share_result = yield from self.share_missions()
             results.append(share_result)
 
             # 5. 查询资产
@@ -302,6 +307,72 @@ class NGAUser:
             logger.error(error_msg)
             return error_msg, False
 
+# ---------------- 任务调度 ----------------
+def run_steps(steps):
+    """顺序驱动任务生成器，按产出的秒数等待，返回生成器的结果"""
+    try:
+        while True:
+            time.sleep(next(steps))
+    except StopIteration as e:
+        return e.value
+
+
+class TaskScheduler:
+    """
+    基于最小堆的定时调度器：各账号的任务生成器在单线程内按唤醒时间轮流推进，
+    某个账号等待看视频间隔时其他账号继续执行，单账号内的等待间隔保持不变。
+    """
+
+    def __init__(self):
+        self.heap = []  # (唤醒时间, 序号, 标识, 任务生成器)
+        self.seq = 0
+
+    def add(self, key, steps, start_delay=0):
+        """添加任务，start_delay 秒后开始执行"""
+        heapq.heappush(self.heap, (time.monotonic() + start_delay, self.seq, key, steps))
+        self.seq += 1
+
+    def run(self, on_done):
+        """执行全部任务，每个任务结束时回调 on_done(标识, 结果, 异常)"""
+        while self.heap:
+            wake_at, seq, key, steps = heapq.heappop(self.heap)
+            wait = wake_at - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+
+            try:
+                delay = next(steps)
+            except StopIteration as e:
+                on_done(key, e.value, None)
+                continue
+            except Exception as e:
+                on_done(key, None, e)
+                continue
+
+            heapq.heappush(self.heap, (time.monotonic() + delay, seq, key, steps))
+
+
+# ---------------- 每日签到记录（.github/workflows/checkin_ledger.py） ----------------
+CACHE_DIR = os.getenv("CHECKIN_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+try:
+    from checkin_ledger import CheckinLedger
+except ImportError:
+    class CheckinLedger:
+        """未找到 checkin_ledger 模块时不记录、不跳过"""
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def succeeded(self, account):
+            return None
+
+        def record(self, account):
+            pass
+
+
+ledger = CheckinLedger("nga", CACHE_DIR)
+
+
 def main():
     """主程序入口"""
     logger.info(f"==== NGA论坛签到开始 - {now_beijing().strftime('%Y-%m-%d %H:%M:%S')} ====")
@@ -323,43 +394,61 @@ def main():
     success_accounts = 0
     all_results = []
 
+    # 账号按间隔依次启动，各账号的看视频等待期交错执行
+    scheduler = TaskScheduler()
+    start_delay = 0
+    pending = {}
     for i, account_str in enumerate(accounts):
-        try:
-            # 账号间随机等待
-            if i > 0:
-                delay = random.uniform(10, 30)
-                logger.info(f"随机等待 {delay:.1f} 秒后处理下一个账号...")
-                time.sleep(delay)
-
-            # 解析账号信息
-            if ',' not in account_str:
-                error_msg = f"❌ 账号{i+1}: 凭证格式错误，应为 'UID,AccessToken'"
-                logger.error(error_msg)
-                all_results.append(error_msg)
-                safe_send_notify("[NGA论坛]签到失败", error_msg)
-                continue
-
-            uid, accesstoken = account_str.split(',', 1)
-            uid = uid.strip()
-            accesstoken = accesstoken.strip()
+        # 解析账号信息
+        if ',' not in account_str:
+            error_msg = f"❌ 账号{i+1}: 凭证格式错误，应为 'UID,AccessToken'"
+            logger.error(error_msg)
+            all_results.append(error_msg)
+            safe_send_notify("[NGA论坛]签到失败", error_msg)
+            continue
+
+        uid, accesstoken = account_str.split(',', 1)
+        uid = uid.strip()
+        accesstoken = accesstoken.strip()
+
+        # 今日已签到成功的账号直接跳过（按 UID 识别，AccessToken 更换后仍有效）
+        signed_at = ledger.succeeded(uid)
+        if signed_at:
+            logger.info(f"⏭️ 账号{i + 1} 今日 {signed_at} 已签到成功，跳过（FORCE_CHECKIN=true 可强制签到）")
+            success_accounts += 1
+            continue
+
+        # 账号间随机间隔启动
+        if pending:
+            delay = random.uniform(10, 30)
+            start_delay += delay
+            logger.info(f"账号{i + 1} 将在 {start_delay:.1f} 秒后启动")
+
+        nga_user = NGAUser(uid, accesstoken, ua, i + 1)
+        pending[i] = uid
+        scheduler.add(i, nga_user.run_tasks(), start_delay)
+
+    def on_account_done(i, result, error):
+        nonlocal success_accounts
+        if error is not None:
+            error_msg = f"❌ 账号{i+1}: 处理异常 - {str(error)}"
+            logger.error(error_msg)
+            all_results.append(error_msg)
+            safe_send_notify("[NGA论坛]签到失败", error_msg)
+            return
 
-            # 执行任务
-            nga_user = NGAUser(uid, accesstoken, ua, i + 1)
-            result_msg, is_success = nga_user.run_all_tasks()
-            all_results.append(result_msg)
+        result_msg, is_success = result
+        all_results.append(result_msg)
 
-            if is_success:
-                success_accounts += 1
+        if is_success:
+            success_accounts += 1
+            ledger.record(pending[i])
 
-            # 发送单个账号通知（统一格式）
-            title = f"[NGA论坛]签到{'成功' if is_success else '失败'}"
-            safe_send_notify(title, result_msg)
+        # 发送单个账号通知（统一格式）
+        title = f"[NGA论坛]签到{'成功' if is_success else '失败'}"
+        safe_send_notify(title, result_msg)
 
-        except Exception as e:
-            error_msg = f"❌ 账号{i+1}: 处理异常 - {str(e)}"
-            logger.error(error_msg)
-            all_results.append(error_msg)
-            safe_send_notify("[NGA论坛]签到失败", error_msg)
+    scheduler.run(on_account_done)
 
     # 发送汇总通知（统一格式）
     if len(accounts) > 1:
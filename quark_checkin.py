@@ -248,6 +248,30 @@ class Quark:
 
         return username, extra_info, sign_msg, True
 
+# ---------------- 每日签到记录（.github/workflows/checkin_ledger.py） ----------------
+CACHE_DIR = os.getenv("CHECKIN_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+try:
+    from checkin_ledger import CheckinLedger, account_id
+except ImportError:
+    class CheckinLedger:
+        """未找到 checkin_ledger 模块时不记录、不跳过"""
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def succeeded(self, account):
+            return None
+
+        def record(self, account):
+            pass
+
+    def account_id(credential, *fields):
+        return credential.strip()
+
+
+ledger = CheckinLedger("quark", CACHE_DIR)
+
+
 def main():
     """主函数"""
     logger.info("开始获取环境变量...")
@@ -258,7 +282,22 @@ def main():
     success_count = 0
     fail_count = 0
 
+    processed = 0
     for i, cookie in enumerate(QUARK_COOKIE):
+        # 今日已签到成功的账号直接跳过
+        signed_at = ledger.succeeded(account_id(cookie, "kps"))
+        if signed_at:
+            success_count += 1
+            logger.info(f"⏭️ 账号{i + 1} 今日 {signed_at} 已签到成功，跳过（FORCE_CHECKIN=true 可强制签到）")
+            continue
+
+        # 多账号间随机等待
+        if processed > 0:
+            delay = random.uniform(3, 8)
+            logger.info(f"随机等待 {delay:.1f} 秒后处理下一个账号...")
+            time.sleep(delay)
+        processed += 1
+
         logger.info(f"\n==== 账号{i + 1} 开始签到 ====")
 
         # 执行签到
@@ -266,6 +305,7 @@ def main():
 
         if is_success:
             success_count += 1
+            ledger.record(account_id(cookie, "kps"))
             logger.info(f"{nickname}: {sign_msg}")
         else:
             fail_count += 1
@@ -300,12 +340,6 @@ def main():
             logger.info(f'签到{status}')
             logger.debug(notify_content)
 
-        # 多账号间随机等待
-        if i < len(QUARK_COOKIE) - 1:
-            delay = random.uniform(3, 8)
-            logger.info(f"随机等待 {delay:.1f} 秒后处理下一个账号...")
-            time.sleep(delay)
-
     # 发送汇总通知（仅多账号时）
     if len(QUARK_COOKIE) > 1:
         logger.info("\n==== 开始生成汇总通知 ====")
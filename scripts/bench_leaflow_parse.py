@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Leaflow 签到页解析对比测试与基准
+用 scripts/leaflow_corpus/ 下的签到页样本和随机拼接的页面，比对当前实现与原实现
+（每次调用现编译正则、逐条扫描规则）的 parse_result / extract_reward / extract_csrf 结果，
+并统计每个样本页的解析耗时。
+
+用法（仓库根目录）：python scripts/bench_leaflow_parse.py [随机用例数]
+样本页按签到页结构整理，覆盖未签到、已签到、签到成功（有/无金额）、登录失效和错误页六种状态。
+"""
+import glob
+import os
+import random
+import re
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_DIR = os.path.join(ROOT, "scripts", "leaflow_corpus")
+sys.path.insert(0, ROOT)
+
+import leaflow_checkin
+
+# ---------------- 原实现 ----------------
+def legacy_extract_csrf(html):
+    data = {}
+    for m in re.finditer(r'<input[^>]+type=["\']hidden["\'][^>]*>', html, re.I):
+        tag = m.group(0)
+        name_match = re.search(r'name=["\']([^"\']+)["\']', tag)
+        value_match = re.search(r'value=["\']([^"\']*)["\']', tag)
+        if name_match:
+            data[name_match.group(1)] = value_match.group(1) if value_match else ""
+    return data
+
+
+def legacy_extract_reward(html):
+    if not html:
+        return 0
+
+    text_cleaned = re.sub(r'<script[^>]*>.*?</script>', '', html, flags=re.DOTALL | re.I)
+    text_cleaned = re.sub(r'<style[^>]*>.*?</style>', '', text_cleaned, flags=re.DOTALL | re.I)
+    text_cleaned = re.sub(
+        r'<div[^>]*class=["\'][^"\']*history[^"\']*["\'][^>]*>.*?</div>',
+        '',
+        text_cleaned,
+        flags=re.DOTALL | re.I
+    )
+    text_cleaned = re.sub(
+        r'签到历史.*?(?=<div|$)',
+        '',
+        text_cleaned,
+        flags=re.DOTALL | re.I
+    )
+
+    priority_patterns = [
+        r'今日.*?获得.*?([\d.]+)\s*元',
+        r'今天.*?获得.*?([\d.]+)\s*元',
+        r'本次.*?获得.*?([\d.]+)\s*元',
+        r'签到成功.*?获得.*?([\d.]+)\s*元',
+        r'今日签到.*?([\d.]+)\s*元',
+        r'恭喜.*?获得.*?([\d.]+)\s*元',
+        r'成功.*?奖励.*?([\d.]+)\s*元',
+    ]
+    for pattern in priority_patterns:
+        match = re.search(pattern, text_cleaned, re.I)
+        if match:
+            try:
+                amount = float(match.group(1))
+                if 0.01 <= amount <= 10:
+                    return amount
+            except (ValueError, IndexError):
+                continue
+
+    general_patterns = [
+        r'\+\s*([\d.]+)\s*元',
+        r'([\d.]+)\s*元',
+        r'获得.*?([\d.]+)\s*元',
+        r'奖励.*?([\d.]+)\s*元',
+        r'领取.*?([\d.]+)\s*元',
+    ]
+    for pattern in general_patterns:
+        match = re.search(pattern, text_cleaned, re.I)
+        if match:
+            try:
+                amount = float(match.group(1))
+                if 0.01 <= amount <= 10:
+                    return amount
+            except (ValueError, IndexError):
+                continue
+    return 0
+
+
+def legacy_parse_result(html):
+    if not html:
+        return "unknown", "页面内容为空", 0
+
+    if re.search(r'立即签到|<button[^>]+name=["\']checkin["\']', html, re.I):
+        return "unknown", "检测到签到按钮，需要执行签到", 0
+
+    for pattern in [r'今日已签到', r'明天再来', r'已签到', r'already\s+checked']:
+        if re.search(pattern, html, re.I):
+            amount = legacy_extract_reward(html)
+            if amount > 0:
+                return "already", f"今日已签到，获得 {amount} 元", amount
+            return "already", "今日已签到", 0
+
+    for pattern in [r'签到成功', r'获得奖励', r'领取成功', r'恭喜', r'check-?in\s+success']:
+        if re.search(pattern, html, re.I):
+            amount = legacy_extract_reward(html)
+            if amount > 0:
+                return "success", f"签到成功，获得 {amount} 元", amount
+            return "success", "签到成功", 0
+
+    for pattern in [r'请登录', r'please\s+log\s*in', r'未登录', r'session\s+expired']:
+        if re.search(pattern, html, re.I):
+            return "invalid", "登录失效，请更新 Cookie", 0
+
+    if "error" in html.lower() or "错误" in html:
+        return "fail", "页面返回错误", 0
+    return "unknown", "未识别到明确状态", 0
+
+
+# ---------------- 对比测试 ----------------
+FRAGMENTS = [
+    "今日", "今天", "本次", "签到成功", "今日签到", "恭喜", "成功", "奖励", "获得", "领取", "+", "+ ",
+    "0.5", "12", "0.0", "1.2.3", "3.14", " 元", "元", "\n", "<div class='history'>", "</div>", "签到历史",
+    "<script>var a='5元';</script>", "<style>.x{}</style>", "立即签到", "已签到", "明天再来", "请登录",
+    "error", "<input type=\"hidden\" name=\"_token\" value=\"abc\">", "<p>", "</p>", "already checked",
+    "ALREADY  Checked", "Please Log in", "SESSION expired", "check-in Success",
+    "<BUTTON class=x name='CHECKIN'>", "<button name=\"checkin\">", "Error", "５", "　", "1 2",
+]
+
+
+def compare(html):
+    assert leaflow_checkin.parse_result(html) == legacy_parse_result(html), html[:200]
+    assert leaflow_checkin.extract_reward(html) == legacy_extract_reward(html), html[:200]
+    assert leaflow_checkin.extract_csrf(html) == legacy_extract_csrf(html), html[:200]
+
+
+def load_corpus():
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, "*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def main():
+    cases = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    leaflow_checkin.logger.debug_mode = False
+
+    pages = load_corpus()
+    if not pages:
+        print(f"❌ 未找到样本页: {CORPUS_DIR}")
+        sys.exit(1)
+    for html in pages.values():
+        compare(html)
+
+    rng = random.Random(1)
+    for _ in range(cases):
+        compare("".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 60))))
+    print(f"✅ {len(pages)} 个样本页、{cases} 个随机页面与原实现结果一致")
+
+    number = 50
+    for name, html in pages.items():
+        timings = []
+        for func in (legacy_parse_result, leaflow_checkin.parse_result):
+            timings.append(min(timeit.repeat(lambda: func(html), number=number, repeat=5)) / number * 1000)
+        status = leaflow_checkin.parse_result(html)[0]
+        print(f"{name:<24} {status:<8} 原实现 {timings[0]:.3f} ms  当前实现 {timings[1]:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+天翼云盘 b64tohex 对比测试与基准
+用随机输入比对当前实现、原实现与 base64 解码后转 hex 的结果，并统计两种实现的耗时。
+
+用法（仓库根目录）：python scripts/bench_ty_b64tohex.py [随机用例数]
+依赖与 ty_netdisk_checkin.py 相同（rsa、requests）。
+"""
+import base64
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ty_netdisk_checkin import B64MAP, BI_RM, TianYiYunPan
+
+
+def legacy_b64tohex(a):
+    """原实现：每个字符重建两次 list(a)，用 B64MAP.index 查找并拼接字符串"""
+    d = ""
+    e = 0
+    c = 0
+    for i in range(len(a)):
+        if list(a)[i] != "=":
+            v = B64MAP.index(list(a)[i])
+            if 0 == e:
+                e = 1
+                d += BI_RM[v >> 2]
+                c = 3 & v
+            elif 1 == e:
+                e = 2
+                d += BI_RM[c << 2 | v >> 4]
+                c = 15 & v
+            elif 2 == e:
+                e = 3
+                d += BI_RM[c]
+                d += BI_RM[v >> 2]
+                c = 3 & v
+            else:
+                e = 0
+                d += BI_RM[c << 2 | v >> 4]
+                d += BI_RM[15 & v]
+    if e == 1:
+        d += BI_RM[c << 2]
+    return d
+
+
+def check(b64tohex, cases):
+    rng = random.Random(0)
+    for _ in range(cases):
+        raw = os.urandom(rng.randint(0, 300))
+        encoded = base64.b64encode(raw).decode("ascii")
+        assert b64tohex(encoded) == legacy_b64tohex(encoded) == raw.hex(), encoded
+
+        # 去掉填充或截断的输入也要与原实现一致
+        for variant in (encoded.rstrip("="), encoded[:rng.randint(0, len(encoded))]):
+            assert b64tohex(variant) == legacy_b64tohex(variant), variant
+
+
+def main():
+    cases = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    b64tohex = TianYiYunPan("bench", "bench", 0).b64tohex
+
+    check(b64tohex, cases)
+    print(f"✅ {cases} 个随机用例与原实现、bytes.hex() 一致")
+
+    # RSA-2048 密文经 base64 编码后的长度
+    sample = base64.b64encode(os.urandom(256)).decode("ascii")
+    number = 200
+    for name, func in (("原实现", legacy_b64tohex), ("当前实现", b64tohex)):
+        elapsed = min(timeit.repeat(lambda: func(sample), number=number, repeat=5)) / number
+        print(f"{name}: {elapsed * 1000:.3f} ms/次（256 字节）")
+
+
+if __name__ == "__main__":
+    main()
@@ -762,7 +762,28 @@ def get_quarter_end_date():
     next_quarter_first_day = datetime(current_year, ((current_month - 1) // 3 + 1) * 3 + 1, 1)
     return next_quarter_first_day - timedelta(days=1)
 
-if __name__ == '__main__':
+# ---------------- 每日签到记录（.github/workflows/checkin_ledger.py） ----------------
+CACHE_DIR = os.getenv("CHECKIN_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+try:
+    from checkin_ledger import CheckinLedger
+except ImportError:
+    class CheckinLedger:
+        """未找到 checkin_ledger 模块时不记录、不跳过"""
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def succeeded(self, account):
+            return None
+
+        def record(self, account):
+            pass
+
+
+ledger = CheckinLedger("sfsu", CACHE_DIR)
+
+
+def main():
     """主程序入口"""
     APP_NAME = '顺丰速运'
     ENV_NAME = 'sfsyUrl'
@@ -773,15 +794,27 @@ if __name__ == '__main__':
     tokens = token.split('\n') if token else []
     if tokens:
         Log(f"🚚 共获取到{len(tokens)}个账号")
+        processed = 0
         for index, infos in enumerate(tokens):
-            Log(f"==================================\n🚚 处理账号{index + 1}")
-            RUN(infos, index).main()
+            runner = RUN(infos, index)
+
+            # 今日已签到成功的账号直接跳过（按登录得到的用户 ID 识别，链接更换后仍有效）
+            user_id = getattr(runner, "user_id", "")
+            signed_at = ledger.succeeded(user_id)
+            if signed_at:
+                logger.info(f"⏭️ 账号{index + 1} 今日 {signed_at} 已签到成功，跳过（FORCE_CHECKIN=true 可强制签到）")
+                continue
 
             # 多账号间随机等待
-            if index < len(tokens) - 1:  # 不是最后一个账号
+            if processed > 0:
                 delay = random.uniform(10, 30)
                 logger.info(f"随机等待 {delay:.1f} 秒后处理下一个账号...")
                 time.sleep(delay)
+            processed += 1
+
+            Log(f"==================================\n🚚 处理账号{index + 1}")
+            if runner.main():
+                ledger.record(user_id)
 
         # 最终汇总通知
         if hadsend and send_msg:
@@ -800,3 +833,6 @@ if __name__ == '__main__':
         Log("❌ 未获取到sfsyUrl环境变量")
 
     logger.info(f"==== 顺丰速运签到完成 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ====")
+
+if __name__ == '__main__':
+    main()
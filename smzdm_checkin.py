@@ -10,6 +10,7 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
 import requests, json, time, hashlib, os, random, re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 # 时区支持
@@ -116,53 +117,125 @@ def get_user_info(cookie):
         logger.error(f"获取失败，原因：{e}")
         return "未知用户", "0", "0", "0"
 
-def get_monthly_exp(cookie):
-    """获取本月经验"""
-    logger.info("开始获取本月经验...")
-    try:
-        current_month = datetime.now().strftime('%Y-%m')
-        total_exp = 0
+# ---------------- 本月经验记录 ----------------
+CACHE_DIR = os.getenv("CHECKIN_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+EXP_LOG_URL = 'https://zhiyou.m.smzdm.com/user/exp/ajax_log'
+EXP_MAX_PAGES = 3  # 首次运行或记录失效时最多查询的页数
+
+# 经验查询共享会话（分页请求复用连接）
+exp_session = requests.Session()
+exp_session.headers.update({
+    'Host': 'zhiyou.m.smzdm.com',
+    'Accept': 'application/json, text/plain, */*',
+    'Connection': 'keep-alive',
+    'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 15_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148/smzdm 10.4.40 rv:137.6 (iPhone 13; iOS 15.6; zh_CN)/iphone_smzdmapp/10.4.40/wkwebview/jsbv_1.0.0',
+    'Accept-Language': 'zh-CN,zh-Hans;q=0.9',
+    'Referer': 'https://zhiyou.m.smzdm.com/user/exp/',
+    'Accept-Encoding': 'gzip, deflate, br'
+})
+
+
+class ExpLedger:
+    """本月经验记录：按账号保存本月已统计的经验条目，每次只需查询新增的条目"""
+
+    def __init__(self, cookie):
+        # 优先使用 cookie 中的用户 ID，cookie 更新后记录仍然有效
+        match = re.search(r'smzdm_id=([^;\s]+)', cookie)
+        account = match.group(1) if match else cookie
+        digest = hashlib.sha256(f"smzdm|{account}".encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(CACHE_DIR, f"smzdm_exp_{digest}.json")
+
+    @staticmethod
+    def entry_key(row):
+        """经验条目标识：优先使用条目 ID，否则使用条目内容摘要"""
+        if row.get('id'):
+            return str(row['id'])
+        return hashlib.sha1(json.dumps(row, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+    def load(self, month):
+        """读取本月已记录的条目 {标识: 经验值}，跨月后清空"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("month") == month:
+                return data.get("entries", {})
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def save(self, month, entries):
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"month": month, "entries": entries}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"经验记录保存失败: {e}")
 
-        for page in range(1, 4):  # 查询前3页
-            url = f'https://zhiyou.m.smzdm.com/user/exp/ajax_log?page={page}'
-            headers = {
-                'Host': 'zhiyou.m.smzdm.com',
-                'Accept': 'application/json, text/plain, */*',
-                'Connection': 'keep-alive',
-                'Cookie': cookie,
-                'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 15_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148/smzdm 10.4.40 rv:137.6 (iPhone 13; iOS 15.6; zh_CN)/iphone_smzdmapp/10.4.40/wkwebview/jsbv_1.0.0',
-                'Accept-Language': 'zh-CN,zh-Hans;q=0.9',
-                'Referer': 'https://zhiyou.m.smzdm.com/user/exp/',
-                'Accept-Encoding': 'gzip, deflate, br'
-            }
 
-            resp = requests.get(url=url, headers=headers, timeout=10)
+def fetch_exp_page(cookie, page):
+    """查询单页经验记录，失败时返回 None"""
+    url = f'{EXP_LOG_URL}?page={page}'
+    resp = exp_session.get(url=url, headers={'Cookie': cookie}, timeout=10)
 
-            logger.debug(f"API 请求：GET {url} {resp.status_code}")
-            logger.debug(f"响应：{resp.text[:300]}")
+    logger.debug(f"API 请求：GET {url} {resp.status_code}")
+    logger.debug(f"响应：{resp.text[:300]}")
 
-            if resp.status_code != 200:
-                break
+    if resp.status_code != 200:
+        return None
+    return resp.json().get('data', {}).get('rows', [])
 
-            result = resp.json()
-            rows = result.get('data', {}).get('rows', [])
 
-            if not rows:
-                break
+def get_monthly_exp(cookie):
+    """获取本月经验（增量查询：从最新一页开始，遇到已记录的条目即停止）"""
+    logger.info("开始获取本月经验...")
+    try:
+        current_month = datetime.now().strftime('%Y-%m')
+        exp_ledger = ExpLedger(cookie)
+        entries = exp_ledger.load(current_month)
+        known_count = len(entries)
 
+        def merge_rows(rows):
+            """合并一页条目，返回是否已到达已记录条目或上月条目"""
             for row in rows:
+                key = exp_ledger.entry_key(row)
+                if key in entries:
+                    return True
                 exp_date = row.get('creation_date', '')[:7]
                 if exp_date == current_month:
-                    total_exp += int(row.get('add_exp', 0))
+                    entries[key] = int(row.get('add_exp', 0))
                 elif exp_date < current_month:
-                    # 如果日期小于当前月份，说明已经查完了
-                    logger.info(f"查询完成，原因：本月经验={total_exp}")
-                    return total_exp
-
-            # 添加请求间隔
-            time.sleep(random.uniform(0.5, 1.5))
-
-        logger.info(f"查询完成，原因：本月经验={total_exp}")
+                    return True
+            return False
+
+        # 先查询最新一页，新增条目不足一页时无需继续
+        rows = fetch_exp_page(cookie, 1)
+        if rows is None:
+            logger.info("查询失败，原因：经验接口请求失败，使用已记录的本月经验")
+            return sum(entries.values())
+
+        complete = not rows or merge_rows(rows)
+        if not complete:
+            # 其余页并发查询，按页码顺序合并
+            pages = range(2, EXP_MAX_PAGES + 1)
+            with ThreadPoolExecutor(max_workers=len(pages)) as executor:
+                results = list(executor.map(lambda page: fetch_exp_page(cookie, page), pages))
+            for rows in results:
+                if rows is None:
+                    # 中间页查询失败时不保存，避免记录出现缺口
+                    logger.warning("部分经验记录查询失败，本次结果不保存")
+                    return sum(entries.values())
+                if not rows or merge_rows(rows):
+                    break
+            else:
+                # 达到页数上限仍未衔接到已记录条目或上月条目，未查询的部分会成为缺口，不保存
+                logger.warning(f"经验记录超过{EXP_MAX_PAGES}页仍未衔接到已记录的条目，本次结果不保存")
+                return sum(entries.values())
+
+        exp_ledger.save(current_month, entries)
+        total_exp = sum(entries.values())
+        logger.info(f"查询完成，原因：本月经验={total_exp}（新增{len(entries) - known_count}条）")
         return total_exp
     except Exception as e:
         logger.error(f"查询失败，原因：{e}")
@@ -331,6 +404,29 @@ def smzdm_signin(cookie, index):
         logger.error(error_msg)
         return error_msg, False
 
+# ---------------- 每日签到记录（.github/workflows/checkin_ledger.py） ----------------
+try:
+    from checkin_ledger import CheckinLedger, account_id
+except ImportError:
+    class CheckinLedger:
+        """未找到 checkin_ledger 模块时不记录、不跳过"""
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def succeeded(self, account):
+            return None
+
+        def record(self, account):
+            pass
+
+    def account_id(credential, *fields):
+        return credential.strip()
+
+
+ledger = CheckinLedger("smzdm", CACHE_DIR)
+
+
 def main():
     """主程序入口"""
     logger.info(f"==== 什么值得买签到开始 - {now_beijing().strftime('%Y-%m-%d %H:%M:%S')} ====")
@@ -351,19 +447,29 @@ def main():
     success_count = 0
     total_count = len(SMZDM_COOKIEs)
 
+    processed = 0
     for i, cookie in enumerate(SMZDM_COOKIEs):
         try:
+            # 今日已签到成功的账号直接跳过
+            signed_at = ledger.succeeded(account_id(cookie, "smzdm_id"))
+            if signed_at:
+                logger.info(f"⏭️ 账号{i + 1} 今日 {signed_at} 已签到成功，跳过（FORCE_CHECKIN=true 可强制签到）")
+                success_count += 1
+                continue
+
             # 账号间随机等待
-            if i > 0:
+            if processed > 0:
                 delay = random.uniform(5, 15)
                 logger.info(f"随机等待 {delay:.1f} 秒后处理下一个账号...")
                 time.sleep(delay)
+            processed += 1
 
             # 执行签到
             result_msg, is_success = smzdm_signin(cookie.strip(), i + 1)
 
             if is_success:
                 success_count += 1
+                ledger.record(account_id(cookie, "smzdm_id"))
 
             # 发送单个账号通知（统一格式）
             title = f"[什么值得买]签到{'成功' if is_success else '失败'}"
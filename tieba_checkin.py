@@ -17,7 +17,9 @@ import json
 import os
 import random
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from typing import Optional, Union
 
@@ -34,6 +36,7 @@ import requests
 class Logger:
     def __init__(self):
         self.debug_mode = os.getenv("DEBUG_MODE", "false").lower() == "true"
+        self.lock = threading.Lock()  # 多线程签到时保证每条日志整行输出
 
     def log(self, level, message):
         if BEIJING_TZ:
@@ -41,7 +44,8 @@ class Logger:
         else:
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         formatted_msg = f"{timestamp} {level} {message}"
-        print(formatted_msg)
+        with self.lock:
+            print(formatted_msg)
 
     def info(self, message):
         self.log("INFO", message)
@@ -88,6 +92,166 @@ def safe_send_notify(title, content):
         logger.info(f"📢 {title}")
         logger.info(f"📄 {content}")
 
+# ---------------- 本地缓存 ----------------
+CACHE_DIR = os.getenv("CHECKIN_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+FORUM_CACHE_TTL = float(os.getenv("TIEBA_FORUM_CACHE_HOURS", "24")) * 3600  # 关注列表缓存有效期，0 表示不缓存
+
+# ---------------- 签到速率配置 ----------------
+SIGN_WORKERS = max(1, int(os.getenv("TIEBA_SIGN_WORKERS", "3")))  # 并发签到线程数
+SIGN_RATE = float(os.getenv("TIEBA_SIGN_RATE", "0.6"))  # 初始签到速率（次/秒）
+SIGN_RATE_MAX = float(os.getenv("TIEBA_SIGN_RATE_MAX", "3"))  # 签到速率上限（次/秒）
+SIGN_RATE_MIN = 0.1  # 签到速率下限（次/秒）
+SIGN_RATE_STEP = 0.05  # 每次签到成功后的提速幅度
+SIGN_THROTTLE_PAUSE = (5, 10)  # 触发限流后暂停的秒数范围
+SIGN_THROTTLE_RETRY = 2  # 单个贴吧因限流重试次数
+THROTTLE_CODES = {"340011"}  # 签到过快的错误码
+
+# ---------------- 批量签到配置 ----------------
+BATCH_SIGN = os.getenv("TIEBA_BATCH_SIGN", "false").lower() == "true"  # 是否启用客户端一键签到接口
+BATCH_SIGN_SIZE = max(1, int(os.getenv("TIEBA_BATCH_SIGN_SIZE", "50")))  # 每次批量签到的贴吧数
+BATCH_SIGN_MIN_LEVEL = int(os.getenv("TIEBA_BATCH_SIGN_MIN_LEVEL", "7"))  # 一键签到要求的最低吧等级
+
+
+class TokenBucket:
+    """自适应令牌桶：签到成功时逐步提速，遇到限流（THROTTLE_CODES）时速率减半并暂停发放令牌"""
+
+    def __init__(self, rate: float, min_rate: float, max_rate: float, capacity: float = 2):
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.capacity = capacity
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now >= self.updated:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    # 限流暂停中
+                    wait = self.updated - now
+            time.sleep(wait + random.uniform(0, 0.2))
+
+    def speed_up(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + SIGN_RATE_STEP)
+
+    def back_off(self) -> float:
+        pause = random.uniform(*SIGN_THROTTLE_PAUSE)
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            self.updated = max(self.updated, time.monotonic()) + pause
+        return pause
+
+
+class SignJournal:
+    """
+    贴吧签到日志：按 BDUSS 和日期（北京时间）逐行记录每个贴吧的签到结果，
+    中断后重新运行时只签到尚未完成的贴吧
+    """
+
+    # 已有最终结果、当天无需再次请求的状态
+    FINAL_STATUSES = ("success", "exist", "shield")
+
+    def __init__(self, bduss: str):
+        self.prefix = f"tieba_journal_{hashlib.sha256(bduss.encode('utf-8')).hexdigest()[:16]}_"
+        self.date = now_beijing().strftime("%Y-%m-%d")
+        self.path = os.path.join(CACHE_DIR, f"{self.prefix}{self.date}.jsonl")
+        self.lock = threading.Lock()
+        self._cleanup()
+
+    def _cleanup(self):
+        """删除该账号往日的签到日志"""
+        try:
+            for filename in os.listdir(CACHE_DIR):
+                if filename.startswith(self.prefix) and not filename.endswith(f"{self.date}.jsonl"):
+                    os.remove(os.path.join(CACHE_DIR, filename))
+        except OSError:
+            pass
+
+    def load(self) -> dict:
+        """读取今日已完成的贴吧，返回 {贴吧ID: 状态}"""
+        done = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # 中断时可能写入了不完整的行
+                    if entry.get("status") in self.FINAL_STATUSES:
+                        done[str(entry.get("fid"))] = entry["status"]
+        except OSError:
+            pass
+        return done
+
+    def record(self, fid: str, status: str):
+        line = json.dumps({"fid": str(fid), "status": status}) + "\n"
+        with self.lock:
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            except OSError as e:
+                logger.warning(f"签到日志写入失败: {e}")
+
+
+class ForumCache:
+    """关注贴吧列表缓存：按 BDUSS 保存列表及获取时间，过期或签到提示未关注时重新获取"""
+
+    def __init__(self, bduss: str):
+        key = hashlib.sha256(bduss.encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(CACHE_DIR, f"tieba_forums_{key}.json")
+
+    def load(self) -> Optional[list]:
+        if FORUM_CACHE_TTL <= 0:
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        age = time.time() - data.get("fetched_at", 0)
+        if age > FORUM_CACHE_TTL or not data.get("forums"):
+            return None
+        logger.info(f"使用缓存的贴吧列表（{age / 3600:.1f} 小时前获取），共 {len(data['forums'])} 个关注的贴吧")
+        return data["forums"]
+
+    def save(self, forums: list):
+        if FORUM_CACHE_TTL <= 0:
+            return
+        data = {
+            "fetched_at": time.time(),
+            "forums": [
+                {"id": forum.get("id", ""), "name": forum.get("name", ""), "level_id": forum.get("level_id", "0")}
+                for forum in forums
+            ],
+        }
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"贴吧列表缓存保存失败: {e}")
+
+    def invalidate(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
 class Tieba:
     name = "百度贴吧"
 
@@ -96,6 +260,7 @@ class Tieba:
         self.TBS_URL = "http://tieba.baidu.com/dc/common/tbs"
         self.LIKE_URL = "http://c.tieba.baidu.com/c/f/forum/like"
         self.SIGN_URL = "http://c.tieba.baidu.com/c/c/forum/sign"
+        self.MSIGN_URL = "http://c.tieba.baidu.com/c/c/forum/msign"
         self.SIGN_KEY = "tiebaclient!!!"
 
         self.HEADERS = {
@@ -117,6 +282,9 @@ class Tieba:
 
         self.session = requests.Session()
         self.session.headers.update(self.HEADERS)
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=SIGN_WORKERS)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
         if not cookie:
             raise ValueError("必须提供 BDUSS 或完整 Cookie")
@@ -131,6 +299,9 @@ class Tieba:
 
         requests.utils.add_dict_to_cookiejar(self.session.cookies, cookie_dict)
         self.bduss = cookie_dict.get("BDUSS", "")
+        self.stats = None
+        self.forum_cache = ForumCache(self.bduss)
+        self.forum_list_stale = False
         if not self.bduss:
             raise ValueError("Cookie 中未找到 BDUSS")
 
@@ -241,69 +412,183 @@ class Tieba:
         logger.info(f"获取贴吧列表成功，共 {len(forums)} 个关注的贴吧")
         return forums
 
+    def load_forums(self) -> list[dict]:
+        """优先使用缓存的关注列表，缓存失效时分页获取并写入缓存"""
+        forums = self.forum_cache.load()
+        if forums:
+            return forums
+        forums = self.get_favorite()
+        if forums:
+            self.forum_cache.save(forums)
+        return forums
+
+    def sign_forum(self, forum: dict, tbs: str) -> dict:
+        """签到单个贴吧，返回接口原始结果"""
+        data = self.SIGN_DATA.copy()
+        data.update(
+            {
+                "BDUSS": self.bduss,
+                "fid": forum.get("id", ""),
+                "kw": forum.get("name", ""),
+                "tbs": tbs,
+                "timestamp": str(int(time.time())),
+            }
+        )
+        data = self.encode_data(data)
+        return self.request(self.SIGN_URL, "post", data)
+
+    def batch_sign(self, forums: list, tbs: str, limiter: TokenBucket) -> dict:
+        """
+        使用客户端一键签到接口分批签到，返回 {贴吧ID: 状态}，
+        未出现在结果中的贴吧需要逐个签到
+        """
+        results = {}
+        for start in range(0, len(forums), BATCH_SIGN_SIZE):
+            chunk = forums[start:start + BATCH_SIGN_SIZE]
+            limiter.acquire()
+            data = self.SIGN_DATA.copy()
+            data.update(
+                {
+                    "BDUSS": self.bduss,
+                    "forum_ids": ",".join(str(forum.get("id", "")) for forum in chunk),
+                    "tbs": tbs,
+                    "timestamp": str(int(time.time())),
+                }
+            )
+            data = self.encode_data(data)
+            try:
+                result = self.request(self.MSIGN_URL, "post", data)
+            except Exception as e:
+                # 网络异常不是限流信号，不降速
+                logger.warning(f"批量签到请求异常，{len(chunk)} 个贴吧改为逐个签到: {e}")
+                continue
+
+            if result.get("error_code", "") != "0":
+                if result.get("error_code", "") in THROTTLE_CODES:
+                    limiter.back_off()
+                logger.warning(f"批量签到被拒绝（{result.get('error_msg', '未知错误')}），{len(chunk)} 个贴吧改为逐个签到")
+                continue
+
+            limiter.speed_up()
+            for info in result.get("info", []):
+                fid = str(info.get("forum_id", ""))
+                error = info.get("error") or {}
+                err_no = str(error.get("err_no", "0"))
+                if str(info.get("signed", "0")) == "1" and err_no == "0":
+                    results[fid] = "success"
+                    logger.info(f"【{info.get('forum_name', fid)}】吧 批量签到成功")
+                elif err_no == "160002":
+                    results[fid] = "exist"
+                    logger.info(f"【{info.get('forum_name', fid)}】吧 今日已签到")
+                elif err_no == "340006":
+                    results[fid] = "shield"
+                    logger.warning(f"【{info.get('forum_name', fid)}】吧 贴吧已被屏蔽")
+            logger.info(f"批量签到完成 {min(start + BATCH_SIGN_SIZE, len(forums))}/{len(forums)}")
+        return results
+
+    def _sign_worker(self, forum: dict, tbs: str, log_prefix: str, limiter: TokenBucket) -> str:
+        """在令牌桶限速下签到单个贴吧，返回签到状态"""
+        for attempt in range(SIGN_THROTTLE_RETRY + 1):
+            limiter.acquire()
+            try:
+                result = self.sign_forum(forum, tbs)
+            except Exception as e:
+                # 网络异常不是限流信号，不降速
+                logger.error(f"{log_prefix} 签到异常: {str(e)}")
+                return "error"
+
+            error_code = result.get("error_code", "")
+            if error_code == "0":
+                limiter.speed_up()
+                if "user_info" in result and "user_sign_rank" in result["user_info"]:
+                    rank = result["user_info"]["user_sign_rank"]
+                    logger.info(f"{log_prefix} 签到成功，第{rank}个签到")
+                else:
+                    logger.info(f"{log_prefix} 签到成功")
+                return "success"
+            elif error_code == "160002":
+                logger.info(f"{log_prefix} {result.get('error_msg', '今日已签到')}")
+                return "exist"
+            elif error_code == "340006":
+                logger.warning(f"{log_prefix} 贴吧已被屏蔽")
+                return "shield"
+            elif error_code in THROTTLE_CODES and attempt < SIGN_THROTTLE_RETRY:
+                pause = limiter.back_off()
+                logger.warning(f"{log_prefix} 签到过快，降速并暂停 {pause:.1f} 秒后重试")
+                continue
+            else:
+                error_msg = result.get('error_msg', '未知错误')
+                # 已取消关注的贴吧，说明缓存的关注列表已过时
+                if "关注" in error_msg:
+                    self.forum_list_stale = True
+                logger.error(f"{log_prefix} 签到失败，错误: {error_msg}")
+                return "error"
+        return "error"
+
     def sign_forums(self, forums, tbs: str) -> dict:
-        success_count, error_count, exist_count, shield_count = 0, 0, 0, 0
+        stats = {"success": 0, "exist": 0, "shield": 0, "error": 0}
         total = len(forums)
-        logger.info(f"开始签到 {total} 个贴吧...")
-        logger.info("=" * 60)
 
-        last_request_time = time.time()
+        # 跳过今日签到日志中已有结果的贴吧（已签到成功的按"已经签到"统计）
+        journal = SignJournal(self.bduss)
+        done = journal.load()
+        pending = []
         for idx, forum in enumerate(forums):
-            # 签到间隔控制
-            elapsed = time.time() - last_request_time
-            delay = max(0, 1.0 + random.uniform(0.5, 1.5) - elapsed)
-            if delay > 0:
-                time.sleep(delay)
-            last_request_time = time.time()
-
-            # 每10个贴吧显示进度并休息一下
-            if (idx + 1) % 10 == 0:
-                completed = idx + 1
-                progress = (completed / total) * 100
-                logger.info(f"签到进度: {completed}/{total} ({progress:.1f}%)")
-                extra_delay = random.uniform(3, 8)
-                logger.debug(f"休息 {extra_delay:.1f} 秒...")
-                time.sleep(extra_delay)
-
-            forum_name = forum.get("name", "")
-            forum_id = forum.get("id", "")
-            log_prefix = f"【{forum_name}】吧({idx + 1}/{total})"
-
-            try:
-                data = self.SIGN_DATA.copy()
-                data.update(
-                    {
-                        "BDUSS": self.bduss,
-                        "fid": forum_id,
-                        "kw": forum_name,
-                        "tbs": tbs,
-                        "timestamp": str(int(time.time())),
-                    }
-                )
-                data = self.encode_data(data)
-                result = self.request(self.SIGN_URL, "post", data)
-                error_code = result.get("error_code", "")
-
-                if error_code == "0":
-                    success_count += 1
-                    if "user_info" in result and "user_sign_rank" in result["user_info"]:
-                        rank = result["user_info"]["user_sign_rank"]
-                        logger.info(f"{log_prefix} 签到成功，第{rank}个签到")
-                    else:
-                        logger.info(f"{log_prefix} 签到成功")
-                elif error_code == "160002":
-                    exist_count += 1
-                    logger.info(f"{log_prefix} {result.get('error_msg', '今日已签到')}")
-                elif error_code == "340006":
-                    shield_count += 1
-                    logger.warning(f"{log_prefix} 贴吧已被屏蔽")
-                else:
-                    error_count += 1
-                    logger.error(f"{log_prefix} 签到失败，错误: {result.get('error_msg', '未知错误')}")
+            status = done.get(str(forum.get("id", "")))
+            if status:
+                stats["shield" if status == "shield" else "exist"] += 1
+            else:
+                pending.append((idx, forum))
+        if done:
+            logger.info(f"从今日签到日志恢复 {total - len(pending)} 个已完成的贴吧，跳过")
+
+        limiter = TokenBucket(SIGN_RATE, SIGN_RATE_MIN, SIGN_RATE_MAX)
+
+        # 批量签到：等级满足要求的贴吧先走一键签到，被拒绝的再逐个签到
+        if BATCH_SIGN:
+            eligible = [
+                forum for _, forum in pending
+                if int(forum.get("level_id", 0) or 0) >= BATCH_SIGN_MIN_LEVEL
+            ]
+            if eligible:
+                logger.info(f"开始批量签到 {len(eligible)} 个贴吧（每批 {BATCH_SIGN_SIZE} 个）...")
+                batch_results = self.batch_sign(eligible, tbs, limiter)
+                for fid, status in batch_results.items():
+                    stats[status] += 1
+                    journal.record(fid, status)
+                pending = [(idx, forum) for idx, forum in pending if str(forum.get("id", "")) not in batch_results]
+
+        logger.info(f"开始签到 {len(pending)} 个贴吧（并发 {SIGN_WORKERS}）...")
+        logger.info("=" * 60)
 
-            except Exception as e:
-                error_count += 1
-                logger.error(f"{log_prefix} 签到异常: {str(e)}")
+        lock = threading.Lock()
+        completed = total - len(pending)
+
+        def sign_task(idx, forum):
+            nonlocal completed
+            log_prefix = f"【{forum.get('name', '')}】吧({idx + 1}/{total})"
+            status = self._sign_worker(forum, tbs, log_prefix, limiter)
+            if status in SignJournal.FINAL_STATUSES:
+                journal.record(forum.get("id", ""), status)
+            with lock:
+                stats[status] += 1
+                completed += 1
+                # 每10个贴吧显示进度
+                if completed % 10 == 0 and completed < total:
+                    progress = (completed / total) * 100
+                    logger.info(f"签到进度: {completed}/{total} ({progress:.1f}%)，当前速率 {limiter.rate:.2f} 次/秒")
+
+        with ThreadPoolExecutor(max_workers=SIGN_WORKERS, thread_name_prefix="tieba-sign") as executor:
+            futures = {executor.submit(sign_task, idx, forum): forum for idx, forum in pending}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    # 签到任务自身出错（如日志写入失败），计为失败而不是静默丢弃
+                    logger.error(f"【{futures[future].get('name', '')}】吧 签到任务异常: {e}")
+                    with lock:
+                        stats["error"] += 1
+                        completed += 1
 
         # 显示最终进度
         if total > 0:
@@ -312,19 +597,13 @@ class Tieba:
         logger.info("=" * 60)
         logger.info(f"📊 === 签到统计汇总 ===")
         logger.info(f"📋 贴吧总数: {total}")
-        logger.info(f"✅ 签到成功: {success_count}")
-        logger.info(f"📅 已经签到: {exist_count}")
-        logger.info(f"🚫 被屏蔽的: {shield_count}")
-        logger.info(f"❌ 签到失败: {error_count}")
+        logger.info(f"✅ 签到成功: {stats['success']}")
+        logger.info(f"📅 已经签到: {stats['exist']}")
+        logger.info(f"🚫 被屏蔽的: {stats['shield']}")
+        logger.info(f"❌ 签到失败: {stats['error']}")
         logger.info("=" * 60)
 
-        return {
-            "total": total,
-            "success": success_count,
-            "exist": exist_count,
-            "shield": shield_count,
-            "error": error_count,
-        }
+        return {"total": total, **stats}
 
     def main(self) -> tuple[str, bool]:  # 修改返回类型，增加成功状态
         try:
@@ -339,7 +618,7 @@ class Tieba:
                 return error_msg, False
 
             # 获取关注的贴吧
-            forums = self.get_favorite()
+            forums = self.load_forums()
 
             if not forums:
                 error_msg = f"❌ 账号{self.index}: {user_name}\n获取贴吧列表失败，无法完成签到"
@@ -349,6 +628,10 @@ class Tieba:
             # 开始签到
             start_time = time.time()
             stats = self.sign_forums(forums, tbs)
+            self.stats = stats
+            if self.forum_list_stale:
+                logger.info("检测到未关注的贴吧，下次运行将重新获取贴吧列表")
+                self.forum_cache.invalidate()
             end_time = time.time()
             duration = int(end_time - start_time)
 
@@ -384,6 +667,29 @@ class Tieba:
             logger.error(error_msg)
             return error_msg, False
 
+# ---------------- 每日签到记录（.github/workflows/checkin_ledger.py） ----------------
+try:
+    from checkin_ledger import CheckinLedger, account_id
+except ImportError:
+    class CheckinLedger:
+        """未找到 checkin_ledger 模块时不记录、不跳过"""
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def succeeded(self, account):
+            return None
+
+        def record(self, account):
+            pass
+
+    def account_id(credential, *fields):
+        return credential.strip()
+
+
+ledger = CheckinLedger("tieba", CACHE_DIR)
+
+
 def main():
     """主程序入口"""
     logger.info(f"==== 百度贴吧签到开始 - {now_beijing().strftime('%Y-%m-%d %H:%M:%S')} ====")
@@ -404,13 +710,22 @@ def main():
     all_results = []
     success_accounts = 0
 
+    processed = 0
     for index, cookie in enumerate(cookies):
         try:
+            # 今日已全部签到成功的账号直接跳过
+            signed_at = ledger.succeeded(account_id(cookie, "BDUSS"))
+            if signed_at:
+                logger.info(f"⏭️ 账号{index + 1} 今日 {signed_at} 已签到成功，跳过（FORCE_CHECKIN=true 可强制签到）")
+                success_accounts += 1
+                continue
+
             # 账号间随机等待
-            if index > 0:
+            if processed > 0:
                 delay = random.uniform(10, 30)
                 logger.debug(f"随机等待 {delay:.1f} 秒后处理下一个账号...")
                 time.sleep(delay)
+            processed += 1
 
             # 执行签到
             tieba = Tieba(cookie, index + 1)
@@ -419,6 +734,9 @@ def main():
 
             if is_success:
                 success_accounts += 1
+                # 所有贴吧均无失败时才记录，便于下次运行补签失败的贴吧
+                if tieba.stats and tieba.stats["error"] == 0:
+                    ledger.record(account_id(cookie, "BDUSS"))
 
             # 发送单个账号通知（统一格式）
             title = f"[百度贴吧]签到{'成功' if is_success else '失败'}"
@@ -32,6 +32,13 @@ try:
 except ImportError:
     BEIJING_TZ = None
 
+# 可选加密模块（登录会话缓存依赖）
+try:
+    from nacl import secret
+    HAS_NACL = True
+except ImportError:
+    HAS_NACL = False
+
 # ---------------- 日志类 ----------------
 class Logger:
     def __init__(self):
@@ -93,6 +100,59 @@ def safe_send_notify(title, content):
 # 常量定义
 BI_RM = list("0123456789abcdefghijklmnopqrstuvwxyz")
 B64MAP = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+B64_INDEX = {ch: i for i, ch in enumerate(B64MAP)}
+
+# ---------------- 登录会话缓存 ----------------
+CACHE_DIR = os.getenv("CHECKIN_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+session_cache_enabled = os.getenv("TY_SESSION_CACHE", "true").lower() == "true"  # 复用上次登录的会话
+SESSION_PROBE_URL = "https://cloud.189.cn/api/open/user/getUserInfoForPortal.action"
+
+
+class SessionCache:
+    """登录会话缓存：按账号保存登录后的 Cookie，使用账号密码派生的密钥加密，密码变更后自动失效"""
+
+    def __init__(self, username, password):
+        self.enabled = session_cache_enabled and HAS_NACL
+        digest = hashlib.sha256(f"ty_netdisk|{username}".encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(CACHE_DIR, f"ty_netdisk_session_{digest}.json")
+        self.key = hashlib.sha256(f"ty_netdisk|session|{username}|{password}".encode("utf-8")).digest()
+
+    def load(self):
+        """读取并解密 Cookie 列表，不存在或无法解密时返回 None"""
+        if not self.enabled:
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            plain = secret.SecretBox(self.key).decrypt(base64.b64decode(data["cookies"]))
+            return json.loads(plain.decode("utf-8"))
+        except Exception:
+            return None
+
+    def save(self, cookie_jar):
+        if not self.enabled:
+            return
+        cookies = [
+            {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path}
+            for c in cookie_jar
+        ]
+        try:
+            encrypted = secret.SecretBox(self.key).encrypt(json.dumps(cookies).encode("utf-8"))
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"saved_at": now_beijing().strftime("%Y-%m-%d %H:%M:%S"),
+                           "cookies": base64.b64encode(encrypted).decode("utf-8")}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"登录会话保存失败: {e}")
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
 
 class TianYiYunPan:
     def __init__(self, username, password, index):
@@ -100,37 +160,38 @@ class TianYiYunPan:
         self.password = password
         self.index = index
         self.session = requests.Session()
-
-    def int2char(self, a):
-        return BI_RM[a]
+        self.session_cache = SessionCache(username, password)
+        self.session_restored = False
 
     def b64tohex(self, a):
-        d = ""
+        """base64 转十六进制（逐字符查表，线性时间，结果与 base64 解码后转 hex 一致）"""
+        d = []
         e = 0
         c = 0
-        for i in range(len(a)):
-            if list(a)[i] != "=":
-                v = B64MAP.index(list(a)[i])
-                if 0 == e:
-                    e = 1
-                    d += self.int2char(v >> 2)
-                    c = 3 & v
-                elif 1 == e:
-                    e = 2
-                    d += self.int2char(c << 2 | v >> 4)
-                    c = 15 & v
-                elif 2 == e:
-                    e = 3
-                    d += self.int2char(c)
-                    d += self.int2char(v >> 2)
-                    c = 3 & v
-                else:
-                    e = 0
-                    d += self.int2char(c << 2 | v >> 4)
-                    d += self.int2char(15 & v)
+        for ch in a:
+            if ch == "=":
+                continue
+            v = B64_INDEX[ch]
+            if 0 == e:
+                e = 1
+                d.append(BI_RM[v >> 2])
+                c = 3 & v
+            elif 1 == e:
+                e = 2
+                d.append(BI_RM[c << 2 | v >> 4])
+                c = 15 & v
+            elif 2 == e:
+                e = 3
+                d.append(BI_RM[c])
+                d.append(BI_RM[v >> 2])
+                c = 3 & v
+            else:
+                e = 0
+                d.append(BI_RM[c << 2 | v >> 4])
+                d.append(BI_RM[15 & v])
         if e == 1:
-            d += self.int2char(c << 2)
-        return d
+            d.append(BI_RM[c << 2])
+        return "".join(d)
 
     def rsa_encode(self, j_rsakey, string):
         rsa_key = f"-----BEGIN PUBLIC KEY-----\n{j_rsakey}\n-----END PUBLIC KEY-----"
@@ -138,6 +199,32 @@ class TianYiYunPan:
         result = self.b64tohex((base64.b64encode(rsa.encrypt(f'{string}'.encode(), pubkey))).decode())
         return result
 
+    def restore_session(self):
+        """恢复上次登录的会话，并用一次轻量请求验证是否仍然有效"""
+        cookies = self.session_cache.load()
+        if not cookies:
+            return False
+
+        for cookie in cookies:
+            self.session.cookies.set(cookie["name"], cookie["value"], domain=cookie["domain"], path=cookie["path"])
+
+        try:
+            r = self.session.get(SESSION_PROBE_URL, headers={"Accept": "application/json;charset=UTF-8"},
+                                 allow_redirects=False, timeout=15)
+            logger.debug(f"API 请求：GET {SESSION_PROBE_URL} {r.status_code}")
+            logger.debug(f"响应：{r.text[:300]}")
+            if r.status_code == 200 and str(r.json().get("res_code")) == "0":
+                logger.info(f"账号{self.index} 已恢复上次的登录会话，跳过登录")
+                self.session_restored = True
+                return True
+        except Exception as e:
+            logger.debug(f"登录会话验证失败: {e}")
+
+        logger.info(f"账号{self.index} 登录会话已失效，重新登录")
+        self.session.cookies.clear()
+        self.session_cache.remove()
+        return False
+
     def login(self):
         """登录天翼云盘"""
         logger.info(f"账号{self.index} 开始登录...")
@@ -222,6 +309,7 @@ class TianYiYunPan:
                 redirect_url = result['toUrl']
                 logger.debug(f"正在访问重定向URL完成登录流程...")
                 self.session.get(redirect_url, timeout=15)
+                self.session_cache.save(self.session.cookies)
                 return True
             else:
                 logger.error(f"账号{self.index} 登录失败，原因：{result['msg']}")
@@ -253,8 +341,13 @@ class TianYiYunPan:
 
             result = response.json()
 
+            # 会话失效时接口返回 errorCode/res_code 错误体而不是签到结果，不能当作已签到
+            if result.get('errorCode') or str(result.get('res_code', 0)) != "0" or 'isSign' not in result:
+                reason = result.get('errorMsg') or result.get('res_message') or result.get('errorCode') or response.text[:100]
+                raise Exception(f"签到接口返回错误：{reason}")
+
             netdiskBonus = result.get('netdiskBonus', 0)
-            isSign = result.get('isSign', 'true')
+            isSign = str(result['isSign']).lower()
 
             if isSign == "false":
                 status_msg = f"签到成功，获得 {netdiskBonus}M 空间"
@@ -276,8 +369,8 @@ class TianYiYunPan:
             logger.info(f"\n==== 账号{self.index} 开始执行 ====")
             logger.info(f"开始时间: {now_beijing().strftime('%Y-%m-%d %H:%M:%S')}")
 
-            # 登录
-            if not self.login():
+            # 登录（优先复用上次的登录会话）
+            if not self.restore_session() and not self.login():
                 error_msg = f"❌ 账号{self.index}: {self.username}\n登录失败，无法完成签到"
                 logger.error(error_msg)
                 return error_msg, False
@@ -285,6 +378,15 @@ class TianYiYunPan:
             # 签到
             sign_result = self.sign_in()
 
+            # 复用的会话签到被拒绝（错误体、缺少签到结果或请求异常）时，作废缓存并重新登录后再试一次
+            if self.session_restored and sign_result.startswith("签到异常"):
+                logger.info(f"账号{self.index} 复用会话签到失败，重新登录后重试")
+                self.session.cookies.clear()
+                self.session_cache.remove()
+                self.session_restored = False
+                if self.login():
+                    sign_result = self.sign_in()
+
             # 格式化结果（统一模板格式）
             result_msg = f"""🌐 域名：cloud.189.cn
 
@@ -306,6 +408,26 @@ class TianYiYunPan:
             logger.error(error_msg)
             return error_msg, False
 
+# ---------------- 每日签到记录（.github/workflows/checkin_ledger.py） ----------------
+try:
+    from checkin_ledger import CheckinLedger
+except ImportError:
+    class CheckinLedger:
+        """未找到 checkin_ledger 模块时不记录、不跳过"""
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def succeeded(self, account):
+            return None
+
+        def record(self, account):
+            pass
+
+
+ledger = CheckinLedger("ty_netdisk", CACHE_DIR)
+
+
 def main():
     """主程序入口"""
     logger.info(f"==== 天翼云盘签到开始 ====")
@@ -338,13 +460,22 @@ def main():
     success_accounts = 0
     all_results = []
 
+    processed = 0
     for index, (username, password) in enumerate(zip(usernames, passwords)):
         try:
+            # 今日已签到成功的账号直接跳过
+            signed_at = ledger.succeeded(username)
+            if signed_at:
+                logger.info(f"⏭️ 账号{index + 1} 今日 {signed_at} 已签到成功，跳过（FORCE_CHECKIN=true 可强制签到）")
+                success_accounts += 1
+                continue
+
             # 账号间随机等待
-            if index > 0:
+            if processed > 0:
                 delay = random.uniform(10, 30)
                 logger.info(f"随机等待 {delay:.1f} 秒后处理下一个账号...")
                 time.sleep(delay)
+            processed += 1
 
             # 执行签到
             tianyi = TianYiYunPan(username, password, index + 1)
@@ -353,6 +484,7 @@ def main():
 
             if is_success:
                 success_accounts += 1
+                ledger.record(username)
 
             # 发送单个账号通知（统一格式）
             title = f"[天翼云盘]签到{'成功' if is_success else '失败'}"
@@ -351,6 +351,30 @@ class YouDaoYun:
             logger.warning("签到失败")
         return final_msg, is_success
 
+# ---------------- 每日签到记录（.github/workflows/checkin_ledger.py） ----------------
+CACHE_DIR = os.getenv("CHECKIN_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+try:
+    from checkin_ledger import CheckinLedger, account_id
+except ImportError:
+    class CheckinLedger:
+        """未找到 checkin_ledger 模块时不记录、不跳过"""
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def succeeded(self, account):
+            return None
+
+        def record(self, account):
+            pass
+
+    def account_id(credential, *fields):
+        return credential.strip()
+
+
+ledger = CheckinLedger("youdaoyun", CACHE_DIR)
+
+
 def main():
     """主程序入口"""
     logger.info(f"==== 有道云笔记签到开始 - {now_beijing().strftime('%Y-%m-%d %H:%M:%S')} ====")
@@ -373,13 +397,22 @@ def main():
     success_count = 0
     total_count = len(cookies)
 
+    processed = 0
     for index, cookie in enumerate(cookies):
         try:
+            # 今日已签到成功的账号直接跳过
+            signed_at = ledger.succeeded(account_id(cookie, "YNOTE_PERS"))
+            if signed_at:
+                logger.info(f"⏭️ 账号{index + 1} 今日 {signed_at} 已签到成功，跳过（FORCE_CHECKIN=true 可强制签到）")
+                success_count += 1
+                continue
+
             # 账号间随机等待
-            if index > 0:
+            if processed > 0:
                 delay = random.uniform(5, 15)
                 logger.info(f"随机等待 {delay:.1f} 秒后处理下一个账号...")
                 time.sleep(delay)
+            processed += 1
 
             # 执行签到
             youdao = YouDaoYun(cookie, index + 1)
@@ -387,6 +420,7 @@ def main():
 
             if is_success:
                 success_count += 1
+                ledger.record(account_id(cookie, "YNOTE_PERS"))
 
             # 发送单个账号通知（统一标题格式）
             status = "成功" if is_success else "失败"